@@ -2,13 +2,17 @@ import math
 from PyQt5 import QtWidgets as qtw
 from PyQt5 import QtCore as qtc
 from PyQt5 import QtGui as qtg
+from Truss_grid import GridScene
 
 class Position():
     """
     I made this position for holding a position in 3D space (i.e., a point).  I've given it some ability to do
     vector arithmitic and vector algebra (i.e., a dot product).  I could have used a numpy array, but I wanted
-    to create my own.  This class uses operator overloading as explained in the class.
+    to create my own.  This class uses operator overloading as explained in the class.  __slots__ keeps each
+    instance small.
     """
+    __slots__=('x', 'y', 'z')
+
     def __init__(self, pos=None, x=None, y=None, z=None):
         """
         x, y, and z have the expected meanings
@@ -46,16 +50,17 @@ class Position():
 
     #this overloads the iterative add operator
     def __iadd__(self, other):
-        if other in (float, int):
+        if type(other) in (float, int):
             self.x += other
             self.y += other
             self.z += other
             return self
-        if type(other) == Position:
+        if isinstance(other, Position):
             self.x += other.x
             self.y += other.y
             self.z += other.z
             return self
+        return NotImplemented
 
     # this is overloading the subtraction operator.  Allows me to subtract Positions. (i.e., c=b-a)
     def __sub__(self, other):
@@ -63,16 +68,17 @@ class Position():
 
     #this overloads the iterative subtraction operator
     def __isub__(self, other):
-        if other in (float, int):
+        if type(other) in (float, int):
             self.x -= other
             self.y -= other
             self.z -= other
             return self
-        if type(other) == Position:
+        if isinstance(other, Position):
             self.x -= other.x
             self.y -= other.y
             self.z -= other.z
             return self
+        return NotImplemented
 
     # this is overloading the multiply operator.  Allows me to multiply a scalar or do a dot product (i.e., b=s*a or c=b*a)
     def __mul__(self, other):
@@ -92,6 +98,7 @@ class Position():
             self.y *= other
             self.z *= other
             return self
+        return NotImplemented
 
     # this is overloading the division operator.  Allows me to divide by a scalar (i.e., b=a/s)
     def __truediv__(self, other):
@@ -99,12 +106,22 @@ class Position():
             return Position((self.x/other, self.y/other, self.z/other))
 
     # this is overloading the /= operator.  Same as a = Position((a.x/other, a.y/other, a.z/other))
-    def __idiv__(self, other):
+    def __itruediv__(self, other):
         if type(other) in (float,int):
             self.x/=other
             self.y/=other
             self.z/=other
             return self
+        return NotImplemented
+
+    # python 2 name for /=, kept for normalize() and older callers
+    __idiv__=__itruediv__
+
+    def dot(self, other):
+        return self.x*other.x+self.y*other.y+self.z*other.z
+
+    def cross(self, other):
+        return Position((self.y*other.z-self.z*other.y, self.z*other.x-self.x*other.z, self.x*other.y-self.y*other.x))
     #endregion
 
     def set(self,strXYZ=None, tupXYZ=None):
@@ -309,7 +326,7 @@ class TrussController():
 class TrussView():
     def __init__(self):
         #setup widgets for display.  redefine these when you have a gui to work with using setDisplayWidgets
-        self.scene=qtw.QGraphicsScene()
+        self.scene=GridScene()
         self.le_LongLinkName=qtw.QLineEdit()
         self.le_LongLinkNode1=qtw.QLineEdit()
         self.le_LongLinkNode2=qtw.QLineEdit()
@@ -393,49 +410,20 @@ class TrussView():
 
     def drawAGrid(self, DeltaX=10, DeltaY=10, Height=320, Width=180, CenterX=120, CenterY=60):
         """
-        This makes a grid for reference.  No snapping to grid enabled.
+        This makes a grid for reference.  No snapping to grid enabled.  The grid lines are not scene items: the
+        GridScene above paints them in its background for the visible area only, and widens the spacing as you zoom
+        out.
         :param DeltaX: grid spacing in x direction
         :param DeltaY: grid spacing in y direction
-        :param Height: height of grid (y)
-        :param Width: width of grid (x)
-        :param CenterX: center of grid (x, in scene coords)
-        :param CenterY: center of grid (y, in scene coords)
-        :param Pen: pen for grid lines
-        :param Brush: brush for background
+        :param Height: height of the scene rect (y)
+        :param Width: width of the scene rect (x)
+        :param CenterX: center of the scene rect (x, in scene coords)
+        :param CenterY: center of the scene rect (y, in model coords, flipped for the scene)
         :return: nothing
         """
-        Pen=self.penGridLines
-        Brush=self.brushGrid
-        height = self.scene.sceneRect().height() if Height is None else Height
-        width = self.scene.sceneRect().width() if Width is None else Width
-        left = self.scene.sceneRect().left() if CenterX is None else (CenterX - width / 2.0)
-        right = self.scene.sceneRect().right() if CenterX is None else (CenterX + width / 2.0)
-        top = -1.0*self.scene.sceneRect().top() if CenterY is None else (CenterY + height / 2.0)
-        bottom = -1.0*self.scene.sceneRect().bottom() if CenterY is None else (CenterY - height / 2.0)
-        Dx = DeltaX
-        Dy = DeltaY
-        pen = qtg.QPen() if Pen is None else Pen
-
-        # make the background rectangle first
-        if Brush is not None:
-            rect = qtw.QGraphicsRectItem(left, -top, width, height)
-            rect.setBrush(Brush)
-            rect.setPen(pen)
-            self.scene.addItem(rect)
-        # draw the vertical grid lines
-        x = left
-        while x <= right:
-            lVert = qtw.QGraphicsLineItem(x, -top, x, -bottom)
-            lVert.setPen(pen)
-            self.scene.addItem(lVert)
-            x += Dx
-        # draw the horizontal grid lines
-        y = bottom
-        while y <= top:
-            lHor = qtw.QGraphicsLineItem(left, -y, right, -y) #now flip y
-            lHor.setPen(pen)
-            self.scene.addItem(lHor)
-            y += Dy
+        self.scene.setGrid(DeltaX, DeltaY, pen=self.penGridLines, brush=self.brushGrid)
+        if None not in (Height, Width, CenterX, CenterY):
+            self.scene.setSceneRect(CenterX - Width / 2.0, -(CenterY + Height / 2.0), Width, Height)
 
     def drawLinks(self, truss=None):
         scene=self.scene
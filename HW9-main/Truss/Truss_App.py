@@ -2,7 +2,8 @@ from Truss_GUI import Ui_TrussStructuralDesign
 from PyQt5 import QtWidgets as qtw
 from PyQt5 import QtCore as qtc
 from PyQt5 import QtGui as qtg
-from Truss_stem import TrussController
+from Truss_stem import PROJECTIONS, TrussController, TrussLoader
+from Truss_cache import TrussCache
 import sys
 
 class MainWindow(Ui_TrussStructuralDesign,qtw.QWidget):
@@ -14,14 +15,43 @@ class MainWindow(Ui_TrussStructuralDesign,qtw.QWidget):
         self.spnd_Zoom.valueChanged.connect(self.setZoom) #$NEW$ double spinner widget for setting zoom level
 
         self.controller=TrussController()
+        #parsed models of files opened before, keyed by file content (see Truss_cache)
+        self.cache=TrussCache()
         self.controller.setDisplayWidgets((self.te_DesignReport, self.le_LinkName, self.le_Node1Name,
                                            self.le_Node2Name, self.le_LinkLength, self.gv_Main))
 
+        #member table next to the text report; it only formats the rows on screen and sorts by column
+        self.tv_Members = qtw.QTableView(self.grp_DesignReport)
+        self.horizontalLayout_2.insertWidget(1, self.tv_Members)
+        self.controller.view.setMemberTable(self.tv_Members)
+
         self.controller.view.scene.installEventFilter(self)
         self.gv_Main.setMouseTracking(True)
 
+        #files are loaded by a TrussLoader on a worker thread; progress shows under the path with a cancel button
+        self.loadThread = None
+        self.loader = None
+        self.pb_Load = qtw.QProgressBar(self.grp_Load)
+        self.pb_Load.setRange(0, 100)
+        self.btn_Cancel = qtw.QPushButton('Cancel', self.grp_Load)
+        self.btn_Cancel.clicked.connect(self.CancelLoad)
+        self.horizontalLayout.addWidget(self.pb_Load)
+        self.horizontalLayout.addWidget(self.btn_Cancel)
+
+        #view direction for space trusses, next to the zoom control
+        self.cmb_Projection = qtw.QComboBox(self)
+        self.cmb_Projection.addItems(list(PROJECTIONS))
+        self.cmb_Projection.currentTextChanged.connect(self.setProjection)
+        self.horizontalLayout_3.insertWidget(self.horizontalLayout_3.indexOf(self.lbl_Zoom), self.cmb_Projection)
+        self.showLoading(False)
+
         self.show()
 
+    def setProjection(self, projection):
+        self.controller.view.setProjection(projection)
+        if self.controller.truss.nodes:
+            self.controller.drawTruss()
+
     def setZoom(self):
         self.gv_Main.resetTransform()
         self.gv_Main.scale(self.spnd_Zoom.value(), self.spnd_Zoom.value())
@@ -39,6 +69,7 @@ class MainWindow(Ui_TrussStructuralDesign,qtw.QWidget):
             if et == qtc.QEvent.GraphicsSceneMouseMove:
                 scenePos = event.scenePos()
                 strScene = "Mouse Position:  x = {}, y = {}".format(round(scenePos.x(), 2), round(-scenePos.y(), 2))
+                strScene += self.hoverText(scenePos.x(), scenePos.y())
                 self.lbl_MousePos.setText(strScene)  # display information in a label
             if event.type() == qtc.QEvent.GraphicsSceneWheel:  # I added this to zoom on mouse wheel scroll
                 if event.delta() > 0:
@@ -50,14 +81,93 @@ class MainWindow(Ui_TrussStructuralDesign,qtw.QWidget):
         # pass the event along to the parent widget if there is one.
         return super(MainWindow, self).eventFilter(obj, event)
 
+    def hoverText(self, x, y, pixels=8):
+        """
+        Names the joint, or failing that the member, under the cursor using the model's spatial index.
+        :param pixels: pick radius in screen pixels
+        """
+        truss = self.controller.truss
+        if not truss.nodes or self.controller.view.projection != 'front':
+            return ''  # the spatial index is in model x-y, which is the scene only in the front view
+        radius = pixels / max(self.gv_Main.transform().m11(), 1e-9)
+        node = truss.nearestNode(x, y, radius)
+        if node is not None:
+            return "    Node:  {}".format(node.name)
+        rows = truss.linksNear(x, y, radius)
+        if len(rows):
+            return "    Link:  {}".format(truss.links[int(rows[0])].name)
+        return ''
+
     def OpenFile(self):
+        if self.loader is not None:  # one load at a time
+            return
         filename = qtw.QFileDialog.getOpenFileName()[0]
         if len(filename) == 0:  # no file selected
             return
         self.te_Path.setText(filename)
-        file = open(filename, 'r')  # open the file
-        data = file.readlines()  # read all the lines of the file into a list of strings
-        self.controller.ImportFromFile(data)  # import the pipe network information
+        self.startLoad(filename)
+
+    def startLoad(self, filename):
+        """
+        Reads the file (from cache if unchanged), analyzes it and prepares the drawing on a worker thread.  The GUI
+        stays responsive; loadFinished puts the result on screen.
+        """
+        self.loadThread = qtc.QThread(self)
+        self.loader = TrussLoader(self.controller, self.controller.view, filename, cache=self.cache)
+        self.loader.moveToThread(self.loadThread)
+        self.loadThread.started.connect(self.loader.run)
+        self.loader.progress.connect(self.loadProgress)
+        self.loader.finished.connect(self.loadFinished)
+        self.loader.failed.connect(self.loadFailed)
+        self.loader.cancelled.connect(self.loadCancelled)
+        for signal in (self.loader.finished, self.loader.failed, self.loader.cancelled):
+            signal.connect(self.loadThread.quit)
+        # the loader lives on loadThread, so it is deleted there (and our references dropped) only once the thread
+        # has stopped, not from the GUI thread while run() may still be returning
+        self.loadThread.finished.connect(self.loader.deleteLater)
+        self.loadThread.finished.connect(self.loadThread.deleteLater)
+        self.loadThread.finished.connect(self.loadThreadFinished)
+        self.pb_Load.setValue(0)
+        self.showLoading(True)
+        self.loadThread.start()
+
+    def CancelLoad(self):
+        if self.loader is not None:
+            self.loader.cancel()
+
+    def showLoading(self, loading):
+        self.pb_Load.setVisible(loading)
+        self.btn_Cancel.setVisible(loading)
+        self.btn_Open.setEnabled(not loading)
+        # the loader prepares the scene in the projection it started with
+        self.cmb_Projection.setEnabled(not loading)
+
+    def endLoad(self):
+        self.showLoading(False)
+
+    def loadThreadFinished(self):
+        self.loader = None
+        self.loadThread = None
+
+    def loadProgress(self, percent, stage):
+        self.pb_Load.setValue(percent)
+        self.pb_Load.setFormat('{}  %p%'.format(stage))
+
+    def loadFinished(self, result):
+        self.endLoad()
+        self.controller.truss = result.truss
+        self.controller.diagnostics = result.diagnostics
+        self.controller.view.displayReport(truss=result.truss)
+        self.controller.view.buildScene(result.truss, result.scene)
+        self.controller.view.displayDiagnostics(result.diagnostics)
+
+    def loadFailed(self, message):
+        self.endLoad()
+        qtw.QMessageBox.warning(self, 'Open failed', message)
+
+    def loadCancelled(self):
+        self.endLoad()
+        self.te_Path.setText('')
 
 def Main():
     app=qtw.QApplication(sys.argv)
@@ -0,0 +1,452 @@
+import numpy as np
+from Truss_core import Position, Node, Link
+
+class TrussArrays():
+    """
+    Struct-of-arrays storage for a truss.  Node coordinates live in one contiguous (n,3) float64 array and links in
+    one (m,2) int32 array of node indices, so bulk geometry code can work on whole arrays instead of looping over
+    Node and Link objects.  The arrays are over-allocated and doubled as they fill, so appending is amortized O(1).
+    The live part of each array is returned by coords() and linkEnds().
+    """
+    def __init__(self, nodeCapacity=64, linkCapacity=64):
+        self.xyz=np.zeros((nodeCapacity, 3), dtype=np.float64)
+        self.nodeNames=[]
+        self.nodeCount=0
+        self._indexOf={}  # node name -> row in xyz, rebuilt lazily after bulk loads and removals
+
+        self.ends=np.zeros((linkCapacity, 2), dtype=np.int32)
+        self.length=np.full(linkCapacity, np.nan)
+        self.angleRad=np.full(linkCapacity, np.nan)
+        self.linkNames=[]
+        self.linkCount=0
+
+    @classmethod
+    def fromArrays(cls, nodeNames, xyz, linkNames, ends):
+        """
+        Wraps existing arrays (e.g. memory-mapped ones) without copying them.  They are copied into new storage only
+        if nodes or links are appended later.
+        """
+        store=cls.__new__(cls)
+        store.xyz=xyz
+        store.nodeNames=list(nodeNames)
+        store.nodeCount=len(store.nodeNames)
+        store._indexOf=None
+        store.ends=ends
+        store.length=np.full(len(ends), np.nan)
+        store.angleRad=np.full(len(ends), np.nan)
+        store.linkNames=list(linkNames)
+        store.linkCount=len(store.linkNames)
+        return store
+
+    @property
+    def indexOf(self):
+        if self._indexOf is None:
+            self._indexOf={name: i for i, name in enumerate(self.nodeNames)}
+        return self._indexOf
+
+    def coords(self):
+        return self.xyz[:self.nodeCount]
+
+    def linkEnds(self):
+        return self.ends[:self.linkCount]
+
+    def _growNodes(self, needed):
+        cap=len(self.xyz)
+        if needed <= cap:
+            return
+        cap=max(cap, 1)
+        while cap < needed:
+            cap*=2
+        xyz=np.zeros((cap, 3), dtype=np.float64)
+        xyz[:self.nodeCount]=self.xyz[:self.nodeCount]
+        self.xyz=xyz
+
+    def _growLinks(self, needed):
+        cap=len(self.ends)
+        if needed <= cap:
+            return
+        cap=max(cap, 1)
+        while cap < needed:
+            cap*=2
+        ends=np.zeros((cap, 2), dtype=np.int32)
+        ends[:self.linkCount]=self.ends[:self.linkCount]
+        length=np.full(cap, np.nan)
+        length[:self.linkCount]=self.length[:self.linkCount]
+        angle=np.full(cap, np.nan)
+        angle[:self.linkCount]=self.angleRad[:self.linkCount]
+        self.ends, self.length, self.angleRad=ends, length, angle
+
+    def appendNode(self, name, x=0.0, y=0.0, z=0.0):
+        """
+        Adds a node row and returns its index.
+        """
+        i=self.nodeCount
+        self._growNodes(i+1)
+        self.xyz[i]=(x, y, z)
+        self.nodeNames.append(name)
+        self.indexOf[name]=i
+        self.nodeCount+=1
+        return i
+
+    def appendLink(self, name, node1, node2):
+        """
+        Adds a link between two existing nodes (given by name) and returns its index.
+        """
+        i=self.linkCount
+        self._growLinks(i+1)
+        self.ends[i]=(self.indexOf[node1], self.indexOf[node2])
+        self.length[i]=np.nan
+        self.angleRad[i]=np.nan
+        self.linkNames.append(name)
+        self.linkCount+=1
+        return i
+
+    def removeNode(self, index):
+        """
+        Deletes a node row, drops the links that use it and renumbers the remaining link ends.
+        :return: boolean mask (over the old links) of the links that were kept
+        """
+        n=self.nodeCount
+        self.xyz[index:n-1]=self.xyz[index+1:n]
+        del self.nodeNames[index]
+        self.nodeCount-=1
+        self._indexOf=None
+
+        ends=self.linkEnds()
+        keep=(ends[:, 0] != index) & (ends[:, 1] != index)
+        m=int(keep.sum())
+        newEnds=ends[keep]
+        newEnds[newEnds > index]-=1
+        self.ends[:m]=newEnds
+        self.length[:m]=self.length[:self.linkCount][keep]
+        self.angleRad[:m]=self.angleRad[:self.linkCount][keep]
+        self.linkNames=[name for name, k in zip(self.linkNames, keep) if k]
+        self.linkCount=m
+        return keep
+
+    def adoptNode(self, node):
+        """
+        Copies a plain Node into the arrays and returns the NodeView that replaces it.
+        """
+        p=node.position
+        return NodeView(self, self.appendNode(node.name, p.x, p.y, p.z))
+
+    def adoptLink(self, link):
+        """
+        Copies a plain Link into the arrays and returns the LinkView that replaces it.  Both nodes must exist.
+        """
+        view=LinkView(self, self.appendLink(link.name, link.node1_Name, link.node2_Name))
+        view.length=link.length
+        view.angleRad=link.angleRad
+        return view
+
+class PositionView(Position):
+    """
+    A Position whose x, y and z are a row of TrussArrays.xyz.  The vector operators inherited from Position still
+    return plain Position objects.
+    """
+    __slots__=('store', 'index')
+
+    def __init__(self, store, index):
+        self.store=store
+        self.index=index
+
+    def _get(self, k):
+        return float(self.store.xyz[self.index, k])
+
+    def _set(self, k, value):
+        self.store.xyz[self.index, k]=value
+
+    x=property(lambda self: self._get(0), lambda self, v: self._set(0, v))
+    y=property(lambda self: self._get(1), lambda self, v: self._set(1, v))
+    z=property(lambda self: self._get(2), lambda self, v: self._set(2, v))
+
+class NodeView(Node):
+    def __init__(self, store, index):
+        self.store=store
+        self.index=index
+
+    @property
+    def name(self):
+        return self.store.nodeNames[self.index]
+
+    @property
+    def position(self):
+        return PositionView(self.store, self.index)
+
+    @position.setter
+    def position(self, pos):
+        self.store.xyz[self.index]=(pos.x, pos.y, pos.z)
+
+class LinkView(Link):
+    def __init__(self, store, index):
+        self.store=store
+        self.index=index
+
+    @property
+    def name(self):
+        return self.store.linkNames[self.index]
+
+    @name.setter
+    def name(self, value):
+        self.store.linkNames[self.index]=value
+
+    @property
+    def node1_Name(self):
+        return self.store.nodeNames[self.store.ends[self.index, 0]]
+
+    @node1_Name.setter
+    def node1_Name(self, name):
+        self.store.ends[self.index, 0]=self.store.indexOf[name]
+
+    @property
+    def node2_Name(self):
+        return self.store.nodeNames[self.store.ends[self.index, 1]]
+
+    @node2_Name.setter
+    def node2_Name(self, name):
+        self.store.ends[self.index, 1]=self.store.indexOf[name]
+
+    @property
+    def length(self):
+        v=self.store.length[self.index]
+        return None if np.isnan(v) else float(v)
+
+    @length.setter
+    def length(self, value):
+        self.store.length[self.index]=np.nan if value is None else value
+
+    @property
+    def angleRad(self):
+        v=self.store.angleRad[self.index]
+        return None if np.isnan(v) else float(v)
+
+    @angleRad.setter
+    def angleRad(self, value):
+        self.store.angleRad[self.index]=np.nan if value is None else value
+
+class ViewList():
+    """
+    The nodes or links of an array-backed TrussModel.  It behaves like a read-only list, but each view object is
+    created only when it is accessed, so wrapping millions of rows costs nothing up front.  Views obtained before a
+    node is removed keep their old row number and should be fetched again.
+    """
+    def __init__(self, store, viewClass, countName):
+        self.store=store
+        self.viewClass=viewClass
+        self.countName=countName
+
+    def __len__(self):
+        return getattr(self.store, self.countName)
+
+    def __getitem__(self, i):
+        n=len(self)
+        if isinstance(i, slice):
+            return [self.viewClass(self.store, k) for k in range(*i.indices(n))]
+        if i < 0:
+            i+=n
+        if not 0 <= i < n:
+            raise IndexError('view index out of range')
+        return self.viewClass(self.store, i)
+
+    def __iter__(self):
+        store, viewClass=self.store, self.viewClass
+        return (viewClass(store, i) for i in range(len(self)))
+
+class NodeIndex():
+    """
+    Name -> NodeView mapping for an array-backed TrussModel (the counterpart of TrussModel.nodeIndex).
+    """
+    def __init__(self, store):
+        self.store=store
+
+    def __contains__(self, name):
+        return name in self.store.indexOf
+
+    def __len__(self):
+        return self.store.nodeCount
+
+    def __getitem__(self, name):
+        return NodeView(self.store, self.store.indexOf[name])
+
+    def get(self, name, default=None):
+        i=self.store.indexOf.get(name)
+        return default if i is None else NodeView(self.store, i)
+
+class PositionArray():
+    """
+    Many Positions held as one (n,3) float64 array.  The operators work on whole arrays at once and accept another
+    PositionArray of the same length, a single Position, a scalar or an (n,) array of per-point scalars.  The in-place
+    forms (+=, -=, *=, /=) write into the existing array.
+    """
+    __slots__=('xyz',)
+
+    def __init__(self, xyz=None, count=0):
+        """
+        :param xyz: anything convertible to an (n,3) array; it is used without copying when already float64
+        :param count: number of zero points to create when xyz is None
+        """
+        self.xyz=np.zeros((count, 3)) if xyz is None else np.asarray(xyz, dtype=np.float64).reshape(-1, 3)
+
+    @classmethod
+    def fromPositions(cls, positions):
+        return cls([(p.x, p.y, p.z) for p in positions] if positions else None)
+
+    def toPositions(self):
+        return [Position(*p) for p in self.xyz.tolist()]
+
+    def __len__(self):
+        return len(self.xyz)
+
+    def __getitem__(self, i):
+        if isinstance(i, (int, np.integer)):
+            return Position(*self.xyz[i].tolist())
+        return PositionArray(self.xyz[i])
+
+    def __setitem__(self, i, value):
+        self.xyz[i]=self._operand(value)
+
+    def __repr__(self):
+        return 'PositionArray({})'.format(self.xyz.tolist() if len(self.xyz) <= 6 else '{} points'.format(len(self)))
+
+    @staticmethod
+    def _operand(other):
+        if isinstance(other, PositionArray):
+            return other.xyz
+        if isinstance(other, Position):
+            return np.array((other.x, other.y, other.z))
+        other=np.asarray(other, dtype=np.float64)
+        return other[:, None] if other.ndim == 1 else other
+
+    @property
+    def x(self):
+        return self.xyz[:, 0]
+
+    @property
+    def y(self):
+        return self.xyz[:, 1]
+
+    @property
+    def z(self):
+        return self.xyz[:, 2]
+
+    def __add__(self, other):
+        return PositionArray(self.xyz+self._operand(other))
+
+    __radd__=__add__
+
+    def __sub__(self, other):
+        return PositionArray(self.xyz-self._operand(other))
+
+    def __rsub__(self, other):
+        return PositionArray(self._operand(other)-self.xyz)
+
+    def __neg__(self):
+        return PositionArray(-self.xyz)
+
+    def __mul__(self, other):
+        return PositionArray(self.xyz*self._operand(other))
+
+    __rmul__=__mul__
+
+    def __truediv__(self, other):
+        return PositionArray(self.xyz/self._operand(other))
+
+    def __iadd__(self, other):
+        self.xyz+=self._operand(other)
+        return self
+
+    def __isub__(self, other):
+        self.xyz-=self._operand(other)
+        return self
+
+    def __imul__(self, other):
+        self.xyz*=self._operand(other)
+        return self
+
+    def __itruediv__(self, other):
+        self.xyz/=self._operand(other)
+        return self
+
+    def dot(self, other):
+        """
+        Row-wise dot products, shape (n,).
+        """
+        o=self._operand(other)
+        if o.ndim == 1:
+            return self.xyz@o
+        return np.einsum('ij,ij->i', self.xyz, o)
+
+    def cross(self, other):
+        return PositionArray(np.cross(self.xyz, self._operand(other)))
+
+    def magnitude(self):
+        return np.sqrt(np.einsum('ij,ij->i', self.xyz, self.xyz))
+
+    def normalize(self):
+        """
+        Scales every non-zero vector to unit length in place; zero vectors are left alone.
+        """
+        mag=self.magnitude()
+        mag[mag == 0.0]=1.0
+        self.xyz/=mag[:, None]
+        return self
+
+    def get_angle_rad(self):
+        """
+        x-y plane angles from atan2(y, x), 0 for zero vectors (as Position.get_angle_rad).
+        """
+        return np.arctan2(self.xyz[:, 1], self.xyz[:, 0])
+
+    def get_angle_deg(self):
+        return np.degrees(self.get_angle_rad())
+
+    def angleBetween(self, other):
+        """
+        Angle in radians between each vector and the matching vector (or single Position) of other.
+        """
+        o=self._operand(other)
+        return np.arctan2(np.linalg.norm(np.cross(self.xyz, o), axis=-1), self.dot(other))
+
+def nodeCoords(nodes):
+    """
+    Gathers the positions of a list of nodes into an (n,3) float64 array.
+    """
+    xyz=np.empty((len(nodes), 3), dtype=np.float64)
+    for i, n in enumerate(nodes):
+        p=n.position
+        xyz[i]=(p.x, p.y, p.z)
+    return xyz
+
+def linkNodeIndices(links, nodes):
+    """
+    Maps the node names of each link to row numbers in nodes.  Ends that name a missing node are -1.
+    """
+    rowOf={n.name: i for i, n in enumerate(nodes)}
+    ends=np.empty((len(links), 2), dtype=np.int32)
+    for i, l in enumerate(links):
+        ends[i]=(rowOf.get(l.node1_Name, -1), rowOf.get(l.node2_Name, -1))
+    return ends
+
+def calcLinkGeometry(xyz, ends):
+    """
+    Computes the length, x-y plane angle and direction cosines of every link in one pass.
+    :param xyz: (n,3) node coordinates
+    :param ends: (m,2) node rows for each link, -1 for a missing node
+    :return: (lengths (m,), angles (m,) in radians from atan2(dy,dx), direction cosines (m,3)).  Links with a missing
+    node get nan; zero-length links get angle 0 and zero direction cosines.
+    """
+    ends=np.asarray(ends)
+    valid=(ends >= 0).all(axis=1)
+    if len(xyz) == 0:
+        xyz=np.zeros((1, 3))
+    safe=np.where(valid[:, None], ends, 0)
+    d=PositionArray(xyz[safe[:, 1]])
+    d-=xyz[safe[:, 0]]
+    lengths=d.magnitude()
+    angles=d.get_angle_rad()
+    dirCos=d.normalize().xyz
+    lengths[~valid]=np.nan
+    angles[~valid]=np.nan
+    dirCos[~valid]=np.nan
+    return lengths, angles, dirCos
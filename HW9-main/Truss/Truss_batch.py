@@ -0,0 +1,233 @@
+"""
+Headless batch analysis of truss design files.
+
+    python Truss_batch.py designs/ --jobs 8 --csv summary.csv --json summary.json
+
+Each file is parsed, its link geometry computed, analyzed if it has supports, and its report generated, in a pool of
+worker processes.  No Qt widgets are created, so this runs without a display.  Set TRUSS_TRACE (see Truss_trace)
+and use --jobs 1 to trace a run.
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from Truss_checks import MODE_NAMES, checkMembers
+from Truss_core import TrussModel, importLines, prepareImported
+from Truss_parser import TrussParser, TrussModelBuilder, buildModel, parseFile
+import Truss_trace as trace
+
+FIELDS=('file', 'status', 'error', 'title', 'nodes', 'links', 'diagnostics', 'longestLink', 'longestLength',
+        'maxTension', 'maxCompression', 'loadCases', 'maxRatio', 'governingLink', 'governingMode', 'cached',
+        'parse_s', 'geometry_s', 'analysis_s', 'report_s', 'total_s')
+
+def loadModel(filename, diagnostics, mergeTolerance=None):
+    """
+    Reads a text design file, or a binary container if the name ends in .trb.
+    :param mergeTolerance: merge nodes of a text file that are closer than this (see TrussModelBuilder)
+    """
+    with trace.span('parse', file=filename):
+        if filename.endswith('.trb'):
+            from Truss_binary import loadBinary
+            return loadBinary(filename)
+        truss=TrussModel(arrayBacked=True)
+        parser=TrussParser(diagnostics)
+        return buildModel(parseFile(filename, parser), TrussModelBuilder(truss, diagnostics, mergeTolerance))
+
+def prepareModel(filename, diagnostics, row=None, mergeTolerance=None):
+    """
+    Runs parse -> calcLinkVals -> validation -> analysis on one file with Truss_core.importLines, the same sequence
+    the GUI uses, recording stage times in row.  A truss that fails validation is not analyzed; that and a failed
+    analysis are added to diagnostics and leave truss.results None.
+    """
+    row=row if row is not None else {}
+    times={'start': time.perf_counter()}
+    def progress(stage, fraction):
+        # importLines reports 'geometry' once parsing is done and 'solve' once the link values are
+        times.setdefault(stage, time.perf_counter())
+
+    with trace.span('import', file=filename):
+        if filename.endswith('.trb'):
+            from Truss_binary import loadBinary
+            with trace.span('parse'):
+                truss=loadBinary(filename)
+            truss=prepareImported(truss, diagnostics, progress)
+        else:
+            with open(filename, 'r') as f:
+                truss=importLines(TrussModel(arrayBacked=True), f, diagnostics, progress, mergeTolerance)
+    end=time.perf_counter()
+
+    row['parse_s']=times['geometry']-times['start']
+    row['geometry_s']=times.get('solve', end)-times['geometry']
+    if 'solve' in times:
+        row['analysis_s']=end-times['solve']
+    return truss
+
+def analyzeFile(filename, reportDir=None, cacheDir=None, mergeTolerance=None):
+    """
+    Runs parse -> calcLinkVals -> analysis -> report on one file and returns a summary row (see FIELDS).  Errors are
+    recorded in the row rather than raised, so one bad file does not stop the batch.
+    :param cacheDir: Truss_cache directory; files unchanged since they were cached skip parsing and analysis
+    :param mergeTolerance: merge nodes closer than this into one joint
+    """
+    row=dict.fromkeys(FIELDS)
+    row['file']=filename
+    diagnostics=[]
+    start=time.perf_counter()
+    try:
+        if cacheDir is None:
+            truss=prepareModel(filename, diagnostics, row, mergeTolerance)
+            row['cached']=False
+        else:
+            from Truss_cache import loadDesign
+            built=[]
+            def build(filename, diagnostics):
+                built.append(True)
+                return prepareModel(filename, diagnostics, row, mergeTolerance)
+            options='merge {!r}'.format(mergeTolerance) if mergeTolerance else None
+            truss=loadDesign(filename, build, workerCache(cacheDir), diagnostics, options=options)
+            row['cached']=not built
+        failed=[d for d in diagnostics if d.message.startswith('analysis failed')]
+        if failed:
+            row['error']=failed[0].message
+
+        # describe the model before the report, so a file whose report fails still has them in its row
+        row['title']=truss.title
+        row['nodes']=len(truss.nodes)
+        row['links']=len(truss.links)
+        longest=truss.longestLink()
+        if longest is not None:
+            row['longestLink']=longest.name
+            row['longestLength']=longest.length
+
+        t=time.perf_counter()
+        with trace.span('report'):
+            if reportDir is not None:
+                name=os.path.splitext(os.path.basename(filename))[0]+'_report.txt'
+                with open(os.path.join(reportDir, name), 'w') as f:
+                    f.writelines(truss.reportLines())
+            else:
+                for line in truss.reportLines():
+                    pass
+        row['report_s']=time.perf_counter()-t
+
+        if truss.caseResults is not None and len(truss.links) > 0:
+            # envelope over the default loads, every load case and every combination
+            tension, iT, compression, iC=truss.caseResults.envelope()
+            row['loadCases']=len(truss.caseResults.names)
+            row['maxTension']=float(tension.max())
+            row['maxCompression']=float(compression.min())
+        elif truss.results is not None and len(truss.links) > 0:
+            row['maxTension']=float(max(truss.results.forces.max(), 0.0))
+            row['maxCompression']=float(min(truss.results.forces.min(), 0.0))
+        analyzed=truss.results is not None or truss.caseResults is not None
+        if analyzed and len(truss.links) > 0 and None not in (truss.material.ys, truss.material.E,
+                                                              truss.material.staticFactor):
+            checks=checkMembers(truss)
+            i=int(checks.ranked(1)[0])
+            row['maxRatio']=float(checks.ratio[i])
+            row['governingLink']=truss.links[i].name
+            row['governingMode']=MODE_NAMES[checks.mode[i]]
+        row['status']='ok' if row['error'] is None else 'failed'
+    except Exception as e:
+        row['status']='error'
+        row['error']='{}: {}'.format(type(e).__name__, e)
+    row['diagnostics']=len(diagnostics)
+    row['total_s']=time.perf_counter()-start
+    return row
+
+def _analyzeFileArgs(args):
+    return analyzeFile(*args)
+
+def collectFiles(paths, pattern='*.txt'):
+    """
+    Expands directories (recursively, matching pattern) and returns the sorted list of files.
+    """
+    files=[]
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, '**', pattern), recursive=True))
+        else:
+            files.append(path)
+    return sorted(files)
+
+#cacheDir -> TrussCache of this process, so a batch reuses one cache object (and its size bookkeeping) per worker
+_caches={}
+
+def workerCache(cacheDir):
+    cache=_caches.get(cacheDir)
+    if cache is None:
+        from Truss_cache import TrussCache
+        cache=_caches[cacheDir]=TrussCache(cacheDir)
+    return cache
+
+def _initWorker(cacheDir):
+    if cacheDir is not None:
+        # runBatch has already checked the VERSION file; clearing from a worker could remove another one's entries
+        workerCache(cacheDir).versionChecked=True
+
+def runBatch(files, jobs=None, reportDir=None, cacheDir=None, mergeTolerance=None):
+    """
+    Analyzes files in a process pool and returns the summary rows in the order of files.  The cache version is
+    checked (and a stale cache cleared) here, once, before any worker starts.
+    """
+    if reportDir is not None:
+        os.makedirs(reportDir, exist_ok=True)
+    if cacheDir is not None:
+        workerCache(cacheDir).checkVersion()
+    work=[(f, reportDir, cacheDir, mergeTolerance) for f in files]
+    if jobs == 1:
+        return [analyzeFile(*w) for w in work]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_initWorker, initargs=(cacheDir,)) as pool:
+        chunk=max(1, len(work)//(4*(jobs or os.cpu_count() or 1)))
+        return list(pool.map(_analyzeFileArgs, work, chunksize=chunk))
+
+def writeCsv(rows, filename):
+    with open(filename, 'w', newline='') as f:
+        writer=csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def writeJson(rows, filename, wall):
+    summary={'files': len(rows), 'ok': sum(r['status'] == 'ok' for r in rows), 'wall_s': wall, 'results': rows}
+    with open(filename, 'w') as f:
+        json.dump(summary, f, indent=1)
+
+def Main(argv=None):
+    ap=argparse.ArgumentParser(description='Headless batch analysis of truss design files.')
+    ap.add_argument('paths', nargs='+', help='design files or directories')
+    ap.add_argument('--pattern', default='*.txt', help='file pattern used inside directories (default *.txt)')
+    ap.add_argument('--jobs', type=int, default=None, help='worker processes (default: CPU count, 1 = in-process)')
+    ap.add_argument('--csv', help='write the summary as CSV')
+    ap.add_argument('--json', help='write the summary as JSON')
+    ap.add_argument('--reports', help='directory for the per-file text reports')
+    ap.add_argument('--cache', nargs='?', const='', default=None, metavar='DIR',
+                    help='reuse models of unchanged files from a cache (default directory: see Truss_cache)')
+    ap.add_argument('--merge', type=float, default=None, metavar='TOL',
+                    help='merge nodes closer than TOL into one joint')
+    args=ap.parse_args(argv)
+
+    files=collectFiles(args.paths, args.pattern)
+    start=time.perf_counter()
+    cacheDir=None
+    if args.cache is not None:
+        from Truss_cache import defaultDirectory
+        cacheDir=args.cache or defaultDirectory()
+    rows=runBatch(files, jobs=args.jobs, reportDir=args.reports, cacheDir=cacheDir, mergeTolerance=args.merge)
+    wall=time.perf_counter()-start
+    if args.csv:
+        writeCsv(rows, args.csv)
+    if args.json:
+        writeJson(rows, args.json, wall)
+    failed=[r for r in rows if r['status'] != 'ok']
+    print('{} files, {} ok, {} failed, {:0.2f} s'.format(len(rows), len(rows)-len(failed), len(failed), wall))
+    for r in failed:
+        print('  {}: {}'.format(r['file'], r['error']))
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(Main())
@@ -0,0 +1,255 @@
+"""
+Benchmarks for the truss pipeline on generated designs.
+
+    python Truss_bench.py --sizes 10 100 1000 10000 --json bench.json
+    python Truss_bench.py --json new.json --compare old.json
+
+For each family and size (approximate member count) a design is generated with Truss_generate, written to a
+temporary text file, and then timed stage by stage:
+
+    parse      text file -> TrussModel (TrussParser + TrussModelBuilder)
+    geometry   calcLinkVals
+    validate   Truss_validate.validateTruss (connectivity, determinacy, zero-stiffness joints)
+    report     reportLines, consumed in full
+    solve      analyzeTruss (families with supports only)
+    checks     Truss_checks.checkMembers (analyzed designs only)
+    scene      TrussView.buildScene offscreen (skipped if PyQt5 cannot be imported)
+    display    TrussView.displayReport (report text and member table)
+
+Each stage is run --repeat times and the fastest time kept.  With --memory (the default) the stages are run once
+more under tracemalloc to record the peak Python/numpy allocation of each stage.  Results are written as JSON with
+the library versions so runs from different versions can be compared with --compare.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import Truss_generate
+from Truss_checks import checkMembers
+from Truss_core import TrussModel
+from Truss_parser import TrussParser, TrussModelBuilder, buildModel, parseFile
+from Truss_solver import analyzeTruss
+from Truss_validate import validateTruss
+
+FORMAT_VERSION=1
+STAGES=('parse', 'geometry', 'validate', 'report', 'solve', 'checks', 'scene', 'display')
+DEFAULT_SIZES=(10, 100, 1000, 10000, 100000, 1000000)
+PREREQUISITES=('parse', 'geometry')  # run untimed when not selected, since the later stages need their results
+
+_app=None  # the QApplication for the offscreen stages, kept alive for the whole run
+
+# members per bay (bridges), level (towers) or square bay (roofs), used to pick the generator size for a member count
+MEMBERS_PER_UNIT={'warren': 4, 'pratt': 4, 'howe': 4, 'tower': 4, 'tower3d': 13, 'roof': 8}
+
+def designForSize(family, members):
+    units=members/MEMBERS_PER_UNIT[family]
+    if family == 'roof':
+        units=units**0.5  # members grow with bays^2
+    unit=max(int(round(units)), 2)
+    return Truss_generate.FAMILIES[family](unit)
+
+def _qtView():
+    """
+    A TrussView on an offscreen QApplication, or None if PyQt5 is not available.
+    """
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    try:
+        from PyQt5 import QtWidgets as qtw
+        from Truss_stem import TrussView
+    except ImportError:
+        return None
+    global _app
+    _app=qtw.QApplication.instance() or qtw.QApplication([])
+    return TrussView()
+
+def _stages(filename, view, state):
+    """
+    The stage functions in order; they share the model through state.
+    """
+    def parse():
+        state['truss']=buildModel(parseFile(filename, TrussParser()), TrussModelBuilder(TrussModel(arrayBacked=True)))
+
+    def geometry():
+        state['truss'].calcLinkVals()
+
+    def validate():
+        validateTruss(state['truss'])
+
+    def report():
+        for line in state['truss'].reportLines():
+            pass
+
+    def solve():
+        analyzeTruss(state['truss'])
+
+    def checks():
+        checkMembers(state['truss'])
+
+    def scene():
+        view.buildScene(state['truss'])
+
+    def display():
+        view.displayReport(state['truss'])
+
+    return {'parse': parse, 'geometry': geometry, 'validate': validate, 'report': report, 'solve': solve,
+            'checks': checks, 'scene': scene, 'display': display}
+
+def benchDesign(filename, stages, view=None, repeat=3, memory=True):
+    """
+    Times each of stages on one design file.
+    :return: dict stage -> {'seconds': best time, 'peak_bytes': tracemalloc peak or None, 'error': message or None}
+    """
+    state={}
+    funcs=_stages(filename, view, state)
+    results={}
+    for stage in STAGES:
+        if stage not in stages:
+            if stage in PREREQUISITES:
+                funcs[stage]()
+            continue
+        if stage in ('scene', 'display') and view is None:
+            continue
+        if stage == 'solve' and not state['truss'].supports:
+            continue
+        if stage == 'checks' and state['truss'].results is None and state['truss'].caseResults is None:
+            continue
+        best=None
+        error=None
+        for _ in range(max(repeat, 1)):
+            gc.collect()
+            t=time.perf_counter()
+            try:
+                funcs[stage]()
+            except Exception as e:
+                error='{}: {}'.format(type(e).__name__, e)
+                break
+            dt=time.perf_counter()-t
+            best=dt if best is None else min(best, dt)
+        results[stage]={'seconds': best, 'peak_bytes': None, 'error': error}
+
+    if memory:
+        state.clear()
+        for stage in STAGES:
+            if stage not in results or results[stage]['error']:
+                if stage in PREREQUISITES:
+                    funcs[stage]()
+                continue
+            gc.collect()
+            tracemalloc.start()
+            try:
+                funcs[stage]()
+                results[stage]['peak_bytes']=tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    return results
+
+def coreImportTime():
+    """
+    Seconds to import Truss_core in a fresh interpreter.
+    """
+    code='import time; t=time.perf_counter(); import Truss_core; print(time.perf_counter()-t)'
+    here=os.path.dirname(os.path.abspath(__file__))
+    out=subprocess.run([sys.executable, '-c', code], cwd=here, capture_output=True, text=True)
+    return float(out.stdout) if out.returncode == 0 else None
+
+def environment():
+    env={'python': platform.python_version(), 'platform': platform.platform(), 'numpy': np.__version__}
+    try:
+        import scipy
+        env['scipy']=scipy.__version__
+    except ImportError:
+        env['scipy']=None
+    try:
+        from PyQt5.QtCore import QT_VERSION_STR
+        env['qt']=QT_VERSION_STR
+    except ImportError:
+        env['qt']=None
+    return env
+
+def runBench(families, sizes, stages=STAGES, repeat=3, memory=True, scene=True, log=print):
+    """
+    Runs every family at every size and returns the JSON-ready summary.
+    """
+    view=_qtView() if scene and ({'scene', 'display'} & set(stages)) else None
+    rows=[]
+    with tempfile.TemporaryDirectory() as tmp:
+        for family in families:
+            for size in sizes:
+                truss=designForSize(family, size)
+                filename=os.path.join(tmp, '{}_{}.txt'.format(family, size))
+                Truss_generate.writeDesign(truss, filename)
+                nodes, links=len(truss.nodes), len(truss.links)
+                del truss
+                results=benchDesign(filename, stages, view=view, repeat=repeat, memory=memory)
+                for stage, r in results.items():
+                    rows.append(dict(family=family, size=size, nodes=nodes, links=links, stage=stage, **r))
+                    if log:
+                        log('{:8s} {:>8d} {:9s} {}'.format(family, links, stage, _fmt(r)))
+                os.remove(filename)
+    return {'format': FORMAT_VERSION, 'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'environment': environment(),
+            'import_core_s': coreImportTime(), 'repeat': repeat, 'results': rows}
+
+def _fmt(r):
+    if r['error']:
+        return 'error: {}'.format(r['error'])
+    st='{:10.4f} s'.format(r['seconds'])
+    if r['peak_bytes'] is not None:
+        st+='  {:10.1f} MB'.format(r['peak_bytes']/2**20)
+    return st
+
+def compare(new, old, minSeconds=0.0):
+    """
+    Yields (family, size, stage, old seconds, new seconds, ratio) for every stage timed in both summaries.  Stages
+    that took less than minSeconds in both runs are skipped, since their ratios are mostly timer noise.
+    """
+    key=lambda r: (r['family'], r['size'], r['stage'])
+    before={key(r): r for r in old['results'] if r['seconds']}
+    for r in new['results']:
+        o=before.get(key(r))
+        if o is None or not r['seconds'] or max(o['seconds'], r['seconds']) < minSeconds:
+            continue
+        yield key(r)+(o['seconds'], r['seconds'], r['seconds']/o['seconds'])
+
+def Main(argv=None):
+    ap=argparse.ArgumentParser(description='Benchmark parse, geometry, validation, report, solve, checks and scene building.')
+    ap.add_argument('--families', nargs='+', default=['warren'], choices=sorted(Truss_generate.FAMILIES))
+    ap.add_argument('--sizes', nargs='+', type=float, default=DEFAULT_SIZES, help='approximate member counts')
+    ap.add_argument('--stages', nargs='+', default=list(STAGES), choices=STAGES)
+    ap.add_argument('--repeat', type=int, default=3)
+    ap.add_argument('--no-memory', dest='memory', action='store_false', help='skip the tracemalloc pass')
+    ap.add_argument('--no-scene', dest='scene', action='store_false', help='skip the Qt stages')
+    ap.add_argument('--json', help='write the results to this file')
+    ap.add_argument('--compare', help='earlier results file to compare against')
+    ap.add_argument('--threshold', type=float, default=1.1, help='slowdown ratio reported as a regression')
+    ap.add_argument('--min-seconds', type=float, default=0.005, help='ignore stages faster than this in --compare')
+    args=ap.parse_args(argv)
+
+    summary=runBench(args.families, [int(s) for s in args.sizes], stages=args.stages, repeat=args.repeat,
+                     memory=args.memory, scene=args.scene)
+    print('import Truss_core: {} s'.format(summary['import_core_s']))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            old=json.load(f)
+        regressions=0
+        for family, size, stage, was, now, ratio in compare(summary, old, args.min_seconds):
+            flag=ratio > args.threshold
+            regressions+=flag
+            print('{:8s} {:>8d} {:9s} {:9.4f} -> {:9.4f} s  x{:0.2f}{}'.format(family, size, stage, was, now, ratio,
+                                                                             '  SLOWER' if flag else ''))
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(Main())
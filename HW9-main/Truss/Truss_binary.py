@@ -0,0 +1,141 @@
+"""
+Binary container for a TrussModel.  All values are little-endian.
+
+    header:   magic b'TRUSSBIN', uint32 version, uint32 reserved, uint64 node count, uint64 link count
+    sections: uint64 offset and uint64 size for each of SECTIONS, in order
+    meta:     float64 uts, ys, E, staticFactor, memberArea (nan for None), then the UTF-8 title
+    nodeNames / linkNames: names joined by NUL, UTF-8
+    xyz:      (n,3) float64 node coordinates
+    ends:     (m,2) int32 node rows of each link
+    supports: records of (int64 node row, uint8 fixX, uint8 fixY, uint8 fixZ)  (no fixZ before version 3)
+    loads:    records of (int64 node row, float64 Fx, float64 Fy, float64 Fz)  (no Fz before version 3)
+    cases:    (version 2) JSON object {"loadCases": {case: {node: [Fx, Fy, Fz]}}, "combinations": {name: [[case, factor]]}}
+
+The coordinate and connectivity sections start on ALIGN-byte boundaries so they can be memory-mapped directly.
+"""
+import json
+import struct
+import numpy as np
+from Truss_arrays import TrussArrays
+from Truss_core import TrussModel
+
+MAGIC=b'TRUSSBIN'
+VERSION=3
+ALIGN=64
+SECTIONS=('meta', 'nodeNames', 'linkNames', 'xyz', 'ends', 'supports', 'loads', 'cases')
+SECTION_COUNT={1: 7, 2: 8, 3: 8}  # sections present in each version
+HEADER=struct.Struct('<8sIIQQ')
+SECTION=struct.Struct('<QQ')
+META=struct.Struct('<5d')
+SUPPORT_DTYPE=np.dtype([('node', '<i8'), ('fix', 'u1', (3,))])
+LOAD_DTYPE=np.dtype([('node', '<i8'), ('f', '<f8', (3,))])
+# record layouts of the plane-only versions 1 and 2
+SUPPORT_DTYPE_2D=np.dtype([('node', '<i8'), ('fix', 'u1', (2,))])
+LOAD_DTYPE_2D=np.dtype([('node', '<i8'), ('f', '<f8', (2,))])
+
+def _xyz(values, fill):
+    return tuple(values)+(fill,)*(3-len(values))
+
+def _orNan(v):
+    return float('nan') if v is None else float(v)
+
+def _orNone(v):
+    return None if v != v else v
+
+def saveBinary(truss, filename):
+    """
+    Writes a TrussModel (array-backed or not) to filename.
+    """
+    m=truss.material
+    meta=META.pack(_orNan(m.uts), _orNan(m.ys), _orNan(m.E), _orNan(m.staticFactor), _orNan(truss.memberArea))
+    meta+=(truss.title or '').encode('utf-8')
+    rowOf={n.name: i for i, n in enumerate(truss.nodes)}
+    supports=np.array([(rowOf[name], _xyz(fix, False)) for name, fix in truss.supports.items() if name in rowOf],
+                      dtype=SUPPORT_DTYPE)
+    loads=np.array([(rowOf[name], _xyz(f, 0.0)) for name, f in truss.loads.items() if name in rowOf],
+                   dtype=LOAD_DTYPE)
+    blocks={
+        'meta': meta,
+        'nodeNames': '\0'.join(n.name for n in truss.nodes).encode('utf-8'),
+        'linkNames': '\0'.join(l.name for l in truss.links).encode('utf-8'),
+        'xyz': np.ascontiguousarray(truss.nodeCoords(), dtype='<f8').tobytes(),
+        'ends': np.ascontiguousarray(truss.linkNodeIndices(), dtype='<i4').tobytes(),
+        'supports': supports.tobytes(),
+        'loads': loads.tobytes(),
+        'cases': json.dumps({'loadCases': truss.loadCases, 'combinations': truss.combinations}).encode('utf-8'),
+    }
+    offset=HEADER.size+SECTION.size*len(SECTIONS)
+    table=[]
+    for name in SECTIONS:
+        offset=-(-offset//ALIGN)*ALIGN
+        table.append((offset, len(blocks[name])))
+        offset+=len(blocks[name])
+    with open(filename, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(truss.nodes), len(truss.links)))
+        for entry in table:
+            f.write(SECTION.pack(*entry))
+        for name, (start, size) in zip(SECTIONS, table):
+            f.write(b'\0'*(start-f.tell()))
+            f.write(blocks[name])
+
+def _readTable(f):
+    magic, version, reserved, nNodes, nLinks=HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError('not a binary truss file')
+    if version > VERSION:
+        raise ValueError('binary truss file version {} is newer than supported version {}'.format(version, VERSION))
+    table={name: SECTION.unpack(f.read(SECTION.size)) for name in SECTIONS[:SECTION_COUNT[version]]}
+    return version, nNodes, nLinks, table
+
+def _names(f, offset, size, count):
+    if count == 0:
+        return []
+    f.seek(offset)
+    return f.read(size).decode('utf-8').split('\0')
+
+def loadBinary(filename, mode='c'):
+    """
+    Reads a binary truss file into an array-backed TrussModel.  The coordinate and link arrays are np.memmap views of
+    the file, so pages are loaded on demand and shared between processes that open the same file.
+    :param mode: memmap mode; the default 'c' (copy-on-write) lets the model be edited without changing the file
+    """
+    with open(filename, 'rb') as f:
+        version, nNodes, nLinks, table=_readTable(f)
+        supportType, loadType=(SUPPORT_DTYPE, LOAD_DTYPE) if version >= 3 else (SUPPORT_DTYPE_2D, LOAD_DTYPE_2D)
+        f.seek(table['meta'][0])
+        meta=f.read(table['meta'][1])
+        nodeNames=_names(f, *table['nodeNames'], nNodes)
+        linkNames=_names(f, *table['linkNames'], nLinks)
+        f.seek(table['supports'][0])
+        supports=np.frombuffer(f.read(table['supports'][1]), dtype=supportType)
+        f.seek(table['loads'][0])
+        loads=np.frombuffer(f.read(table['loads'][1]), dtype=loadType)
+        cases={}
+        if 'cases' in table:
+            f.seek(table['cases'][0])
+            cases=json.loads(f.read(table['cases'][1]).decode('utf-8'))
+
+    def mapped(section, dtype, shape):
+        if shape[0] == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(filename, dtype=dtype, mode=mode, offset=table[section][0], shape=shape)
+
+    xyz=mapped('xyz', '<f8', (nNodes, 3))
+    ends=mapped('ends', '<i4', (nLinks, 2))
+
+    truss=TrussModel()
+    uts, ys, E, staticFactor, area=META.unpack(meta[:META.size])
+    truss.title=meta[META.size:].decode('utf-8') or None
+    truss.material.uts=_orNone(uts)
+    truss.material.ys=_orNone(ys)
+    truss.material.E=_orNone(E)
+    truss.material.staticFactor=_orNone(staticFactor)
+    truss.memberArea=_orNone(area)
+    truss.setArrays(TrussArrays.fromArrays(nodeNames, xyz, linkNames, ends))
+    for row, fix in zip(supports['node'].tolist(), supports['fix'].tolist()):
+        truss.supports[nodeNames[row]]=_xyz([bool(v) for v in fix], False)
+    for row, f in zip(loads['node'].tolist(), loads['f'].tolist()):
+        truss.loads[nodeNames[row]]=list(_xyz(f, 0.0))
+    truss.loadCases=cases.get('loadCases', {})
+    truss.combinations={name: [tuple(term) for term in terms] for name, terms in cases.get('combinations', {}).items()}
+    return truss
@@ -0,0 +1,239 @@
+"""
+On-disk cache of parsed truss models, keyed by the content of the design file.
+
+An entry is two files named by the sha256 of the parser, binary format and analysis versions and the file's bytes:
+
+    <key>.trb   the model in the Truss_binary container (memory-mapped when read back)
+    <key>.npz   link lengths, angles and direction cosines, the analysis and load case results if any, and the
+                parser diagnostics
+
+Reading an entry touches it, and put() evicts the least recently used entries until the directory is under
+maxBytes.  The directory is only rescanned when the size known to the TrussCache object goes over maxBytes, so keep
+one object for many puts; with several processes writing, maxBytes is a soft limit.  A VERSION file records the versions the entries were written with; when PARSER_VERSION, the binary
+VERSION or Truss_solver.ANALYSIS_VERSION changes the whole directory is cleared on first use.
+
+The directory defaults to $TRUSS_CACHE_DIR, or ~/.cache/truss.
+"""
+import hashlib
+import os
+import tempfile
+import numpy as np
+
+import Truss_trace as trace
+from Truss_binary import VERSION as BINARY_VERSION, loadBinary, saveBinary
+from Truss_parser import PARSER_VERSION, Diagnostic
+from Truss_solver import ANALYSIS_VERSION
+
+RESULT_FIELDS=('forces', 'stresses', 'displacements', 'reactions', 'areas')
+CASE_FIELDS=('forces', 'stresses', 'displacements', 'reactions')
+
+def defaultDirectory():
+    return os.environ.get('TRUSS_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'truss')
+
+class TrussCache():
+    def __init__(self, directory=None, maxBytes=512*2**20):
+        """
+        :param directory: cache directory, created if needed
+        :param maxBytes: total size the entries are trimmed to after each put
+        """
+        self.directory=directory or defaultDirectory()
+        self.maxBytes=maxBytes
+        self.versionTag='parser {} binary {} analysis {}\n'.format(PARSER_VERSION, BINARY_VERSION, ANALYSIS_VERSION)
+        #set once the VERSION file has been checked; processes sharing a directory should check it once up front
+        #(see Truss_batch.runBatch), since clearing races with other processes writing entries
+        self.versionChecked=False
+        #size of the directory at the last scan plus what this object has written since; evict only rescans the
+        #directory when this goes over maxBytes
+        self.approxBytes=None
+
+    def checkVersion(self):
+        """
+        Clears the directory if its entries were written by a different parser, binary format or analysis version.
+        """
+        if self.versionChecked:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        tagFile=os.path.join(self.directory, 'VERSION')
+        try:
+            with open(tagFile) as f:
+                current=f.read() == self.versionTag
+        except FileNotFoundError:
+            current=False
+        if not current:
+            self.clear()
+            def writeTag(path):
+                with open(path, 'w') as f:
+                    f.write(self.versionTag)
+            self._replace(tagFile, writeTag)
+        self.versionChecked=True
+
+    def key(self, filename, options=None):
+        """
+        Cache key of a design file: a hex sha256 over the versions, the import options and the file's bytes.
+        :param options: text describing import options that change the model built from the file, e.g. a node merge
+        tolerance; None for the defaults
+        """
+        h=hashlib.sha256(self.versionTag.encode('utf-8'))
+        if options:
+            h.update('options {}\n'.format(options).encode('utf-8'))
+        with open(filename, 'rb') as f:
+            for block in iter(lambda: f.read(2**20), b''):
+                h.update(block)
+        return h.hexdigest()
+
+    def _paths(self, key):
+        base=os.path.join(self.directory, key)
+        return base+'.trb', base+'.npz'
+
+    def get(self, key, diagnostics=None):
+        """
+        The cached model for key, with its link values and results restored, or None on a miss.
+        :param diagnostics: list that receives the Diagnostics recorded when the file was first parsed
+        """
+        self.checkVersion()
+        trb, npz=self._paths(key)
+        if not (os.path.exists(trb) and os.path.exists(npz)):
+            trace.count('cache misses')
+            return None
+        with trace.span('cache.load'):
+            try:
+                truss=loadBinary(trb)
+                with np.load(npz, allow_pickle=False) as data:
+                    truss.setLinkVals(data['lengths'], data['angles'], data['dirCos'])
+                    if 'forces' in data:
+                        from Truss_solver import TrussResults
+                        truss.results=TrussResults(*(data[name] for name in RESULT_FIELDS))
+                    if 'caseNames' in data:
+                        from Truss_solver import LoadCaseResults
+                        truss.caseResults=LoadCaseResults(data['caseNames'].tolist(), data['caseKinds'].tolist(),
+                                                          *(data['case_'+name] for name in CASE_FIELDS))
+                    if diagnostics is not None:
+                        diagnostics.extend(Diagnostic(int(n), str(m)) for n, m in
+                                           zip(data['diagLines'].tolist(), data['diagMessages'].tolist()))
+            except (OSError, ValueError, KeyError):
+                # a damaged or half-evicted entry is a miss
+                self._remove(key)
+                trace.count('cache misses')
+                return None
+        for path in (trb, npz):
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        trace.count('cache hits')
+        return truss
+
+    def put(self, key, truss, diagnostics=()):
+        """
+        Stores truss (after calcLinkVals, and analysis if wanted) under key, then trims the cache.
+        """
+        self.checkVersion()
+        os.makedirs(self.directory, exist_ok=True)
+        trb, npz=self._paths(key)
+        with trace.span('cache.store'):
+            arrays={'lengths': truss.linkLengths, 'angles': truss.linkAngles, 'dirCos': truss.linkDirCos,
+                    'diagLines': np.array([d.lineNo for d in diagnostics], dtype=np.int64),
+                    'diagMessages': np.array([d.message for d in diagnostics], dtype=str)}
+            if truss.results is not None:
+                arrays.update((name, getattr(truss.results, name)) for name in RESULT_FIELDS)
+            if truss.caseResults is not None:
+                r=truss.caseResults
+                arrays.update(caseNames=np.array(r.names, dtype=str), caseKinds=np.array(r.kinds, dtype=str))
+                arrays.update(('case_'+name, getattr(r, name)) for name in CASE_FIELDS)
+            def writeArrays(path):
+                with open(path, 'wb') as f:
+                    np.savez(f, **arrays)
+            self._replace(npz, writeArrays)
+            self._replace(trb, lambda path: saveBinary(truss, path))
+        if self.approxBytes is not None:
+            self.approxBytes+=sum(os.path.getsize(path) for path in (trb, npz))
+        if self.approxBytes is None or self.approxBytes > self.maxBytes:
+            self.evict()
+
+    def _replace(self, path, write):
+        """
+        Has write(name) create the file under a temporary name, then renames it into place so readers never see a
+        partial file.
+        """
+        fd, tmp=tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            write(tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def entries(self):
+        """
+        List of (last used time, total bytes, key) for the complete entries, oldest first.
+        """
+        sizes={}
+        times={}
+        for entry in os.scandir(self.directory):
+            key, ext=os.path.splitext(entry.name)
+            if ext not in ('.trb', '.npz'):
+                continue
+            try:
+                st=entry.stat()
+            except FileNotFoundError:
+                continue
+            sizes[key]=sizes.get(key, 0)+st.st_size
+            times[key]=max(times.get(key, 0.0), st.st_mtime)
+        return sorted((times[k], sizes[k], k) for k in sizes)
+
+    def evict(self):
+        """
+        Removes least recently used entries until the cache is no larger than maxBytes.
+        """
+        entries=self.entries()
+        total=sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.maxBytes:
+                break
+            self._remove(key)
+            total-=size
+            trace.count('cache evictions')
+        self.approxBytes=total
+
+    def _remove(self, key):
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        if not os.path.isdir(self.directory):
+            return
+        for entry in os.scandir(self.directory):
+            if os.path.splitext(entry.name)[1] in ('.trb', '.npz', '.tmp'):
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+def loadDesign(filename, build, cache=None, diagnostics=None, key=None, options=None):
+    """
+    Returns the model for a design file from cache, or calls build(filename, diagnostics) and caches what it returns.
+    build must return a TrussModel with its link values computed (and analyzed, if results should be cached).
+    :param cache: TrussCache, or None to always build
+    :param options: import options of build, for the key (see TrussCache.key)
+    """
+    diagnostics=diagnostics if diagnostics is not None else []
+    if cache is None:
+        return build(filename, diagnostics)
+    key=key or cache.key(filename, options)
+    try:
+        truss=cache.get(key, diagnostics)
+    except OSError:
+        truss=None
+    if truss is None:
+        truss=build(filename, diagnostics)
+        try:
+            cache.put(key, truss, diagnostics)
+        except OSError as e:
+            # an unwritable cache must not stop the file from opening
+            diagnostics.append(Diagnostic(0, 'not cached: {}'.format(e)))
+    return truss
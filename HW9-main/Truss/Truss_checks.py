@@ -0,0 +1,122 @@
+"""
+Member checks on an analyzed truss: axial stress against ys/staticFactor and Euler buckling of compression members.
+
+Every quantity is computed for all members at once from the result arrays, so a check costs a few numpy passes over
+the members.  Forces are the envelope over the default loads and all load cases and combinations when the truss has
+them (truss.caseResults), otherwise truss.results.
+
+Buckling uses pinned ends (effective length = member length) and, unless a moment of inertia is given, a solid round
+bar, for which I = A^2/(4 pi).  The buckling ratio applies the same static factor as the stress ratio:
+|compression|*staticFactor/Pcr.
+"""
+import math
+import numpy as np
+
+import Truss_trace as trace
+
+YIELD=0
+BUCKLING=1
+MODE_NAMES=('yield', 'buckling')
+
+def roundBarInertia(areas):
+    return areas*areas/(4.0*math.pi)
+
+class MemberChecks():
+    """
+    Output of checkMembers, in the order of truss.links.
+    tension, compression: largest tension (>= 0) and compression (<= 0) force of each member
+    stressRatio: max(|tension|, |compression|)/area divided by ys/staticFactor
+    eulerLoad: pi^2*E*I/L^2, nan for members without a length
+    bucklingRatio: |compression|*staticFactor/eulerLoad (0 for members never in compression)
+    ratio, mode: the governing ratio of each member and whether it is YIELD or BUCKLING
+    """
+    def __init__(self, tension, compression, areas, allowable, stressRatio, eulerLoad, bucklingRatio):
+        self.tension=tension
+        self.compression=compression
+        self.areas=areas
+        self.allowable=allowable
+        self.stressRatio=stressRatio
+        self.eulerLoad=eulerLoad
+        self.bucklingRatio=bucklingRatio
+        self.ratio=np.maximum(stressRatio, bucklingRatio)
+        self.mode=np.where(bucklingRatio > stressRatio, BUCKLING, YIELD).astype(np.int8)
+
+    def failing(self, mode=None):
+        """
+        Number of members with a governing ratio over 1, or only those of them governed by mode (YIELD or BUCKLING).
+        """
+        over=self.ratio > 1.0
+        if mode is not None:
+            over&=self.mode == mode
+        return int(np.count_nonzero(over))
+
+    def ranked(self, count=10):
+        """
+        Rows of the count members with the highest governing ratio, highest first.  Only the top count are sorted.
+        """
+        m=len(self.ratio)
+        count=min(count, m)
+        if count <= 0:
+            return np.zeros(0, dtype=np.int64)
+        top=np.argpartition(-self.ratio, count-1)[:count] if count < m else np.arange(m)
+        return top[np.argsort(-self.ratio[top], kind='stable')]
+
+def memberForces(truss):
+    """
+    (tension, compression) per member from the load case envelope, or from truss.results with a single load case.
+    """
+    if truss.caseResults is not None:
+        tension, iT, compression, iC=truss.caseResults.envelope()
+        return tension, compression
+    if truss.results is None:
+        raise ValueError('Truss has not been analyzed')
+    f=np.nan_to_num(truss.results.forces, nan=0.0)
+    return np.maximum(f, 0.0), np.minimum(f, 0.0)
+
+def checkMembers(truss, inertia=None, modulusScale=1000.0):
+    """
+    Checks every member of an analyzed truss (see the module notes).
+    :param inertia: moment of inertia, scalar or (m,) array; defaults to a solid round bar of the member's area
+    :param modulusScale: E is given in Mpsi and is multiplied by modulusScale to ksi, as in Truss_solver
+    :return: MemberChecks
+    """
+    m=truss.material
+    if None in (m.ys, m.E, m.staticFactor):
+        raise ValueError('Material ys, E and static factor are required for member checks')
+    with trace.span('checks', links=len(truss.links)):
+        tension, compression=memberForces(truss)
+        n=len(tension)
+        if truss.results is not None:
+            areas=np.asarray(truss.results.areas, dtype=np.float64)
+        else:
+            areas=np.full(n, float(truss.memberArea))
+        if truss.linkLengths is None or len(truss.linkLengths) != n:
+            truss.calcLinkVals()
+        lengths=truss.linkLengths
+        I=roundBarInertia(areas) if inertia is None else np.broadcast_to(np.asarray(inertia, dtype=np.float64), (n,))
+        allowable=m.ys/m.staticFactor
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stressRatio=np.maximum(tension, -compression)/areas/allowable
+            eulerLoad=(math.pi**2*m.E*modulusScale)*I/(lengths*lengths)
+            bucklingRatio=np.where((compression < 0.0) & (eulerLoad > 0.0),
+                                   -compression*m.staticFactor/eulerLoad, 0.0)
+        return MemberChecks(tension, compression, areas, allowable, np.nan_to_num(stressRatio, nan=0.0), eulerLoad,
+                            np.nan_to_num(bucklingRatio, nan=0.0))
+
+def checkLines(truss, checks=None, count=10):
+    """
+    Generator for the member check section of the report: the allowable stress, how many members fail and the
+    count governing members.
+    """
+    c=checks if checks is not None else checkMembers(truss)
+    yield '_____________Member Checks________________\n'
+    yield 'Allowable Stress (ys/SF):  {:0.2f}\n'.format(c.allowable)
+    yield 'Members failing:  {} of {} ({} by yield, {} by buckling)\n'.format(
+        c.failing(), len(c.ratio), c.failing(YIELD), c.failing(BUCKLING))
+    yield 'Rank\tLink\tMode\tForce\tStress Ratio\tEuler Load\tBuckling Ratio\n'
+    for rank, i in enumerate(c.ranked(count).tolist(), 1):
+        force=c.compression[i] if c.mode[i] == BUCKLING else \
+            (c.tension[i] if c.tension[i] >= -c.compression[i] else c.compression[i])
+        yield '{}\t{}\t{}\t{:0.2f}\t{:0.3f}\t{:0.2f}\t{:0.3f}\n'.format(
+            rank, truss.links[i].name, MODE_NAMES[c.mode[i]], force, c.stressRatio[i], c.eulerLoad[i],
+            c.bucklingRatio[i])
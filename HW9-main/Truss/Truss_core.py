@@ -0,0 +1,793 @@
+import math
+import os
+import Truss_trace as trace
+
+class Position:
+    """
+    A point or vector in 3D space.  __slots__ keeps each instance small, and the in-place operators (+=, -=, *=, /=)
+    update the object instead of allocating a new one.  += and -= take a Position or a scalar.  For many points at
+    once use Truss_arrays.PositionArray.
+    """
+    __slots__=('x', 'y', 'z')
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+
+    def __eq__(self, other):
+        return (self.x == other.x) and (self.y == other.y) and (self.z == other.z)
+
+    def __add__(self, other):
+        return Position(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __iadd__(self, other):
+        if isinstance(other, (float, int)):
+            self.x += other
+            self.y += other
+            self.z += other
+        else:
+            self.x += other.x
+            self.y += other.y
+            self.z += other.z
+        return self
+
+    def __sub__(self, other):
+        return Position(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def __isub__(self, other):
+        if isinstance(other, (float, int)):
+            self.x -= other
+            self.y -= other
+            self.z -= other
+        else:
+            self.x -= other.x
+            self.y -= other.y
+            self.z -= other.z
+        return self
+
+    def __neg__(self):
+        return Position(-self.x, -self.y, -self.z)
+
+    def __mul__(self, scalar):
+        return Position(self.x * scalar, self.y * scalar, self.z * scalar)
+
+    def __rmul__(self, scalar):
+        return self.__mul__(scalar)
+
+    def __imul__(self, scalar):
+        self.x *= scalar
+        self.y *= scalar
+        self.z *= scalar
+        return self
+
+    def __truediv__(self, scalar):
+        return Position(self.x / scalar, self.y / scalar, self.z / scalar)
+
+    def __itruediv__(self, scalar):
+        self.x /= scalar
+        self.y /= scalar
+        self.z /= scalar
+        return self
+
+    __idiv__ = __itruediv__
+
+    def __repr__(self):
+        return 'Position({}, {}, {})'.format(self.x, self.y, self.z)
+
+    def dot(self, other):
+        return self.x * other.x + self.y * other.y + self.z * other.z
+
+    def cross(self, other):
+        return Position(self.y * other.z - self.z * other.y,
+                        self.z * other.x - self.x * other.z,
+                        self.x * other.y - self.y * other.x)
+
+    def set(self, strXYZ=None, tupXYZ=None):
+        if strXYZ:
+            parts = strXYZ.replace('(', '').replace(')', '').split(',')
+            self.x, self.y, self.z = map(float, parts)
+        elif tupXYZ:
+            self.x, self.y, self.z = tupXYZ
+
+    def get_tuple(self):
+        return (self.x, self.y, self.z)
+
+    def get_str(self, n_places=3):
+        return "{}, {}, {}".format(round(self.x, n_places), round(self.y, n_places), round(self.z, n_places))
+
+    def magnitude(self):
+        return math.sqrt(self.x ** 2 + self.y ** 2 + self.z ** 2)
+
+    def normalize(self):
+        mag = self.magnitude()
+        if mag > 0:
+            self.x /= mag
+            self.y /= mag
+            self.z /= mag
+
+    def get_angle_rad(self):
+        """
+        Angle of the projection on the x-y plane, from the x axis.  For 3D directions use get_dir_cos.
+        """
+        if self.magnitude() == 0:
+            return 0
+        return math.atan2(self.y, self.x)
+
+    def get_angle_deg(self):
+        return math.degrees(self.get_angle_rad())
+
+    def get_dir_cos(self):
+        """
+        Direction cosines (cos of the angles to the x, y and z axes) as a tuple, (0, 0, 0) for a zero vector.
+        """
+        mag = self.magnitude()
+        if mag == 0:
+            return 0.0, 0.0, 0.0
+        return self.x / mag, self.y / mag, self.z / mag
+#load case name of the loads given without one
+DEFAULT_CASE='default'
+
+class Material():
+    def __init__(self, uts=None, ys=None, modulus=None, staticFactor=None):
+        self.uts = uts
+        self.ys = ys
+        self.E=modulus
+        self.staticFactor=staticFactor
+
+class Node():
+    def __init__(self, name=None, position=None):
+        self.name = name
+        self.position = position if position is not None else Position()
+
+    def __eq__(self, other):
+        """
+        This overloads the == operator such that I can compare two nodes to see if they are the same node.  This is
+        useful when reading in nodes to make sure I don't get duplicate nodes
+        """
+        if self.name != other.name:
+            return False
+        if self.position != other.position:
+            return False
+        return True
+
+class Link():
+    def __init__(self,name="", node1="1", node2="2", length=None, angleRad=None):
+        """
+        Basic definition of a link contains a name and names of node1 and node2
+        """
+        self.name=name
+        self.node1_Name=node1
+        self.node2_Name=node2
+        self.length=length
+        self.angleRad=angleRad
+
+    def __eq__(self, other):
+        """
+        This overloads the == operator for comparing equivalence of two links.
+        """
+        if self.node1_Name != other.node1_Name: return False
+        if self.node2_Name != other.node2_Name: return False
+        if self.length != other.length: return False
+        if self.angleRad != other.angleRad: return False
+        return True
+
+    def set(self, node1=None, node2=None, length=None, angleRad=None):
+        self.node1_Name=node1
+        self.node2_Name=node2
+        self.length=length
+        self.angleRad=angleRad
+
+class TrussModel():
+    def __init__(self, arrayBacked=False):
+        """
+        :param arrayBacked: if True, node coordinates and link connectivity are stored in numpy arrays (see
+        Truss_arrays.TrussArrays) and self.nodes/self.links hold thin views into them.
+        """
+        self.title=None
+        self.links=[]
+        self.nodes=[]
+        #name -> Node lookup so hasNode/getNode are constant time.  self.nodes keeps the input order for reporting.
+        self.nodeIndex={}
+        self.material=Material()
+        #per-link geometry from calcLinkVals, in the order of self.links
+        self.linkLengths=None
+        self.linkAngles=None
+        self.linkDirCos=None
+        #analysis input: node name -> (fixX, fixY, fixZ) and node name -> [Fx, Fy, Fz].  Plane trusses ignore fixZ,
+        #and 2-tuples/lists (no z) are accepted for both
+        self.supports={}
+        self.loads={}
+        #named load cases (case name -> node name -> [Fx, Fy, Fz]; the unnamed loads above are case DEFAULT_CASE) and
+        #combinations (name -> [(case name, factor), ...])
+        self.loadCases={}
+        self.combinations={}
+        self.memberArea=1.0
+        self.results=None
+        self.caseResults=None
+        #change tracking for incremental updates: names of moved nodes, rows of links whose geometry is stale, and a
+        #node name -> incident link rows adjacency (built on first use)
+        self.dirtyNodes=set()
+        self.dirtyLinks=set()
+        self._nodeLinks=None
+        #frozenset of the two end names -> row of the first link between them, so A-B and B-A are the same key
+        #(built on first use)
+        self._linkPairs=None
+        self._spatialIndex=None
+        self.arrays=None
+        if arrayBacked:
+            from Truss_arrays import TrussArrays
+            self.setArrays(TrussArrays())
+
+    def setArrays(self, arrays):
+        """
+        Makes the model array-backed by a TrussArrays store.  nodes, links and nodeIndex become lazy views of it.
+        """
+        from Truss_arrays import ViewList, NodeIndex, NodeView, LinkView
+        self.arrays=arrays
+        self.nodes=ViewList(arrays, NodeView, 'nodeCount')
+        self.links=ViewList(arrays, LinkView, 'linkCount')
+        self.nodeIndex=NodeIndex(arrays)
+
+    def hasNode(self, name):
+        return name in self.nodeIndex
+
+    def getNode(self, name):
+        return self.nodeIndex.get(name)
+
+    def addNode(self, node):
+        """
+        Appends a node and registers it in the name index.  A node with the same name replaces the index entry, so
+        callers should check hasNode first (as TrussModelBuilder does).  In array-backed mode the node is copied into the
+        arrays and the view that replaces it is returned.
+        """
+        self.dirtyNodes.add(node.name)
+        self._spatialIndex=None
+        if self.arrays is not None:
+            return self.arrays.adoptNode(node)
+        self.nodes.append(node)
+        self.nodeIndex[node.name]=node
+        return node
+
+    def removeNode(self, name):
+        """
+        Removes the named node and any links that reference it.  Returns the removed node or None.  Link rows are
+        renumbered, so the change tracking is reset and the next update is a full calcLinkVals.
+        """
+        self._nodeLinks=None
+        self._linkPairs=None
+        self._spatialIndex=None
+        self.linkLengths=None
+        self.dirtyNodes.discard(name)
+        self.dirtyLinks.clear()
+        if self.arrays is not None:
+            i=self.arrays.indexOf.get(name)
+            if i is None:
+                return None
+            node=Node(name, Position(*self.arrays.xyz[i]))  # a detached copy, the row is about to go away
+            self.arrays.removeNode(i)
+            return node
+        node=self.nodeIndex.pop(name, None)
+        if node is None:
+            return None
+        self.nodes.remove(node)
+        self.links=[l for l in self.links if l.node1_Name != name and l.node2_Name != name]
+        return node
+
+    def addLink(self, link):
+        if self.arrays is not None:
+            link=self.arrays.adoptLink(link)
+        else:
+            self.links.append(link)
+        i=len(self.links)-1
+        self.dirtyLinks.add(i)
+        self._spatialIndex=None
+        if self._nodeLinks is not None:
+            self._nodeLinks.setdefault(link.node1_Name, []).append(i)
+            self._nodeLinks.setdefault(link.node2_Name, []).append(i)
+        if self._linkPairs is not None:
+            self._linkPairs.setdefault(frozenset((link.node1_Name, link.node2_Name)), i)
+        return link
+
+    def linkBetween(self, name1, name2):
+        """
+        Row (in self.links) of the first link joining the two named nodes in either order, or None.  Constant time
+        after the pair index is built on first use.
+        """
+        if self._linkPairs is None:
+            linkPairs={}
+            for i, l in enumerate(self.links):
+                linkPairs.setdefault(frozenset((l.node1_Name, l.node2_Name)), i)
+            self._linkPairs=linkPairs
+        return self._linkPairs.get(frozenset((name1, name2)))
+
+    def hasLinkBetween(self, name1, name2):
+        return self.linkBetween(name1, name2) is not None
+
+    def getLinkBetween(self, name1, name2):
+        i=self.linkBetween(name1, name2)
+        return None if i is None else self.links[i]
+
+    def incidentLinks(self, name):
+        """
+        Rows (in self.links) of the links that use the named node.
+        """
+        if self._nodeLinks is None:
+            nodeLinks={}
+            for i, l in enumerate(self.links):
+                nodeLinks.setdefault(l.node1_Name, []).append(i)
+                nodeLinks.setdefault(l.node2_Name, []).append(i)
+            self._nodeLinks=nodeLinks
+        return self._nodeLinks.get(name, [])
+
+    def markNodeDirty(self, name):
+        self.dirtyNodes.add(name)
+        self.dirtyLinks.update(self.incidentLinks(name))
+        self._spatialIndex=None
+
+    def spatialIndex(self):
+        """
+        The Truss_spatial.SpatialIndex of the current node positions, rebuilt on first use after any edit.
+        """
+        if self._spatialIndex is None:
+            from Truss_spatial import SpatialIndex
+            self._spatialIndex=SpatialIndex(self.nodeCoords(), self.linkNodeIndices())
+        return self._spatialIndex
+
+    def nearestNode(self, x, y, radius):
+        """
+        The node nearest to (x, y) in the x-y plane within radius, or None.
+        """
+        i=self.spatialIndex().nearestNode(x, y, radius)
+        return None if i is None else self.nodes[i]
+
+    def linksInRect(self, xmin, ymin, xmax, ymax):
+        """
+        Rows (in self.links) of the links that cross or lie inside the rectangle.
+        """
+        return self.spatialIndex().linksInRect(xmin, ymin, xmax, ymax)
+
+    def linksNear(self, x, y, radius):
+        """
+        Rows (in self.links) of the links within radius of (x, y), nearest first.
+        """
+        return self.spatialIndex().linksNear(x, y, radius)
+
+    def moveNode(self, name, x=None, y=None, z=None):
+        """
+        Moves a node (coordinates that are None are left alone) and marks it and its links dirty.
+        """
+        p=self.getNode(name).position
+        if x is not None: p.x=x
+        if y is not None: p.y=y
+        if z is not None: p.z=z
+        self.markNodeDirty(name)
+
+    def nodeCoords(self):
+        """
+        Node positions as an (n,3) float64 array in the order of self.nodes.  In array-backed mode this is the live
+        storage, not a copy.
+        """
+        if self.arrays is not None:
+            return self.arrays.coords()
+        from Truss_arrays import nodeCoords
+        return nodeCoords(self.nodes)
+
+    def nodeRows(self):
+        """
+        Node name -> row in nodeCoords().  In array-backed mode this is the store's own index; do not modify it.
+        """
+        if self.arrays is not None:
+            return self.arrays.indexOf
+        return {n.name: i for i, n in enumerate(self.nodes)}
+
+    def dimension(self):
+        """
+        3 if the truss is a space truss (its nodes are not all at one z, or a load has a z component), otherwise 2.
+        """
+        xyz=self.nodeCoords()
+        if len(xyz) and xyz[:, 2].max() != xyz[:, 2].min():
+            return 3
+        for loads in [self.loads]+list(self.loadCases.values()):
+            if any(len(f) > 2 and f[2] for f in loads.values()):
+                return 3
+        return 2
+
+    def linkNodeIndices(self):
+        """
+        Link end points as an (m,2) int32 array of rows in nodeCoords(), -1 where a link names a missing node.
+        """
+        if self.arrays is not None:
+            return self.arrays.linkEnds()
+        from Truss_arrays import linkNodeIndices
+        return linkNodeIndices(self.links, self.nodes)
+
+    def calcLinkVals(self):
+        """
+        Computes the length, angle and direction cosines of every link with one batched array pass.  The arrays are
+        kept on the model (linkLengths, linkAngles, linkDirCos) and each link's length/angleRad is updated too.  Links
+        that name a missing node are left with length and angleRad of None.
+        """
+        from Truss_arrays import calcLinkGeometry
+        with trace.span('geometry', links=len(self.links)):
+            self.setLinkVals(*calcLinkGeometry(self.nodeCoords(), self.linkNodeIndices()))
+
+    def setLinkVals(self, lengths, angles, dirCos):
+        """
+        Stores link geometry computed elsewhere (calcLinkVals, or a cache) as if calcLinkVals had run.
+        :param lengths: (m,) link lengths, nan for links with a missing node
+        :param angles: (m,) angles in radians
+        :param dirCos: (m,3) direction cosines
+        """
+        self.linkLengths, self.linkAngles, self.linkDirCos=lengths, angles, dirCos
+        self.dirtyNodes.clear()
+        self.dirtyLinks.clear()
+        if self.arrays is not None:
+            m=self.arrays.linkCount
+            self.arrays.length[:m]=lengths
+            self.arrays.angleRad[:m]=angles
+            return
+        self._storeLinkVals(self.links, lengths, angles)
+
+    def _storeLinkVals(self, links, lengths, angles):
+        for l, length, angle in zip(links, lengths.tolist(), angles.tolist()):
+            if length != length:  # nan: one of the nodes is missing
+                l.length, l.angleRad=None, None
+            else:
+                l.length, l.angleRad=length, angle
+
+    def updateLinkVals(self):
+        """
+        Recomputes the geometry of the dirty links only (falling back to calcLinkVals when links were added or there
+        is no previous pass) and clears the change tracking.
+        :return: (names of dirty nodes, sorted rows of updated links)
+        """
+        import numpy as np
+        from Truss_arrays import calcLinkGeometry
+        nodes=self.dirtyNodes
+        if self.linkLengths is None or len(self.linkLengths) != len(self.links):
+            self.calcLinkVals()
+            return nodes, list(range(len(self.links)))
+        rows=sorted(self.dirtyLinks)
+        self.dirtyNodes=set()
+        self.dirtyLinks.clear()
+        if not rows:
+            return nodes, rows
+        trace.count('links updated', len(rows))
+        idx=np.array(rows, dtype=np.int64)
+        if self.arrays is not None:
+            lengths, angles, dirCos=calcLinkGeometry(self.arrays.coords(), self.arrays.linkEnds()[idx])
+            self.arrays.length[idx]=lengths
+            self.arrays.angleRad[idx]=angles
+        else:
+            links=[self.links[i] for i in rows]
+            xyz=np.zeros((2*len(links), 3))
+            ends=np.arange(2*len(links), dtype=np.int32).reshape(-1, 2)
+            for k, l in enumerate(links):
+                for j, name in enumerate((l.node1_Name, l.node2_Name)):
+                    n=self.getNode(name)
+                    if n is None:
+                        ends[k, j]=-1
+                    else:
+                        xyz[2*k+j]=n.position.x, n.position.y, n.position.z
+            lengths, angles, dirCos=calcLinkGeometry(xyz, ends)
+            self._storeLinkVals(links, lengths, angles)
+        self.linkLengths[idx]=lengths
+        self.linkAngles[idx]=angles
+        self.linkDirCos[idx]=dirCos
+        return nodes, rows
+
+    def longestLink(self):
+        """
+        Returns the link with the greatest length (from calcLinkVals), or None if there are no measured links.
+        """
+        if self.linkLengths is not None and len(self.linkLengths) == len(self.links):
+            import numpy as np
+            if np.isnan(self.linkLengths).all():
+                return None
+            return self.links[int(np.nanargmax(self.linkLengths))]
+        longest=None
+        for l in self.links:
+            if l.length is not None and (longest is None or l.length > longest.length):
+                longest=l
+        return longest
+
+    def reportLines(self):
+        """
+        Generator for the lines of the plain-text design report.  Nothing here needs Qt, so the report can be shown in
+        the GUI, written to a file or produced by batch jobs.
+        """
+        m=self.material
+        yield '\tTruss Design Report\n'
+        yield 'Title:  {}\n'.format(self.title)
+        yield 'Static Factor of Safety:  {}\n'.format(_formatValue(m.staticFactor))
+        yield 'Ultimate Strength:  {}\n'.format(_formatValue(m.uts))
+        yield 'Yield Strength:  {}\n'.format(_formatValue(m.ys))
+        yield 'Modulus of Elasticity:  {}\n'.format(_formatValue(m.E))
+        yield '_____________Link Summary________________\n'
+        if self.results is None:
+            yield 'Link\t(1)\t(2)\tLength\tAngle\n'
+        else:
+            yield 'Link\t(1)\t(2)\tLength\tAngle\tForce\tStress\n'
+        for i, l in enumerate(self.links):
+            yield self.reportRow(i, l)
+        if self.caseResults is not None:
+            yield from self.envelopeLines()
+        if self.results is not None or self.caseResults is not None:
+            yield from self.checkLines()
+
+    def checkLines(self, count=10):
+        """
+        Generator for the member check section of the report (see Truss_checks): stress and buckling ratios of the
+        count governing members.
+        """
+        from Truss_checks import checkLines
+        try:
+            yield from checkLines(self, count=count)
+        except ValueError as e:
+            yield '_____________Member Checks________________\n'
+            yield 'not checked: {}\n'.format(e)
+
+    def envelopeLines(self):
+        """
+        Generator for the load case section of the report: the cases and combinations, then each member's largest
+        tension and compression over all of them and where it occurs.
+        """
+        r=self.caseResults
+        yield '_____________Load Cases________________\n'
+        for name, kind in zip(r.names, r.kinds):
+            if kind == 'case':
+                yield 'case\t{}\n'.format(name)
+            else:
+                terms=' + '.join('{:g}*{}'.format(f, c) for c, f in self.combinations[name])
+                yield 'combination\t{}\t{}\n'.format(name, terms)
+        yield '_____________Force Envelope________________\n'
+        yield 'Link\tMax Tension\tCase\tMax Compression\tCase\n'
+        tension, iT, compression, iC=r.envelope()
+        names=r.names+['-']  # column -1: never in tension (or compression)
+        for l, t, a, c, b in zip(self.links, tension.tolist(), iT.tolist(), compression.tolist(), iC.tolist()):
+            yield '{}\t{:0.2f}\t{}\t{:0.2f}\t{}\n'.format(l.name, t, names[a], c, names[b])
+
+    def reportHeaderCount(self):
+        """
+        Number of report lines before the first link row.
+        """
+        return 8
+
+    def reportRow(self, i, link=None):
+        """
+        The report line for link row i.
+        """
+        l=self.links[i] if link is None else link
+        st='{}\t{}\t{}\t{:0.2f}\t{:0.2f}'.format(l.name, l.node1_Name, l.node2_Name, l.length, l.angleRad)
+        if self.results is not None:
+            st+='\t{:0.2f}\t{:0.2f}'.format(self.results.forces[i], self.results.stresses[i])
+        return st+'\n'
+
+def _formatValue(value):
+    """
+    A material value for the report; files without a material or static_factor line leave them None.
+    """
+    return 'not given' if value is None else '{:0.2f}'.format(value)
+
+class LoadCancelled(Exception):
+    pass
+
+def readProgress(lines, size, progress, step=0.01):
+    """
+    Passes lines through, calling progress('parse', fraction read) about every step of size (in characters).
+    """
+    done = 0
+    nextCall = 0
+    for line in lines:
+        done += len(line)
+        if done >= nextCall:
+            progress('parse', min(done/size, 1.0) if size else 1.0)
+            nextCall = done+step*size
+        yield line
+
+def importLines(truss, data, diagnostics, progress=None, mergeTolerance=None):
+    """
+    Parses the lines of a design file into truss, computes its link values and, if it has supports and passes
+    Truss_validate's checks, analyzes it.  Problems are added to diagnostics.
+    :param mergeTolerance: merge nodes closer than this into one joint (see TrussModelBuilder)
+    """
+    from Truss_parser import TrussParser, TrussModelBuilder, buildModel
+    parser = TrussParser(diagnostics)
+    with trace.span('parse'):
+        buildModel(parser.records(data), TrussModelBuilder(truss, diagnostics, mergeTolerance))
+    return prepareImported(truss, diagnostics, progress)
+
+def prepareImported(truss, diagnostics, progress=None):
+    """
+    The part of importLines after parsing, for a model read some other way (e.g. Truss_binary): computes its link
+    values and, if it has supports and passes Truss_validate's checks, analyzes it.  Problems are added to diagnostics.
+    """
+    from Truss_parser import Diagnostic
+    if progress is not None:
+        progress('geometry', 0.0)
+    truss.calcLinkVals()
+    if truss.supports:
+        if progress is not None:
+            progress('solve', 0.0)
+        from Truss_solver import analyzeTruss
+        from Truss_validate import checkBeforeSolve
+        try:
+            if checkBeforeSolve(truss, diagnostics):
+                analyzeTruss(truss)
+        except ValueError as e:
+            diagnostics.append(Diagnostic(0, 'analysis failed: {}'.format(e)))
+    return truss
+
+class TrussController():
+    def __init__(self, arrayBacked=False):
+        self.arrayBacked=arrayBacked
+        #import option: nodes closer than this are merged into one joint (None: only exact name matches)
+        self.mergeTolerance=None
+        self.truss=TrussModel(arrayBacked=arrayBacked)
+        self.diagnostics=[]
+        self._view=None
+
+    @property
+    def view(self):
+        """
+        The Qt TrussView, created the first time it is asked for (e.g. by setDisplayWidgets).  Until then the
+        controller is headless: displayReport and drawTruss do nothing and Qt is never imported.
+        """
+        if self._view is None:
+            from Truss_stem import TrussView
+            self._view=TrussView()
+        return self._view
+
+    @view.setter
+    def view(self, view):
+        self._view=view
+
+    def hasView(self):
+        return self._view is not None
+
+    def ImportFromFile(self, data):
+        """
+        Data is any iterable of lines from the data file (an open file object is read line by line).
+        The lines are parsed by Truss_parser.TrussParser into records (title, material, static_factor, node, link,
+        support, load, area) and TrussModelBuilder applies them to self.truss.
+
+        Reading Nodes:
+        A node is added unless the truss model already has a node by that name (see TrussModel.hasNode), or, when
+        self.mergeTolerance is set, a node within that distance; links, supports and loads on a merged node go to
+        the node it was merged into.
+
+        Reading Links:
+        Each link has a name and two node names.  Links may appear before their nodes; they are resolved once the
+        whole file has been read, and links whose nodes never appear are skipped.
+
+        Problems found while reading are collected in self.diagnostics rather than printed.
+        """
+        self.diagnostics = []
+        importLines(self.truss, data, self.diagnostics, mergeTolerance=self.mergeTolerance)
+        self.displayReport()
+        self.drawTruss()
+
+    def readDesign(self, filename, cache=None, progress=None):
+        """
+        Reads, computes and analyzes the design in filename (or takes it from cache, a Truss_cache.TrussCache)
+        without changing the controller, so it can run on a worker thread (see Truss_stem.TrussLoader).
+        :param progress: function(stage, fraction) called as the file is read and before each later stage; it may
+        raise LoadCancelled to stop
+        :return: (TrussModel, list of Diagnostics)
+        """
+        from Truss_cache import loadDesign
+        def build(filename, diagnostics):
+            truss = TrussModel(arrayBacked=self.arrayBacked)
+            with open(filename, 'r') as file:
+                lines = file if progress is None else readProgress(file, os.path.getsize(filename), progress)
+                return importLines(truss, lines, diagnostics, progress, self.mergeTolerance)
+        diagnostics = []
+        options = 'merge {!r}'.format(self.mergeTolerance) if self.mergeTolerance else None
+        truss = loadDesign(filename, build, cache, diagnostics, options=options)
+        return truss, diagnostics
+
+    def OpenDesign(self, filename, cache=None):
+        """
+        Replaces the truss with the design in filename and displays it.  With a Truss_cache.TrussCache, a file that
+        is unchanged since it was last opened is read back from the cache instead of being parsed and analyzed.
+        """
+        self.truss, self.diagnostics = self.readDesign(filename, cache)
+        self.displayReport()
+        self.drawTruss()
+
+    def SaveToBinary(self, filename):
+        """
+        Writes the truss to the binary container format (see Truss_binary).
+        """
+        from Truss_binary import saveBinary
+        saveBinary(self.truss, filename)
+
+    def LoadFromBinary(self, filename):
+        """
+        Replaces the truss with one read from a binary container.  Coordinates and connectivity are memory-mapped.
+        """
+        from Truss_binary import loadBinary
+        self.diagnostics = []
+        self.truss = prepareImported(loadBinary(filename), self.diagnostics)
+        self.displayReport()
+        self.drawTruss()
+
+    def ExportReport(self, filename):
+        """
+        Writes the plain-text design report to filename one line at a time.
+        """
+        with trace.span('report', file=filename), open(filename, 'w') as file:
+            file.writelines(self.truss.reportLines())
+
+    def analyze(self):
+        """
+        Runs the sparse direct-stiffness analysis and keeps the results on the model (truss.results, and
+        truss.caseResults for load cases and combinations).
+        """
+        from Truss_solver import analyzeTruss
+        return analyzeTruss(self.truss)
+
+    def hasNode(self, name):
+        return self.truss.hasNode(name)
+
+    def addNode(self, node):
+        self.truss.addNode(node)
+
+    def getNode(self, name):
+        return self.truss.getNode(name)
+
+    def removeNode(self, name):
+        return self.truss.removeNode(name)
+
+    def addLink(self, link):
+        self.truss.addLink(link)
+
+    def calcLinkVals(self):
+        self.truss.calcLinkVals()
+
+    def moveNode(self, name, x=None, y=None, z=None):
+        """
+        Moves one node and updates only what depends on it (see updateTruss).
+        """
+        self.truss.moveNode(name, x, y, z)
+        self.updateTruss()
+
+    def updateTruss(self):
+        """
+        Brings link geometry, report and scene up to date after edits to the model (moveNode, addNode, addLink).
+        Only dirty links are recomputed and redrawn.  If the truss has been analyzed, it is validated and analyzed
+        again, and since every member force can change, the whole report is refreshed.
+        """
+        nodes, rows = self.truss.updateLinkVals()
+        reportRows = rows
+        if (self.truss.results is not None or self.truss.caseResults is not None) and rows:
+            # an edit (e.g. removeNode) can leave a mechanism or a free body, so validate again before solving
+            from Truss_validate import checkBeforeSolve
+            reportRows = None
+            ok = False
+            try:
+                ok = checkBeforeSolve(self.truss, self.diagnostics)
+                if ok:
+                    self.analyze()
+            except ValueError as e:
+                from Truss_parser import Diagnostic
+                ok = False
+                self.diagnostics.append(Diagnostic(0, 'analysis failed: {}'.format(e)))
+            if not ok:
+                self.truss.results = None
+                self.truss.caseResults = None
+        if self.hasView():
+            self.view.updateReport(self.truss, reportRows)
+            self.view.updateScene(self.truss, nodes, rows)
+
+    def setDisplayWidgets(self, args):
+        self.view.setDisplayWidgets(args)
+
+    def displayReport(self):
+        if self.hasView():
+            self.view.displayReport(truss=self.truss)
+
+    def drawTruss(self):
+        if self.hasView():
+            self.view.buildScene(truss=self.truss)
@@ -0,0 +1,287 @@
+"""
+Generates parameterized truss families and writes them in the text design format.
+
+    python Truss_generate.py warren 100 -o warren_100.txt
+    python Truss_generate.py tower3d 20 --width 48 --height 60 -o tower.txt
+
+Every generator returns an array-backed TrussModel with material, area, supports and loads set, so the result can be
+analyzed directly or written with writeDesign.  Nodes are named L0, L1, ... (lower chord / first leg) and U0, U1, ...
+(upper chord) for bridges, T<level>_<leg> for towers and G/B<i>_<k> for roof grids; links are numbered from 1.
+"""
+import argparse
+import sys
+import numpy as np
+
+from Truss_arrays import TrussArrays
+from Truss_core import TrussModel
+
+def _model(title, nodeNames, xyz, ends):
+    truss=TrussModel()
+    truss.title=title
+    truss.material.uts=105.0
+    truss.material.ys=82.0
+    truss.material.E=30.0
+    truss.material.staticFactor=3.5
+    truss.memberArea=1.0
+    linkNames=[str(i) for i in range(1, len(ends)+1)]
+    truss.setArrays(TrussArrays.fromArrays(nodeNames, np.asarray(xyz, dtype=np.float64),
+                                           linkNames, np.asarray(ends, dtype=np.int32).reshape(-1, 2)))
+    return truss
+
+def warrenBridge(bays, bayLength=120.0, height=103.92, load=-10.0):
+    """
+    Warren truss: bays+1 lower chord nodes and bays upper chord nodes centred over the bays, joined by diagonals
+    only (the sample input file is warrenBridge(2)).  Pinned at L0, roller at L<bays>, load (y) on every upper node.
+    """
+    n=int(bays)
+    if n < 1:
+        raise ValueError('a Warren truss needs at least 1 bay')
+    i=np.arange(n+1)
+    j=np.arange(n)
+    lower=np.column_stack((i*bayLength, np.zeros(n+1), np.zeros(n+1)))
+    upper=np.column_stack(((j+0.5)*bayLength, np.full(n, height), np.zeros(n)))
+    U=n+1+j  # rows of the upper nodes
+    ends=np.concatenate((np.column_stack((i[:-1], i[1:])),       # lower chord
+                         np.column_stack((U[:-1], U[1:])),       # upper chord
+                         np.column_stack((j, U)),                # diagonals up
+                         np.column_stack((U, j+1))))             # diagonals down
+    names=['L{}'.format(k) for k in i]+['U{}'.format(k) for k in j]
+    truss=_model('Warren Truss, {} bays'.format(n), names, np.vstack((lower, upper)), ends)
+    _supportEnds(truss, 'L0', 'L{}'.format(n))
+    for k in j:
+        truss.loads['U{}'.format(k)]=[0.0, load]
+    return truss
+
+def _postedBridge(bays, bayLength, height, load, howe):
+    n=int(bays)
+    if n < 2:
+        raise ValueError('a Pratt or Howe truss needs at least 2 bays')
+    i=np.arange(n+1)
+    k=np.arange(1, n)  # upper chord panel points
+    lower=np.column_stack((i*bayLength, np.zeros(n+1), np.zeros(n+1)))
+    upper=np.column_stack((k*bayLength, np.full(n-1, height), np.zeros(n-1)))
+    U=np.full(n+1, -1)
+    U[1:n]=n+1+np.arange(n-1)
+    links=[np.column_stack((i[:-1], i[1:])),                     # lower chord
+           np.column_stack((U[1:n-1], U[2:n])),                  # upper chord
+           np.column_stack((U[1:n], k)),                         # verticals
+           np.array([[0, U[1]], [U[n-1], n]])]                   # end posts
+    # diagonals in the interior panels; Pratt diagonals slope down toward midspan, Howe diagonals up toward it
+    p=np.arange(1, n-1)
+    left=p+1 <= n/2
+    if howe:
+        left=~left
+    diag=np.where(left[:, None], np.column_stack((U[p], p+1)), np.column_stack((p, U[p+1])))
+    links.append(diag)
+    names=['L{}'.format(m) for m in i]+['U{}'.format(m) for m in k]
+    truss=_model('{} Truss, {} bays'.format('Howe' if howe else 'Pratt', n), names, np.vstack((lower, upper)),
+                 np.concatenate(links))
+    _supportEnds(truss, 'L0', 'L{}'.format(n))
+    for m in k:
+        truss.loads['L{}'.format(m)]=[0.0, load]
+    return truss
+
+def prattBridge(bays, bayLength=120.0, height=120.0, load=-10.0):
+    """
+    Pratt truss with verticals: pinned at L0, roller at L<bays>, load (y) on every interior lower chord node.
+    """
+    return _postedBridge(bays, bayLength, height, load, howe=False)
+
+def howeBridge(bays, bayLength=120.0, height=120.0, load=-10.0):
+    """
+    Howe truss: the Pratt layout with the diagonals mirrored.
+    """
+    return _postedBridge(bays, bayLength, height, load, howe=True)
+
+def _supportEnds(truss, pin, roller):
+    truss.supports[pin]=(True, True, True)
+    truss.supports[roller]=(False, True, False)
+
+def latticeTower(levels, width=48.0, levelHeight=60.0, load=(10.0, -10.0), xBrace=False):
+    """
+    2D lattice tower in the x-y plane: two legs, a horizontal at every level above the base and one diagonal per
+    level alternating in direction (both diagonals if xBrace).  Both base nodes are pinned; load (Fx, Fy) is applied
+    to the two top nodes.
+    """
+    n=int(levels)
+    if n < 1:
+        raise ValueError('a tower needs at least 1 level')
+    lv=np.arange(n+1)
+    xyz=np.zeros((2*(n+1), 3))
+    xyz[0::2, 0]=0.0
+    xyz[1::2, 0]=width
+    xyz[:, 1]=np.repeat(lv*levelHeight, 2)
+    a=2*lv      # left leg rows
+    b=2*lv+1    # right leg rows
+    lo=lv[:-1]
+    links=[np.column_stack((a[:-1], a[1:])), np.column_stack((b[:-1], b[1:])),
+           np.column_stack((a[1:], b[1:]))]
+    if xBrace:
+        links+=[np.column_stack((a[lo], b[lo+1])), np.column_stack((b[lo], a[lo+1]))]
+    else:
+        even=lo%2 == 0
+        links.append(np.where(even[:, None], np.column_stack((a[lo], b[lo+1])), np.column_stack((b[lo], a[lo+1]))))
+    names=['T{}_{}'.format(l, s) for l in lv for s in (0, 1)]
+    truss=_model('Lattice Tower, {} levels'.format(n), names, xyz, np.concatenate(links))
+    truss.supports['T0_0']=(True, True, True)
+    truss.supports['T0_1']=(True, True, True)
+    for s in (0, 1):
+        truss.loads['T{}_{}'.format(n, s)]=list(load)
+    return truss
+
+def latticeTower3D(levels, width=48.0, levelHeight=60.0, load=(10.0, -10.0)):
+    """
+    3D lattice tower rising along y with a square width x width section in x-z: four legs, a ring of horizontals
+    and one plan diagonal at every level above the base, and one diagonal on each face per level.  The four base
+    nodes are pinned; load (Fx, Fy) is applied to the four top nodes.
+    """
+    n=int(levels)
+    if n < 1:
+        raise ValueError('a tower needs at least 1 level')
+    corners=np.array([(0.0, 0.0), (width, 0.0), (width, width), (0.0, width)])
+    lv=np.arange(n+1)
+    xyz=np.zeros((4*(n+1), 3))
+    xyz[:, 0]=np.tile(corners[:, 0], n+1)
+    xyz[:, 1]=np.repeat(lv*levelHeight, 4)
+    xyz[:, 2]=np.tile(corners[:, 1], n+1)
+    def row(l, c):
+        return 4*l+c
+    links=[]
+    for c in range(4):
+        nxt=(c+1)%4
+        links.append(np.column_stack((row(lv[:-1], c), row(lv[1:], c))))       # legs
+        links.append(np.column_stack((row(lv[1:], c), row(lv[1:], nxt))))      # ring
+        links.append(np.column_stack((row(lv[:-1], c), row(lv[1:], nxt))))     # face diagonals
+    links.append(np.column_stack((row(lv[1:], 0), row(lv[1:], 2))))            # plan diagonals
+    names=['T{}_{}'.format(l, c) for l in lv for c in range(4)]
+    truss=_model('3D Lattice Tower, {} levels'.format(n), names, xyz, np.concatenate(links))
+    for c in range(4):
+        truss.supports['T0_{}'.format(c)]=(True, True, True)
+        truss.loads['T{}_{}'.format(n, c)]=list(load)
+    return truss
+
+def roofGrid(bays, bayLength=120.0, height=60.0, load=-10.0):
+    """
+    Square-on-square offset double-layer roof grid, y up: a (bays+1) x (bays+1) top layer at y=height over a
+    bays x bays bottom layer at y=0 centred under the top squares, each bottom node braced to the four top nodes
+    around it.  Top nodes are named G<i>_<k> and bottom nodes B<i>_<k> (i along x, k along z).  The top perimeter
+    rests on rollers (y), with G0_0 pinned and G<bays>_0 also held in z; load (y) on every top node.
+    """
+    n=int(bays)
+    if n < 1:
+        raise ValueError('a roof grid needs at least 1 bay')
+    t=np.arange(n+1)
+    b=np.arange(n)
+    ti, tk=np.meshgrid(t, t, indexing='ij')
+    bi, bk=np.meshgrid(b, b, indexing='ij')
+    top=np.column_stack((ti.ravel()*bayLength, np.full(ti.size, height), tk.ravel()*bayLength))
+    bottom=np.column_stack(((bi.ravel()+0.5)*bayLength, np.zeros(bi.size), (bk.ravel()+0.5)*bayLength))
+    T=(ti*(n+1)+tk)                         # rows of the top nodes
+    B=(n+1)**2+bi*n+bk                      # rows of the bottom nodes
+    links=[np.column_stack((T[:-1, :].ravel(), T[1:, :].ravel())),   # top chords along x
+           np.column_stack((T[:, :-1].ravel(), T[:, 1:].ravel())),   # top chords along z
+           np.column_stack((B[:-1, :].ravel(), B[1:, :].ravel())),   # bottom chords along x
+           np.column_stack((B[:, :-1].ravel(), B[:, 1:].ravel()))]   # bottom chords along z
+    for di in (0, 1):
+        for dk in (0, 1):
+            links.append(np.column_stack((B.ravel(), T[di:n+di, dk:n+dk].ravel())))  # diagonals
+    names=['G{}_{}'.format(i, k) for i in t for k in t]+['B{}_{}'.format(i, k) for i in b for k in b]
+    truss=_model('Roof Grid, {0} x {0} bays'.format(n), names, np.vstack((top, bottom)), np.concatenate(links))
+    for i in t:
+        for k in t:
+            name='G{}_{}'.format(i, k)
+            if i in (0, n) or k in (0, n):
+                truss.supports[name]=(False, True, False)
+            truss.loads[name]=[0.0, load, 0.0]
+    truss.supports['G0_0']=(True, True, True)
+    truss.supports['G{}_0'.format(n)]=(False, True, True)
+    return truss
+
+FAMILIES={'warren': warrenBridge, 'pratt': prattBridge, 'howe': howeBridge, 'tower': latticeTower,
+          'tower3d': latticeTower3D, 'roof': roofGrid}
+
+def _supportType(fix):
+    fix=tuple(fix)+(False,)*(3-len(fix))
+    return {(True, True, True): 'pin', (False, True, False): 'roller', (True, True, False): 'xy',
+            (True, False, True): 'xz', (False, True, True): 'yz', (True, False, False): 'x',
+            (False, False, True): 'z'}.get(fix, 'pin')
+
+def _force(f):
+    """
+    'Fx, Fy' or 'Fx, Fy, Fz' for a load, the z component only when it is non-zero.
+    """
+    st='{}, {}'.format(_num(f[0]), _num(f[1]))
+    return st+', '+_num(f[2]) if len(f) > 2 and f[2] else st
+
+def _num(v):
+    s=repr(float(v))
+    return s[:-2] if s.endswith('.0') else s
+
+def designLines(truss):
+    """
+    Generator for the lines of a text design file.  Nodes with a non-zero z get a third coordinate, and loads with a
+    non-zero Fz a third component.
+    """
+    m=truss.material
+    yield '# generated by Truss_generate.py\n'
+    yield "Title, '{}'\n".format(truss.title or '')
+    if None not in (m.uts, m.ys, m.E):
+        yield 'Material, {}, {}, {}\n'.format(_num(m.uts), _num(m.ys), _num(m.E))
+    if m.staticFactor is not None:
+        yield 'Static_factor, {}\n'.format(_num(m.staticFactor))
+    if truss.memberArea is not None:
+        yield 'Area, {}\n'.format(_num(truss.memberArea))
+    names=[n.name for n in truss.nodes]
+    xyz=truss.nodeCoords()
+    for name, (x, y, z) in zip(names, xyz.tolist()):
+        if z:
+            yield 'node, {}, {}, {}, {}\n'.format(name, _num(x), _num(y), _num(z))
+        else:
+            yield 'node, {}, {}, {}\n'.format(name, _num(x), _num(y))
+    ends=truss.linkNodeIndices()
+    for l, (a, b) in zip(truss.links, ends.tolist()):
+        yield 'link, {}, {}, {}\n'.format(l.name, names[a], names[b])
+    for name, fix in truss.supports.items():
+        yield 'support, {}, {}\n'.format(name, _supportType(fix))
+    for name, f in truss.loads.items():
+        yield 'load, {}, {}\n'.format(name, _force(f))
+    for case, loads in truss.loadCases.items():
+        for name, f in loads.items():
+            yield 'load, {}, {}, {}\n'.format(name, _force(f), case)
+    for name, terms in truss.combinations.items():
+        yield 'combination, {}, {}\n'.format(name, ', '.join('{}, {}'.format(c, _num(f)) for c, f in terms))
+
+def writeDesign(truss, filename):
+    with open(filename, 'w') as f:
+        f.writelines(designLines(truss))
+
+def Main(argv=None):
+    ap=argparse.ArgumentParser(description='Generate parameterized truss design files.')
+    ap.add_argument('family', choices=sorted(FAMILIES))
+    ap.add_argument('size', type=int, help='number of bays (bridges, bays per side for roofs) or levels (towers)')
+    ap.add_argument('-o', '--output', help='output file (default: stdout)')
+    ap.add_argument('--length', type=float, help='bay length (bridges and roofs)')
+    ap.add_argument('--width', type=float, help='tower width')
+    ap.add_argument('--height', type=float, help='truss height (bridges), grid depth (roofs) or level height (towers)')
+    args=ap.parse_args(argv)
+
+    kwargs={}
+    if args.family in ('warren', 'pratt', 'howe', 'roof'):
+        if args.length is not None:
+            kwargs['bayLength']=args.length
+        if args.height is not None:
+            kwargs['height']=args.height
+    else:
+        if args.width is not None:
+            kwargs['width']=args.width
+        if args.height is not None:
+            kwargs['levelHeight']=args.height
+    truss=FAMILIES[args.family](args.size, **kwargs)
+    if args.output:
+        writeDesign(truss, args.output)
+    else:
+        sys.stdout.writelines(designLines(truss))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(Main())
@@ -0,0 +1,66 @@
+"""
+The reference grid scene shared by Truss_stem and the standalone Truss.py.  It needs only Qt, so Truss.py can use it
+without the Truss_core model stack.
+"""
+import math
+from PyQt5 import QtWidgets as qtw
+from PyQt5 import QtCore as qtc
+from PyQt5 import QtGui as qtg
+
+class GridScene(qtw.QGraphicsScene):
+    def __init__(self, parent=None):
+        """
+        A scene that paints its reference grid in drawBackground instead of holding one line item per grid line.
+        Only the exposed part of the background is painted, and the spacing grows in 1-2-5 steps as the view zooms
+        out, so there are never more than a few hundred grid lines on screen and none in the scene index.
+        """
+        super().__init__(parent)
+        self.gridDeltaX = 10.0
+        self.gridDeltaY = 10.0
+        self.gridPen = qtg.QPen()
+        self.gridBrush = None
+        self.gridMinPixels = 8.0  # closest allowed spacing between grid lines on screen
+
+    def setGrid(self, DeltaX=10, DeltaY=10, pen=None, brush=None):
+        self.gridDeltaX = float(DeltaX)
+        self.gridDeltaY = float(DeltaY)
+        if pen is not None:
+            self.gridPen = pen
+        self.gridBrush = brush
+        self.update()
+
+    def gridSpacing(self, delta, scale):
+        """
+        The smallest of delta*(1, 2, 5, 10, 20, 50, ...) that is at least gridMinPixels apart at this scale.
+        """
+        spacing = delta
+        steps = (2.0, 2.5, 2.0)  # 1 -> 2 -> 5 -> 10
+        k = 0
+        while spacing * scale < self.gridMinPixels:
+            spacing *= steps[k % 3]
+            k += 1
+        return spacing
+
+    def drawBackground(self, painter, rect):
+        super().drawBackground(painter, rect)
+        if self.gridBrush is not None:
+            painter.fillRect(rect, self.gridBrush)
+        t = painter.worldTransform()
+        scaleX = math.hypot(t.m11(), t.m12()) or 1.0
+        scaleY = math.hypot(t.m21(), t.m22()) or 1.0
+        dx = self.gridSpacing(self.gridDeltaX, scaleX)
+        dy = self.gridSpacing(self.gridDeltaY, scaleY)
+        left, right, top, bottom = rect.left(), rect.right(), rect.top(), rect.bottom()
+        lines = []
+        x = math.floor(left / dx) * dx
+        while x <= right:
+            lines.append(qtc.QLineF(x, top, x, bottom))
+            x += dx
+        y = math.floor(top / dy) * dy
+        while y <= bottom:
+            lines.append(qtc.QLineF(left, y, right, y))
+            y += dy
+        pen = qtg.QPen(self.gridPen)
+        pen.setCosmetic(True)  # one pixel wide at any zoom
+        painter.setPen(pen)
+        painter.drawLines(lines)
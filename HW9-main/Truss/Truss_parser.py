@@ -0,0 +1,329 @@
+import itertools
+from Truss_core import DEFAULT_CASE, Node, Link, Position
+import Truss_trace as trace
+
+# bump whenever a change here or in TrussModelBuilder can produce a different model from the same file; cached
+# models (Truss_cache) built by another version are then discarded
+PARSER_VERSION=5
+
+class TrussRecord():
+    """
+    One parsed line of a truss design file.
+    kind: 'title', 'material', 'static_factor', 'area', 'node', 'link', 'support', 'load' or 'combination'
+    values: tuple of typed values for that kind (see TrussParser.records)
+    lineNo: 1-based line number in the input
+    """
+    def __init__(self, kind, values, lineNo=0):
+        self.kind=kind
+        self.values=values
+        self.lineNo=lineNo
+
+class Diagnostic():
+    def __init__(self, lineNo, message, line=''):
+        self.lineNo=lineNo
+        self.message=message
+        self.line=line
+
+    def __str__(self):
+        return 'line {}: {}'.format(self.lineNo, self.message)
+
+class TrussParser():
+    """
+    Streaming parser for the text truss format.  records() takes any iterable of lines (an open file works) and
+    yields one TrussRecord per data line, so memory use does not depend on the file size.  Problems are collected
+    in self.diagnostics instead of being printed.
+    """
+    # (fixX, fixY, fixZ).  Plane trusses ignore fixZ, so pin and xy (and roller and y) mean the same for them.
+    supportTypes={'pin': (True, True, True), 'roller': (False, True, False), 'xyz': (True, True, True),
+                  'xy': (True, True, False), 'xz': (True, False, True), 'yz': (False, True, True),
+                  'x': (True, False, False), 'y': (False, True, False), 'z': (False, False, True)}
+
+    def __init__(self, diagnostics=None):
+        self.diagnostics=diagnostics if diagnostics is not None else []
+
+    def records(self, lines):
+        """
+        Yields records with these values:
+        title: (title,)  material: (uts, ys, E)  static_factor: (factor,)  area: (area,)
+        node: (name, x, y, z)  link: (name, node1, node2)  support: (node, fixX, fixY, fixZ)
+        load: (node, Fx, Fy, Fz, case)  combination: (name, ((case, factor), ...))
+        z and Fz are optional in the file and default to 0.  A load line may name its load case in the field after
+        the forces; without one, case is None.  A numeric fifth field is read as Fz, so case names must not be numbers.
+        """
+        lineNo=0
+        count=0
+        try:
+            for lineNo, line in enumerate(lines, 1):
+                line=line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                parts=[part.strip() for part in line.split(',')]
+                if len(parts) < 2:
+                    self.diagnostics.append(Diagnostic(lineNo, 'not enough fields', line))
+                    continue
+                try:
+                    record=self.parseParts(parts, lineNo)
+                except (ValueError, IndexError) as e:
+                    self.diagnostics.append(Diagnostic(lineNo, 'bad value: {}'.format(e), line))
+                    continue
+                if record is None:
+                    self.diagnostics.append(Diagnostic(lineNo, 'unrecognized line', line))
+                    continue
+                count+=1
+                yield record
+        finally:
+            trace.count('lines', lineNo)
+            trace.count('records', count)
+
+    def parseParts(self, parts, lineNo=0):
+        """
+        Converts the comma separated fields of one line to a TrussRecord, or None if the keyword is not known.
+        Keywords are matched the same way ImportFromFile always has (case-insensitive, by substring).
+        """
+        keyword=parts[0].lower()
+        if 'node' in keyword and len(parts) >= 4:
+            z=float(parts[4]) if len(parts) >= 5 and parts[4] else 0.0
+            return TrussRecord('node', (parts[1], float(parts[2]), float(parts[3]), z), lineNo)
+        if 'link' in keyword and len(parts) >= 4:
+            return TrussRecord('link', (parts[1], parts[2], parts[3]), lineNo)
+        if 'title' in keyword:
+            return TrussRecord('title', (parts[1].strip("'"),), lineNo)
+        if 'material' in keyword and len(parts) >= 4:
+            return TrussRecord('material', (float(parts[1]), float(parts[2]), float(parts[3])), lineNo)
+        if 'static_factor' in keyword:
+            return TrussRecord('static_factor', (float(parts[1]),), lineNo)
+        if 'support' in keyword and len(parts) >= 3:
+            fixity=self.supportTypes.get(parts[2].lower())
+            if fixity is None:
+                raise ValueError('unknown support type {}'.format(parts[2]))
+            return TrussRecord('support', (parts[1],)+fixity, lineNo)
+        if keyword == 'load' and len(parts) >= 4:
+            rest=parts[4:]
+            fz=0.0
+            if rest and _isNumber(rest[0]):
+                fz=float(rest.pop(0))
+            case=rest[0] if rest and rest[0] else None
+            return TrussRecord('load', (parts[1], float(parts[2]), float(parts[3]), fz, case), lineNo)
+        if keyword in ('combination', 'combo') and len(parts) >= 4:
+            terms=parts[2:]
+            if len(terms)%2:
+                raise ValueError('combination needs case, factor pairs')
+            return TrussRecord('combination', (parts[1], tuple((terms[i], float(terms[i+1]))
+                                                               for i in range(0, len(terms), 2))), lineNo)
+        if keyword == 'area':
+            return TrussRecord('area', (float(parts[1]),), lineNo)
+        return None
+
+def _isNumber(st):
+    try:
+        float(st)
+    except ValueError:
+        return False
+    return True
+
+def parseFile(filename, parser=None):
+    """
+    Generator over the records of a truss design file, reading it line by line.
+    """
+    parser=parser if parser is not None else TrussParser()
+    with open(filename, 'r') as file:
+        yield from parser.records(file)
+
+class TrussModelBuilder():
+    """
+    Applies parsed records to a TrussModel.  Any object with the same methods (setTitle, setMaterial, ...) can be
+    passed to buildModel instead, so the parser is not tied to TrussModel or the Qt controller.
+
+    Links whose nodes have not been seen yet are held until finish(), since the file format has no required order.
+
+    With mergeTolerance, a node within that distance of an earlier node is not added; its name becomes an alias of
+    the earlier node, so links, supports and loads that use it land on that joint.  Each merge is reported as a
+    Diagnostic and kept in self.merges as (name, merged into, distance).
+
+    Degenerate links (both ends on one node, or on two nodes at the same point) and duplicates of an earlier link
+    between the same two nodes, in either direction, are skipped with a Diagnostic and kept in self.rejectedLinks as
+    (link name, reason).  Duplicates are found with the model's pair index (TrussModel.linkBetween).
+    """
+    def __init__(self, truss, diagnostics=None, mergeTolerance=None):
+        self.truss=truss
+        self.diagnostics=diagnostics if diagnostics is not None else []
+        self.pendingLinks=[]
+        self.combinationLines={}
+        #node name -> line of its first support or load record, for reporting names that are not nodes
+        self.supportLines={}
+        self.loadLines={}
+        self.aliases={}
+        self.merges=[]
+        self.rejectedLinks=[]
+        #node name -> (x, y, z), so zero length links are found without going through the (possibly array-backed)
+        #model's node views
+        self.points={}
+        self.pointHash=None
+        if mergeTolerance:
+            from Truss_spatial import PointHash
+            self.pointHash=PointHash(mergeTolerance)
+        if len(truss.nodes):
+            for node, xyz in zip(truss.nodes, truss.nodeCoords().tolist()):
+                self.points[node.name]=tuple(xyz)
+                if self.pointHash is not None:
+                    self.pointHash.add(node.name, *xyz)
+
+    def setTitle(self, record):
+        self.truss.title=record.values[0]
+
+    def setMaterial(self, record):
+        uts, ys, modulus=record.values
+        self.truss.material.uts=uts
+        self.truss.material.ys=ys
+        self.truss.material.E=modulus
+
+    def setStaticFactor(self, record):
+        self.truss.material.staticFactor=record.values[0]
+
+    def setArea(self, record):
+        self.truss.memberArea=record.values[0]
+
+    def addNode(self, record):
+        name, x, y, z=record.values
+        if self.truss.hasNode(name) or name in self.aliases:
+            self.diagnostics.append(Diagnostic(record.lineNo, 'node {} already exists'.format(name)))
+            return
+        if self.pointHash is not None:
+            hit=self.pointHash.find(x, y, z)
+            if hit is not None:
+                into, distance=hit
+                self.aliases[name]=into
+                self.merges.append((name, into, distance))
+                self.diagnostics.append(Diagnostic(record.lineNo,
+                    'node {} merged into {} ({:g} apart)'.format(name, into, distance)))
+                return
+            self.pointHash.add(name, x, y, z)
+        self.points[name]=(x, y, z)
+        self.truss.addNode(Node(name=name, position=Position(x=x, y=y, z=z)))
+
+    def addLink(self, record):
+        name, node1, node2=record.values
+        node1=self.aliases.get(node1, node1)
+        node2=self.aliases.get(node2, node2)
+        if not self.truss.hasNode(node1) or not self.truss.hasNode(node2):
+            self.pendingLinks.append(record)
+            return
+        reason=self.linkProblem(node1, node2)
+        if reason is not None:
+            self.rejectedLinks.append((name, reason))
+            self.diagnostics.append(Diagnostic(record.lineNo, 'skipping link {}: {}'.format(name, reason)))
+            return
+        self.truss.addLink(Link(name, node1, node2))
+
+    def linkProblem(self, node1, node2):
+        """
+        Why a link between two existing nodes should not be added, or None if it is fine.
+        """
+        if node1 == node2:
+            return 'both ends are node {} (zero length)'.format(node1)
+        if self.points[node1] == self.points[node2]:
+            return 'nodes {} and {} are at the same point (zero length)'.format(node1, node2)
+        i=self.truss.linkBetween(node1, node2)
+        if i is not None:
+            return 'duplicate of link {} between {} and {}'.format(self.truss.links[i].name, node1, node2)
+        return None
+
+    def addSupport(self, record):
+        name, fixX, fixY, fixZ=record.values
+        self.truss.supports[name]=(fixX, fixY, fixZ)
+        self.supportLines.setdefault(name, record.lineNo)
+
+    def addLoad(self, record):
+        name, fx, fy, fz, case=record.values
+        if case is None or case == DEFAULT_CASE:
+            loads=self.truss.loads
+        else:
+            loads=self.truss.loadCases.setdefault(case, {})
+        self.loadLines.setdefault(name, record.lineNo)
+        load=loads.setdefault(name, [0.0, 0.0, 0.0])
+        load[0]+=fx
+        load[1]+=fy
+        load[2]+=fz
+
+    def addCombination(self, record):
+        name, terms=record.values
+        if name in self.truss.combinations:
+            self.diagnostics.append(Diagnostic(record.lineNo, 'combination {} already exists'.format(name)))
+            return
+        self.truss.combinations[name]=list(terms)
+        self.combinationLines[name]=record.lineNo
+
+    def finish(self):
+        pending, self.pendingLinks=self.pendingLinks, []
+        for record in pending:
+            name, node1, node2=record.values
+            node1, node2=self.aliases.get(node1, node1), self.aliases.get(node2, node2)
+            if self.truss.hasNode(node1) and self.truss.hasNode(node2):
+                self.addLink(record)
+            else:
+                self.diagnostics.append(Diagnostic(record.lineNo,
+                    'skipping link {}: node {} or {} not found'.format(name, node1, node2)))
+        for name, terms in list(self.truss.combinations.items()):
+            known=set(self.truss.loadCases) | ({DEFAULT_CASE} if self.truss.loads else set())
+            unknown=[case for case, factor in terms if case not in known]
+            if unknown:
+                self.diagnostics.append(Diagnostic(self.combinationLines.get(name, 0),
+                    'skipping combination {}: unknown load case {}'.format(name, ', '.join(unknown))))
+                del self.truss.combinations[name]
+        if self.aliases:
+            self.moveToAliases()
+        self.dropUnknownNodes()
+        trace.count('nodes', len(self.truss.nodes))
+        trace.count('merged nodes', len(self.merges))
+        trace.count('links', len(self.truss.links))
+        trace.count('rejected links', len(self.rejectedLinks))
+        trace.count('errors', len(self.diagnostics))
+        return self.truss
+
+    def moveToAliases(self):
+        """
+        Moves supports and loads given on merged node names to the node they were merged into.  Fixities are
+        combined and forces added.
+        """
+        supports=self.truss.supports
+        for name, into in self.aliases.items():
+            if name in supports:
+                fix=supports.pop(name)
+                old=supports.get(into, ())
+                supports[into]=tuple(bool(a or b) for a, b in itertools.zip_longest(fix, old, fillvalue=False))
+        for loads in [self.truss.loads]+list(self.truss.loadCases.values()):
+            for name, into in self.aliases.items():
+                if name in loads:
+                    f=loads.pop(name)
+                    total=loads.setdefault(into, [0.0, 0.0, 0.0])
+                    total.extend([0.0]*(len(f)-len(total)))
+                    for i, v in enumerate(f):
+                        total[i]+=v
+
+    def dropUnknownNodes(self):
+        """
+        Removes supports and loads given on names that are not nodes, with a Diagnostic for each, the way links to
+        missing nodes are skipped.  This is done in finish() since supports and loads may come before their nodes.
+        """
+        supports=self.truss.supports
+        for name in [name for name in supports if not self.truss.hasNode(name)]:
+            del supports[name]
+            self.diagnostics.append(Diagnostic(self.supportLines.get(name, 0),
+                'skipping support on {}: node not found'.format(name)))
+        cases=[(DEFAULT_CASE, self.truss.loads)]+list(self.truss.loadCases.items())
+        for case, loads in cases:
+            for name in [name for name in loads if not self.truss.hasNode(name)]:
+                del loads[name]
+                self.diagnostics.append(Diagnostic(self.loadLines.get(name, 0),
+                    'skipping load on {} (case {}): node not found'.format(name, case)))
+
+def buildModel(records, builder):
+    """
+    Feeds a stream of records to a builder and returns builder.finish().
+    """
+    handlers={'title': builder.setTitle, 'material': builder.setMaterial, 'static_factor': builder.setStaticFactor,
+              'area': builder.setArea, 'node': builder.addNode, 'link': builder.addLink,
+              'support': builder.addSupport, 'load': builder.addLoad, 'combination': builder.addCombination}
+    for record in records:
+        handlers[record.kind](record)
+    return builder.finish()
@@ -0,0 +1,247 @@
+"""
+Member sizing and parametric design sweeps.
+
+    python Truss_sizing.py size "Truss Design Input File 1.txt"
+    python Truss_sizing.py sweep --families warren pratt howe --spans 480 720 960 --heights 60 90 120 \
+        --bays 4 6 8 10 --materials steel aluminum --jobs 8 --csv sweep.csv
+
+sizeTruss picks, for every member, the smallest catalog area whose stress stays within ys/staticFactor under the
+loads (the envelope over all load cases and combinations when there are any).  For a statically determinate truss
+the member forces do not depend on the areas and one pass is the minimum weight design; otherwise the analysis is
+repeated with the new areas until they stop changing (a fully stressed design).
+
+A sweep generates candidate designs with Truss_generate, sizes each one in a process pool and returns one row per
+candidate; paretoFront keeps the rows that no other row beats on both weight and max stress ratio.
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from Truss_solver import TrussStiffness, solveLoadCases
+
+# areas in in^2 of the stock the members are cut from
+AREA_CATALOG=(0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5, 0.6, 0.75, 0.9, 1.0, 1.25, 1.5, 1.75, 2.0, 2.5, 3.0, 3.5,
+              4.0, 5.0, 6.0, 7.0, 8.0, 10.0, 12.0, 15.0, 20.0)
+
+# name -> (uts ksi, ys ksi, E Mpsi, static factor, density lb/in^3)
+MATERIALS={
+    'steel': (105.0, 82.0, 30.0, 3.5, 0.284),
+    'a36': (58.0, 36.0, 29.0, 2.0, 0.284),
+    'aluminum': (45.0, 40.0, 10.0, 2.5, 0.098),
+    'titanium': (138.0, 128.0, 16.5, 2.5, 0.160),
+}
+DENSITY=0.284  # steel, lb/in^3, used when none is given
+
+class SizingResult():
+    """
+    Output of sizeTruss, in the order of truss.links.
+    areas: chosen catalog areas
+    demand: largest |force| of each member over the loads considered
+    stressRatio: demand/area divided by the allowable stress ys/staticFactor (<= 1 passes)
+    weight: density * sum(area * length)
+    feasible: False if some member needs more than the largest catalog area
+    """
+    def __init__(self, areas, demand, stressRatio, weight, iterations, converged, feasible):
+        self.areas=areas
+        self.demand=demand
+        self.stressRatio=stressRatio
+        self.weight=weight
+        self.iterations=iterations
+        self.converged=converged
+        self.feasible=feasible
+
+    @property
+    def maxRatio(self):
+        return float(np.nanmax(self.stressRatio)) if len(self.stressRatio) else 0.0
+
+def allowableStress(material):
+    if material.ys is None or material.staticFactor is None:
+        raise ValueError('Material yield strength and static factor are required for sizing')
+    return material.ys/material.staticFactor
+
+def memberDemand(truss, areas):
+    """
+    Largest |axial force| of every member over the default loads and all load cases and combinations.
+    """
+    system=TrussStiffness(truss, areas)
+    if truss.loadCases or truss.combinations:
+        forces=solveLoadCases(truss, system=system).forces
+    else:
+        forces=system.solve(system.loadVector(truss.loads))[2][:, None]
+    return np.nan_to_num(np.abs(forces), nan=0.0).max(axis=1) if forces.shape[1] else np.zeros(len(forces))
+
+def pickAreas(demand, allowable, catalog=AREA_CATALOG):
+    """
+    Smallest catalog area with demand/area <= allowable for each member (the largest area where none is enough).
+    :return: (areas, feasible)
+    """
+    catalog=np.sort(np.asarray(catalog, dtype=np.float64))
+    need=demand/allowable
+    i=np.searchsorted(catalog, need*(1.0-1e-12), side='left')
+    feasible=bool((i < len(catalog)).all())
+    return catalog[np.minimum(i, len(catalog)-1)], feasible
+
+def sizeTruss(truss, catalog=AREA_CATALOG, density=DENSITY, maxIterations=20):
+    """
+    Assigns catalog areas so every member meets ys/staticFactor with the least weight (see the module notes).
+    The truss itself is not changed; pass result.areas to Truss_solver.analyzeTruss to analyze the sized design.
+    """
+    allowable=allowableStress(truss.material)
+    if truss.linkLengths is None or len(truss.linkLengths) != len(truss.links):
+        truss.calcLinkVals()
+    lengths=np.nan_to_num(truss.linkLengths, nan=0.0)
+    areas=np.full(len(truss.links), float(truss.memberArea or 1.0))
+    converged=False
+    iterations=0
+    while iterations < maxIterations:
+        iterations+=1
+        demand=memberDemand(truss, areas)
+        newAreas, feasible=pickAreas(demand, allowable, catalog)
+        if np.array_equal(newAreas, areas):
+            converged=True
+            break
+        areas=newAreas
+    else:
+        # areas from the last pass have not been analyzed yet
+        demand=memberDemand(truss, areas)
+        feasible=bool((demand/areas <= allowable*(1.0+1e-9)).all())
+    ratio=demand/areas/allowable
+    return SizingResult(areas, demand, ratio, float(density*np.dot(areas, lengths)), iterations, converged, feasible)
+
+#region parametric sweep
+FIELDS=('family', 'bays', 'span', 'height', 'material', 'nodes', 'links', 'weight', 'maxRatio', 'feasible',
+        'iterations', 'error', 'seconds')
+
+def candidates(families, spans, heights, bays, materials):
+    """
+    Every combination of the given parameter values, as dicts for evaluateCandidate.
+    """
+    for family, span, height, n, material in itertools.product(families, spans, heights, bays, materials):
+        yield {'family': family, 'span': float(span), 'height': float(height), 'bays': int(n), 'material': material}
+
+def designFor(candidate):
+    """
+    The generated, unsized truss for a candidate.  For towers, span is the width and bays the number of levels.
+    """
+    import Truss_generate
+    family=candidate['family']
+    n=candidate['bays']
+    if family in ('tower', 'tower3d'):
+        truss=Truss_generate.FAMILIES[family](n, width=candidate['span'], levelHeight=candidate['height'])
+    else:
+        truss=Truss_generate.FAMILIES[family](n, bayLength=candidate['span']/n, height=candidate['height'])
+    m=truss.material
+    m.uts, m.ys, m.E, m.staticFactor, density=MATERIALS[candidate['material']]
+    return truss, density
+
+def evaluateCandidate(candidate, catalog=AREA_CATALOG):
+    """
+    Generates and sizes one candidate and returns its row (see FIELDS).  Errors are recorded in the row.
+    """
+    row=dict.fromkeys(FIELDS)
+    row.update(candidate)
+    start=time.perf_counter()
+    try:
+        truss, density=designFor(candidate)
+        result=sizeTruss(truss, catalog, density)
+        row.update(nodes=len(truss.nodes), links=len(truss.links), weight=result.weight, maxRatio=result.maxRatio,
+                   feasible=result.feasible, iterations=result.iterations)
+    except Exception as e:
+        row['error']='{}: {}'.format(type(e).__name__, e)
+        row['feasible']=False
+    row['seconds']=time.perf_counter()-start
+    return row
+
+def runSweep(cands, jobs=None, catalog=AREA_CATALOG):
+    """
+    Evaluates candidates in a process pool and returns the rows in candidate order.
+    """
+    cands=list(cands)
+    work=[(c, catalog) for c in cands]
+    if jobs == 1:
+        return [evaluateCandidate(*w) for w in work]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        chunk=max(1, len(work)//(8*(jobs or os.cpu_count() or 1)))
+        return list(pool.map(_evaluateArgs, work, chunksize=chunk))
+
+def _evaluateArgs(args):
+    return evaluateCandidate(*args)
+
+def paretoFront(rows):
+    """
+    The feasible rows not dominated in (weight, maxRatio), both minimized, sorted by weight.
+    """
+    ok=sorted((r for r in rows if r['feasible'] and r['error'] is None), key=lambda r: (r['weight'], r['maxRatio']))
+    front=[]
+    best=float('inf')
+    for r in ok:
+        if r['maxRatio'] < best:
+            front.append(r)
+            best=r['maxRatio']
+    return front
+#endregion
+
+def _printRows(rows, file=sys.stdout):
+    file.write('{:8s} {:>5s} {:>8s} {:>8s} {:10s} {:>6s} {:>12s} {:>8s}\n'.format(
+        'family', 'bays', 'span', 'height', 'material', 'links', 'weight', 'ratio'))
+    for r in rows:
+        file.write('{:8s} {:5d} {:8.1f} {:8.1f} {:10s} {:6d} {:12.2f} {:8.3f}\n'.format(
+            r['family'], r['bays'], r['span'], r['height'], r['material'], r['links'], r['weight'], r['maxRatio']))
+
+def Main(argv=None):
+    ap=argparse.ArgumentParser(description='Size truss members from a catalog, or sweep design parameters.')
+    sub=ap.add_subparsers(dest='command', required=True)
+    one=sub.add_parser('size', help='size the members of a design file')
+    one.add_argument('file')
+    one.add_argument('--density', type=float, default=DENSITY, help='lb/in^3 (default steel)')
+    sweep=sub.add_parser('sweep', help='size a grid of generated designs and print the Pareto front')
+    sweep.add_argument('--families', nargs='+', default=['warren', 'pratt', 'howe'])
+    sweep.add_argument('--spans', nargs='+', type=float, default=[480.0, 720.0, 960.0])
+    sweep.add_argument('--heights', nargs='+', type=float, default=[60.0, 90.0, 120.0])
+    sweep.add_argument('--bays', nargs='+', type=int, default=[4, 6, 8, 10])
+    sweep.add_argument('--materials', nargs='+', default=['steel', 'aluminum'], choices=sorted(MATERIALS))
+    sweep.add_argument('--jobs', type=int, default=None, help='worker processes (default: CPU count)')
+    sweep.add_argument('--csv', help='write every candidate as CSV')
+    sweep.add_argument('--json', help='write every candidate and the Pareto front as JSON')
+    for p in (one, sweep):
+        p.add_argument('--catalog', help='comma separated areas to choose from (default AREA_CATALOG)')
+    args=ap.parse_args(argv)
+    catalog=tuple(float(a) for a in args.catalog.split(',')) if args.catalog else AREA_CATALOG
+
+    if args.command == 'size':
+        from Truss_batch import loadModel
+        diagnostics=[]
+        truss=loadModel(args.file, diagnostics)
+        result=sizeTruss(truss, catalog, args.density)
+        print('Link\tForce\tArea\tRatio')
+        for l, f, a, r in zip(truss.links, result.demand.tolist(), result.areas.tolist(), result.stressRatio.tolist()):
+            print('{}\t{:0.2f}\t{:g}\t{:0.3f}'.format(l.name, f, a, r))
+        print('weight {:0.2f} lb, max stress ratio {:0.3f}, {} iterations{}'.format(
+            result.weight, result.maxRatio, result.iterations, '' if result.feasible else ', NOT FEASIBLE'))
+        return 0 if result.feasible else 1
+
+    start=time.perf_counter()
+    rows=runSweep(candidates(args.families, args.spans, args.heights, args.bays, args.materials), args.jobs, catalog)
+    wall=time.perf_counter()-start
+    front=paretoFront(rows)
+    print('{} candidates in {:0.2f} s ({:0.0f} per minute), {} feasible, {} on the Pareto front'.format(
+        len(rows), wall, 60*len(rows)/wall if wall else 0, sum(bool(r['feasible']) for r in rows), len(front)))
+    _printRows(front)
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer=csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'wall_s': wall, 'candidates': rows, 'pareto': front}, f, indent=1)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(Main())
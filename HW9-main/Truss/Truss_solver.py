@@ -0,0 +1,250 @@
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+from Truss_arrays import calcLinkGeometry
+import Truss_trace as trace
+
+# bump whenever a change here or in Truss_validate can give different results or diagnostics for the same model;
+# cached analyses (Truss_cache) made by another version are then discarded
+ANALYSIS_VERSION=2
+
+class TrussResults():
+    """
+    Output of solveTruss.  Arrays are in the order of truss.links / truss.nodes.
+    forces: member axial force (+ tension, - compression), nan for members that were not analyzed
+    stresses: forces/area
+    displacements: (n,d) joint displacements, d=2 for a plane truss and 3 for a space truss
+    reactions: (n,d) support reactions (zero at free degrees of freedom)
+    """
+    def __init__(self, forces, stresses, displacements, reactions, areas):
+        self.forces=forces
+        self.stresses=stresses
+        self.displacements=displacements
+        self.reactions=reactions
+        self.areas=areas
+
+def memberStiffness(xyz, ends, E, areas, dim=2):
+    """
+    Computes the axial stiffness E*A/L and direction cosines of every member.
+    :param dim: 2 for a plane truss (x-y), 3 for a space truss
+    :return: (valid mask, k (m,), dirCos (m,dim)).  Members with a missing node or zero length are not valid.
+    """
+    lengths, angles, dirCos=calcLinkGeometry(xyz, ends)
+    valid=np.isfinite(lengths) & (lengths > 0.0)
+    k=np.zeros(len(lengths))
+    k[valid]=E*np.broadcast_to(areas, lengths.shape)[valid]/lengths[valid]
+    return valid, k, dirCos[:, :dim]
+
+def assembleStiffness(nNodes, ends, valid, k, dirCos):
+    """
+    Builds the global d*nNodes square stiffness matrix in compressed sparse column form, d being the number of
+    direction cosine columns (2 or 3).  Each member contributes a 2d x 2d block k*[cc^T, -cc^T; -cc^T, cc^T] and the
+    blocks are summed by the COO->CSC conversion.
+    """
+    d=dirCos.shape[1]
+    e=ends[valid].astype(np.int64)
+    c=dirCos[valid]
+    kv=k[valid]
+    axes=np.arange(d)
+    dofs=np.concatenate((d*e[:, :1]+axes, d*e[:, 1:]+axes), axis=1)  # (m,2d)
+    cc=np.concatenate((c, -c), axis=1)  # (m,2d)
+    blocks=kv[:, None, None]*cc[:, :, None]*cc[:, None, :]  # (m,2d,2d)
+    rows=np.repeat(dofs, 2*d, axis=1).ravel()
+    cols=np.tile(dofs, (1, 2*d)).ravel()
+    nDof=d*nNodes
+    return sp.coo_matrix((blocks.ravel(), (rows, cols)), shape=(nDof, nDof)).tocsc()
+
+class TrussStiffness():
+    """
+    The assembled and factorized stiffness of a truss.  Building it is the expensive part of an analysis; solve()
+    then handles any number of load vectors with the same factorization.  Space trusses (truss.dimension() == 3)
+    have three degrees of freedom per node, plane trusses two; dim holds which.
+    """
+    def __init__(self, truss, areas=None, modulusScale=1000.0):
+        """
+        :param truss: TrussModel with supports
+        :param areas: member areas, scalar or (m,) array; defaults to truss.memberArea
+        :param modulusScale: E is given in Mpsi and is multiplied by modulusScale to ksi
+        """
+        if truss.material.E is None:
+            raise ValueError("Material modulus E is required for analysis")
+        if areas is None:
+            areas=truss.memberArea
+        self.areas=np.array(np.broadcast_to(np.asarray(areas, dtype=np.float64), (len(truss.links),)))
+        xyz=truss.nodeCoords()
+        self.ends=truss.linkNodeIndices()
+        self.nNodes=len(xyz)
+        self.dim=truss.dimension()
+        E=truss.material.E*modulusScale
+
+        with trace.span('solve.assemble', dim=self.dim):
+            self.valid, self.k, self.dirCos=memberStiffness(xyz, self.ends, E, self.areas, self.dim)
+            self.K=assembleStiffness(self.nNodes, self.ends, self.valid, self.k, self.dirCos)
+
+        self.rowOf=truss.nodeRows()
+        d=self.dim
+        self.fixed=np.zeros(d*self.nNodes, dtype=bool)
+        for name, fix in truss.supports.items():
+            i=self.rowOf.get(name)
+            if i is None:  # not a node of this truss (TrussModelBuilder reports these)
+                continue
+            self.fixed[d*i:d*i+min(d, len(fix))]=fix[:d]
+        self.free=np.flatnonzero(~self.fixed)
+
+        self.lu=None
+        if len(self.free) > 0:
+            Kff=self.K[self.free][:, self.free].tocsc()
+            try:
+                with trace.span('solve.factorize', dofs=len(self.free)):
+                    # K is symmetric, so order by minimum degree on its structure; on roof grids and other space frames
+                    # this gives much less fill than the default COLAMD ordering
+                    self.lu=spla.splu(Kff, permc_spec='MMD_AT_PLUS_A')
+            except RuntimeError:
+                raise ValueError("Stiffness matrix is singular: the truss is unstable or not adequately supported")
+
+    def loadVector(self, loads):
+        """
+        The dim*n load vector of a node name -> [Fx, Fy(, Fz)] dict.  Plane trusses ignore Fz, and loads on names that
+        are not nodes of the truss are ignored.
+        """
+        d=self.dim
+        F=np.zeros(d*self.nNodes)
+        for name, f in loads.items():
+            i=self.rowOf.get(name)
+            if i is None:
+                continue
+            n=min(d, len(f))
+            F[d*i:d*i+n]+=f[:n]
+        return F
+
+    def solve(self, F):
+        """
+        Solves for one (dim*n,) or several (dim*n,k) load vectors at once.
+        :return: (displacements, reactions, forces) shaped (dim*n[,k]), (dim*n[,k]), (m[,k])
+        """
+        u=np.zeros(F.shape)
+        if self.lu is not None:
+            u[self.free]=self.lu.solve(np.ascontiguousarray(F[self.free]))
+        reactions=self.K@u-F
+        reactions[~self.fixed]=0.0
+
+        e=np.where(self.valid[:, None], self.ends, 0)
+        shape=(-1,)+(1,)*(F.ndim-1)
+        # axial elongation of each member: direction cosines dotted with the end displacement difference
+        du=0.0
+        for axis in range(self.dim):
+            ua=u[axis::self.dim]
+            du=du+self.dirCos[:, axis].reshape(shape)*(ua[e[:, 1]]-ua[e[:, 0]])
+        k=self.k.reshape(shape)
+        valid=self.valid.reshape((-1,)+(1,)*(F.ndim-1))
+        forces=np.where(valid, k*du, np.nan)
+        return u, reactions, forces
+
+    def results(self, F):
+        """
+        TrussResults for one load vector.
+        """
+        u, reactions, forces=self.solve(F)
+        return TrussResults(forces, forces/self.areas, u.reshape(-1, self.dim), reactions.reshape(-1, self.dim),
+                            self.areas)
+
+def solveTruss(truss, areas=None, modulusScale=1000.0):
+    """
+    Direct stiffness analysis of a pin-jointed plane or space truss under truss.loads.  Units follow the input file: E is
+    given in Mpsi and is multiplied by modulusScale to ksi, so loads in kips, lengths in inches and areas in in^2 give
+    stresses in ksi.
+    :param truss: TrussModel with supports and loads
+    :param areas: member areas, scalar or (m,) array; defaults to truss.memberArea
+    :return: TrussResults
+    """
+    with trace.span('solve', nodes=len(truss.nodes), links=len(truss.links)):
+        system=TrussStiffness(truss, areas, modulusScale)
+        return system.results(system.loadVector(truss.loads))
+
+class LoadCaseResults():
+    """
+    Output of solveLoadCases.  Column j of each array belongs to names[j], which is a load case or a combination
+    (kinds[j] is 'case' or 'combination').
+    forces, stresses: (m,k) member forces and stresses
+    displacements, reactions: (n,d,k), d=2 for a plane truss and 3 for a space truss
+    """
+    def __init__(self, names, kinds, forces, stresses, displacements, reactions):
+        self.names=names
+        self.kinds=kinds
+        self.forces=forces
+        self.stresses=stresses
+        self.displacements=displacements
+        self.reactions=reactions
+
+    def column(self, name):
+        return self.names.index(name)
+
+    def envelope(self):
+        """
+        Extreme member forces over all cases and combinations.
+        :return: (max tension (m,), its column, max compression (m,), its column).  A member never in tension has a
+        max tension of 0 (column -1), and likewise for compression.
+        """
+        f=np.nan_to_num(self.forces, nan=0.0)
+        if f.shape[1] == 0:
+            zero=np.zeros(len(f))
+            return zero, np.full(len(f), -1), zero, np.full(len(f), -1)
+        iT=np.argmax(f, axis=1)
+        iC=np.argmin(f, axis=1)
+        rows=np.arange(len(f))
+        # forces within round-off of zero (e.g. zero-force members) count as neither tension nor compression
+        tol=1e-9*max(float(np.abs(f).max()), 1.0)
+        tension=np.where(f[rows, iT] > tol, f[rows, iT], 0.0)
+        compression=np.where(f[rows, iC] < -tol, f[rows, iC], 0.0)
+        return tension, np.where(tension > 0.0, iT, -1), compression, np.where(compression < 0.0, iC, -1)
+
+def solveLoadCases(truss, areas=None, modulusScale=1000.0, system=None):
+    """
+    Analyzes every load case of the truss with one factorization of the stiffness matrix, solving the cases as the
+    columns of a single right-hand side.  Combinations are factored sums of the case results (the analysis is
+    linear), so they cost no further solves.  The unnamed loads (truss.loads) are the case DEFAULT_CASE.
+    :param system: TrussStiffness to reuse, e.g. from an earlier solve of the same model
+    :return: LoadCaseResults with the cases (in input order, DEFAULT_CASE first if it has loads) then the combinations
+    """
+    from Truss_core import DEFAULT_CASE
+    with trace.span('solve.cases', cases=len(truss.loadCases), combinations=len(truss.combinations)):
+        if system is None:
+            system=TrussStiffness(truss, areas, modulusScale)
+        cases={DEFAULT_CASE: truss.loads} if truss.loads else {}
+        cases.update(truss.loadCases)
+        names=list(cases)
+        F=np.column_stack([system.loadVector(cases[name]) for name in names]) if names else \
+            np.zeros((system.dim*system.nNodes, 0))
+        u, reactions, forces=system.solve(F)
+
+        factors=np.zeros((len(names), len(truss.combinations)))
+        for j, terms in enumerate(truss.combinations.values()):
+            for case, factor in terms:
+                if case not in cases:
+                    raise ValueError("combination uses unknown load case {}".format(case))
+                factors[names.index(case), j]+=factor
+        u=np.concatenate((u, u@factors), axis=1)
+        reactions=np.concatenate((reactions, reactions@factors), axis=1)
+        forces=np.concatenate((forces, forces@factors), axis=1)
+
+        kinds=['case']*len(names)+['combination']*len(truss.combinations)
+        names=names+list(truss.combinations)
+        return LoadCaseResults(names, kinds, forces, forces/system.areas[:, None],
+                               u.reshape(-1, system.dim, len(names)), reactions.reshape(-1, system.dim, len(names)))
+
+def analyzeTruss(truss, areas=None, modulusScale=1000.0):
+    """
+    Sets truss.results (for truss.loads) and, when the truss has load cases or combinations, truss.caseResults,
+    factorizing the stiffness matrix only once for both.  A truss whose loads are all in named cases has no default
+    load, so truss.results is left None rather than holding an all-zero solution.
+    """
+    with trace.span('solve', nodes=len(truss.nodes), links=len(truss.links)):
+        system=TrussStiffness(truss, areas, modulusScale)
+        hasCases=bool(truss.loadCases or truss.combinations)
+        truss.results=None
+        if truss.loads or not hasCases:
+            truss.results=system.results(system.loadVector(truss.loads))
+        truss.caseResults=None
+        if truss.loadCases or truss.combinations:
+            truss.caseResults=solveLoadCases(truss, system=system)
+    return truss.results
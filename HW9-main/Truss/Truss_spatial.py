@@ -0,0 +1,186 @@
+import math
+import numpy as np
+
+class SpatialIndex():
+    """
+    Uniform grid over the x-y plane for hit-testing nodes and links.  Every node is bucketed by the cell it falls in
+    and every link by each cell its bounding box covers; the (cell key, item) pairs are kept sorted by key so the
+    items of a run of cells in one grid column are a single slice found with searchsorted.  Links whose bounding box
+    would cover more than maxLinkCells cells are kept in a short list that every query checks directly.
+    """
+    def __init__(self, xy, ends, cellSize=None, maxLinkCells=64):
+        """
+        :param xy: (n,2) node coordinates
+        :param ends: (m,2) node rows of each link, -1 for a missing node
+        :param cellSize: grid cell size; by default the median link length (or a size giving ~1 node per cell)
+        """
+        self.xy=np.ascontiguousarray(xy[:, :2], dtype=np.float64)
+        ends=np.asarray(ends)
+        valid=(ends >= 0).all(axis=1)
+        self.linkRows=np.flatnonzero(valid)
+        self.p1=self.xy[ends[valid, 0]]
+        self.p2=self.xy[ends[valid, 1]]
+
+        if len(self.xy) == 0:
+            self.origin=np.zeros(2)
+            self.cellSize=1.0
+            self.shape=(1, 1)
+        else:
+            lo=self.xy.min(axis=0)
+            hi=self.xy.max(axis=0)
+            if cellSize is None:
+                lengths=np.hypot(*(self.p2-self.p1).T)
+                lengths=lengths[lengths > 0]
+                if len(lengths):
+                    cellSize=float(np.median(lengths))
+                else:
+                    span=max(hi-lo)
+                    cellSize=span/max(np.sqrt(len(self.xy)), 1.0) if span > 0 else 1.0
+            self.cellSize=float(cellSize)
+            self.origin=lo
+            self.shape=tuple(int(v) for v in np.floor((hi-lo)/self.cellSize)+1)
+
+        cx, cy=self._cells(self.xy)
+        self.nodeKeys, self.nodeOrder=self._sorted(cx*self.shape[1]+cy, np.arange(len(self.xy)))
+
+        lo1=np.minimum(self.p1, self.p2)
+        hi1=np.maximum(self.p1, self.p2)
+        x0, y0=self._cells(lo1)
+        x1, y1=self._cells(hi1)
+        nx=x1-x0+1
+        ny=y1-y0+1
+        count=nx*ny
+        big=count > maxLinkCells
+        self.bigLinks=np.flatnonzero(big)
+        small=np.flatnonzero(~big)
+        reps=count[small]
+        item=np.repeat(small, reps)
+        # position of each (link, cell) pair within its link's bounding box of cells
+        k=np.arange(len(item))-np.repeat(np.cumsum(reps)-reps, reps)
+        kx=x0[item]+k//ny[item]
+        ky=y0[item]+k%ny[item]
+        self.linkKeys, self.linkOrder=self._sorted(kx*self.shape[1]+ky, item)
+
+    def _cells(self, pts):
+        c=np.floor((pts-self.origin)/self.cellSize).astype(np.int64)
+        return np.clip(c[:, 0], 0, self.shape[0]-1), np.clip(c[:, 1], 0, self.shape[1]-1)
+
+    @staticmethod
+    def _sorted(keys, items):
+        order=np.argsort(keys, kind='stable')
+        return keys[order], items[order]
+
+    def _gather(self, keys, items, xmin, ymin, xmax, ymax):
+        """
+        Items bucketed in any cell that overlaps the rectangle (possibly with repeats).
+        """
+        lo=np.floor((np.array((xmin, ymin))-self.origin)/self.cellSize).astype(np.int64)
+        hi=np.floor((np.array((xmax, ymax))-self.origin)/self.cellSize).astype(np.int64)
+        if (hi < 0).any() or lo[0] >= self.shape[0] or lo[1] >= self.shape[1]:
+            return items[:0]
+        lo=np.maximum(lo, 0)
+        hi=np.minimum(hi, np.array(self.shape)-1)
+        columns=np.arange(lo[0], hi[0]+1)
+        starts=np.searchsorted(keys, columns*self.shape[1]+lo[1], side='left')
+        stops=np.searchsorted(keys, columns*self.shape[1]+hi[1], side='right')
+        if len(columns) == 1:
+            return items[starts[0]:stops[0]]
+        return np.concatenate([items[a:b] for a, b in zip(starts.tolist(), stops.tolist()) if b > a] or [items[:0]])
+
+    def nearestNode(self, x, y, radius):
+        """
+        Row of the node nearest to (x, y) within radius, or None.
+        """
+        cand=self._gather(self.nodeKeys, self.nodeOrder, x-radius, y-radius, x+radius, y+radius)
+        if len(cand) == 0:
+            return None
+        d=np.hypot(self.xy[cand, 0]-x, self.xy[cand, 1]-y)
+        i=int(np.argmin(d))
+        return int(cand[i]) if d[i] <= radius else None
+
+    def nodesInRect(self, xmin, ymin, xmax, ymax):
+        cand=self._gather(self.nodeKeys, self.nodeOrder, xmin, ymin, xmax, ymax)
+        p=self.xy[cand]
+        inside=(p[:, 0] >= xmin) & (p[:, 0] <= xmax) & (p[:, 1] >= ymin) & (p[:, 1] <= ymax)
+        return np.sort(cand[inside])
+
+    def _linkCandidates(self, xmin, ymin, xmax, ymax):
+        cand=self._gather(self.linkKeys, self.linkOrder, xmin, ymin, xmax, ymax)
+        return np.unique(np.concatenate((cand, self.bigLinks)))
+
+    def linksInRect(self, xmin, ymin, xmax, ymax):
+        """
+        Rows (in the model's link list) of the links that cross or lie inside the rectangle.
+        """
+        cand=self._linkCandidates(xmin, ymin, xmax, ymax)
+        p1=self.p1[cand]
+        d=self.p2[cand]-p1
+        # Liang-Barsky clipping of each segment against the rectangle
+        t0=np.zeros(len(cand))
+        t1=np.ones(len(cand))
+        keep=np.ones(len(cand), dtype=bool)
+        for p, q in ((-d[:, 0], p1[:, 0]-xmin), (d[:, 0], xmax-p1[:, 0]),
+                     (-d[:, 1], p1[:, 1]-ymin), (d[:, 1], ymax-p1[:, 1])):
+            parallel=p == 0
+            keep&=~(parallel & (q < 0))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                r=q/p
+            t0=np.where(~parallel & (p < 0), np.maximum(t0, r), t0)
+            t1=np.where(~parallel & (p > 0), np.minimum(t1, r), t1)
+        keep&=t0 <= t1
+        return self.linkRows[cand[keep]]
+
+    def linksNear(self, x, y, radius):
+        """
+        Rows of the links within radius of (x, y), nearest first.
+        """
+        cand=self._linkCandidates(x-radius, y-radius, x+radius, y+radius)
+        p1=self.p1[cand]
+        d=self.p2[cand]-p1
+        rel=np.array((x, y))-p1
+        dd=np.einsum('ij,ij->i', d, d)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t=np.clip(np.where(dd > 0, np.einsum('ij,ij->i', rel, d)/dd, 0.0), 0.0, 1.0)
+        dist=np.hypot(*(rel-t[:, None]*d).T)
+        near=dist <= radius
+        order=np.argsort(dist[near], kind='stable')
+        return self.linkRows[cand[near][order]]
+
+class PointHash():
+    """
+    Spatial hash of 3D points for merging coincident nodes while a file is read.  Points are kept in a dict keyed
+    by their cell on a grid of spacing 2*tolerance, so the points within tolerance of a new one lie in the cells
+    overlapping a cube of side 2*tolerance around it: one cell per axis unless the cube straddles a cell boundary,
+    and never more than 8 cells.  Each lookup therefore takes constant time.
+    """
+    def __init__(self, tolerance):
+        if not tolerance > 0:
+            raise ValueError('merge tolerance must be positive')
+        self.tolerance=float(tolerance)
+        self.cellSize=2.0*self.tolerance
+        self.cells={}
+
+    def _span(self, v):
+        c=self.cellSize
+        lo=math.floor((v-self.tolerance)/c)
+        hi=math.floor((v+self.tolerance)/c)
+        return (lo,) if lo == hi else (lo, hi)
+
+    def find(self, x, y, z):
+        """
+        The (item, distance) of the nearest point within tolerance of (x, y, z), or None.
+        """
+        best=None
+        cells=self.cells
+        for i in self._span(x):
+            for j in self._span(y):
+                for k in self._span(z):
+                    for item, px, py, pz in cells.get((i, j, k), ()):
+                        d=math.sqrt((px-x)**2+(py-y)**2+(pz-z)**2)
+                        if d <= self.tolerance and (best is None or d < best[1]):
+                            best=(item, d)
+        return best
+
+    def add(self, item, x, y, z):
+        c=self.cellSize
+        self.cells.setdefault((math.floor(x/c), math.floor(y/c), math.floor(z/c)), []).append((item, x, y, z))
@@ -1,290 +1,22 @@
+import itertools
 import math
+import numpy as np
 from PyQt5 import QtWidgets as qtw
 from PyQt5 import QtCore as qtc
 from PyQt5 import QtGui as qtg
-
-class Position:
-    def __init__(self, x=0.0, y=0.0, z=0.0):
-        self.x = float(x)
-        self.y = float(y)
-        self.z = float(z)
-
-    def __eq__(self, other):
-        return (self.x == other.x) and (self.y == other.y) and (self.z == other.z)
-
-    def __add__(self, other):
-        return Position(self.x + other.x, self.y + other.y, self.z + other.z)
-
-    def __iadd__(self, other):
-        self.x += other.x
-        self.y += other.y
-        self.z += other.z
-        return self
-
-    def __sub__(self, other):
-        return Position(self.x - other.x, self.y - other.y, self.z - other.z)
-
-    def __isub__(self, other):
-        self.x -= other.x
-        self.y -= other.y
-        self.z -= other.z
-        return self
-
-    def __mul__(self, scalar):
-        return Position(self.x * scalar, self.y * scalar, self.z * scalar)
-
-    def __rmul__(self, scalar):
-        return self.__mul__(scalar)
-
-    def __imul__(self, scalar):
-        self.x *= scalar
-        self.y *= scalar
-        self.z *= scalar
-        return self
-
-    def __truediv__(self, scalar):
-        return Position(self.x / scalar, self.y / scalar, self.z / scalar)
-
-    def __idiv__(self, scalar):
-        self.x /= scalar
-        self.y /= scalar
-        self.z /= scalar
-        return self
-
-    def set(self, strXYZ=None, tupXYZ=None):
-        if strXYZ:
-            parts = strXYZ.replace('(', '').replace(')', '').split(',')
-            self.x, self.y, self.z = map(float, parts)
-        elif tupXYZ:
-            self.x, self.y, self.z = tupXYZ
-
-    def get_tuple(self):
-        return (self.x, self.y, self.z)
-
-    def get_str(self, n_places=3):
-        return "{}, {}, {}".format(round(self.x, n_places), round(self.y, n_places), round(self.z, n_places))
-
-    def magnitude(self):
-        return math.sqrt(self.x ** 2 + self.y ** 2 + self.z ** 2)
-
-    def normalize(self):
-        mag = self.magnitude()
-        if mag > 0:
-            self.x /= mag
-            self.y /= mag
-            self.z /= mag
-
-    def get_angle_rad(self):
-        if self.magnitude() == 0:
-            return 0
-        return math.atan2(self.y, self.x)
-
-    def get_angle_deg(self):
-        return math.degrees(self.get_angle_rad())
-class Material():
-    def __init__(self, uts=None, ys=None, modulus=None, staticFactor=None):
-        self.uts = uts
-        self.ys = ys
-        self.E=modulus
-        self.staticFactor=staticFactor
-
-class Node():
-    def __init__(self, name=None, position=None):
-        self.name = name
-        self.position = position if position is not None else Position()
-
-    def __eq__(self, other):
-        """
-        This overloads the == operator such that I can compare two nodes to see if they are the same node.  This is
-        useful when reading in nodes to make sure I don't get duplicate nodes
-        """
-        if self.name != other.name:
-            return False
-        if self.position != other.position:
-            return False
-        return True
-
-class Link():
-    def __init__(self,name="", node1="1", node2="2", length=None, angleRad=None):
-        """
-        Basic definition of a link contains a name and names of node1 and node2
-        """
-        self.name=""
-        self.node1_Name=node1
-        self.node2_Name=node2
-        self.length=None
-        self.angleRad=None
-
-    def __eq__(self, other):
-        """
-        This overloads the == operator for comparing equivalence of two links.
-        """
-        if self.node1_Name != other.node1_Name: return False
-        if self.node2_Name != other.node2_Name: return False
-        if self.length != other.length: return False
-        if self.angleRad != other.angleRad: return False
-        return True
-
-    def set(self, node1=None, node2=None, length=None, angleRad=None):
-        self.node1_Name=node1
-        self.node2_Name=node2
-        self.length=length
-        self.angleRad=angleRad
-
-class TrussModel():
-    def __init__(self):
-        self.title=None
-        self.links=[]
-        self.nodes=[]
-        self.material=Material()
-
-    def getNode(self, name):
-       for n in self.nodes:
-           if n.name == name:
-               return n
-
-class TrussController():
-    def __init__(self):
-        self.truss=TrussModel()
-        self.view=TrussView()
-
-    def ImportFromFile(self, data):
-        """
-        Data is the list of strings read from the data file.
-        We need to parse this file and build the lists of nodes and links that make up the truss.
-        Also, we need to parse the lines that give the truss title, material (and strength values).
-
-        Reading Nodes:
-        I create a new node object and the set its name and position.x and position.y values.  Next, I check to see
-        if the list of nodes in the truss model has this node with self.hasNode(n.name).  If the trussModel does not
-        contain the node, I append it to the list of nodes
-
-        Reading Links:
-        The links should come after the nodes.  Each link has a name and two node names.  See method addLink
-        """
-        for line in data:
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue  # Skip comments and empty lines
-
-            # Debug output to understand the exact content of 'parts' after splitting
-            print("Original line:", line)
-
-            try:
-                # Using split with a comma and stripping each part to handle spaces
-                parts = [part.strip() for part in line.split(',')]
-                print("Parsed parts:", parts)  # Debug output
-
-                if len(parts) < 2:
-                    print("Skipped line: not enough parts")
-                    continue
-
-                keyword = parts[0].lower()
-                if 'node' in keyword and len(parts) >= 4:
-                    self.process_node(parts)
-                elif 'link' in keyword and len(parts) >= 4:
-                    self.process_link(parts)
-                elif 'title' in keyword:
-                    self.truss.title = parts[1].strip().strip("'")
-                elif 'material' in keyword and len(parts) >= 4:
-                    self.process_material(parts)
-                elif 'static_factor' in keyword:
-                    self.truss.material.staticFactor = float(parts[1])
-            except Exception as e:
-                print(f"Error processing line: {line}. Error: {e}")
-                continue  # Skip lines that cause errors
-
-        self.calcLinkVals()
-        self.displayReport()
-        self.drawTruss()
-
-    def process_node(self, parts):
-        """
-        Process node data from input parts.
-        """
-        try:
-            name = parts[1]
-            x, y = float(parts[2]), float(parts[3])
-            if not self.hasNode(name):
-                node_position = Position(x=x, y=y)
-                new_node = Node(name=name, position=node_position)
-                self.addNode(new_node)
-            else:
-                print(f"Node {name} already exists.")
-        except ValueError as e:
-            print(f"Error processing node data {parts}: {e}")
-        except IndexError as e:
-            print(f"Error processing line, missing data {parts}: {e}")
-
-    def process_link(self, parts):
-        """
-        Process link data from input parts.
-        """
-        name, node1, node2 = parts[1], parts[2], parts[3]
-        if not self.hasNode(node1) or not self.hasNode(node2):
-            print(f"Skipping link {name}: Node {node1} or {node2} not found.")
-            return
-        self.addLink(Link(name, node1, node2))
-
-    def process_material(self, parts):
-        """
-        Process material data from input parts.
-        """
-        try:
-            uts, ys, modulus = float(parts[1]), float(parts[2]), float(parts[3])
-            self.truss.material = Material(uts, ys, modulus)
-        except ValueError as e:
-            print(f"Error processing material data: {e}")
-
-    def hasNode(self, name):
-        for n in self.truss.nodes:
-            if n.name==name:
-                return True
-        return False
-
-    def addNode(self, node):
-        self.truss.nodes.append(node)
-
-    def getNode(self, name):
-        for n in self.truss.nodes:
-            if n.name == name:
-                return n
-
-    def addLink(self, link):
-        self.truss.links.append(link)
-
-    def calcLinkVals(self):
-        print("Starting calcLinkVals")
-        try:
-            for l in self.truss.links:
-                print("Processing link:", l.name)
-                n1 = self.truss.getNode(l.node1_Name)
-                n2 = self.truss.getNode(l.node2_Name)
-                if n1 is None or n2 is None:
-                    print("Error: One of the nodes in the link is None")
-                    continue
-                # Assuming Position has x, y attributes
-                dx = n2.position.x - n1.position.x
-                dy = n2.position.y - n1.position.y
-                l.length = math.sqrt(dx ** 2 + dy ** 2)
-                if dx == 0 and dy == 0:
-                    l.angleRad = 0
-                else:
-                    l.angleRad = math.atan2(dy, dx)
-                print(f"Link {l.name}: length = {l.length}, angle = {l.angleRad}")
-        except Exception as e:
-            print("Exception in calcLinkVals:", e)
-        print("Finished calcLinkVals")
-
-    def setDisplayWidgets(self, args):
-        self.view.setDisplayWidgets(args)
-
-    def displayReport(self):
-        self.view.displayReport(truss=self.truss)
-
-    def drawTruss(self):
-        self.view.buildScene(truss=self.truss)
-
+# the model and controller live in the Qt-free Truss_core; they are re-exported here for existing imports
+from Truss_core import Position, Material, Node, Link, TrussModel, TrussController, LoadCancelled
+from Truss_grid import GridScene
+import Truss_trace as trace
+
+# orthographic projections for TrussView: columns are the scene x and y directions in model coordinates (y up)
+PROJECTIONS = {
+    'front': np.array([[1.0, 0.0], [0.0, 1.0], [0.0, 0.0]]),            # x-y plane
+    'top': np.array([[1.0, 0.0], [0.0, 0.0], [0.0, 1.0]]),              # x-z plane
+    'side': np.array([[0.0, 0.0], [0.0, 1.0], [1.0, 0.0]]),             # z-y plane
+    'isometric': np.column_stack((np.array([1.0, 0.0, -1.0]) / math.sqrt(2.0),
+                                  np.array([-1.0, 2.0, -1.0]) / math.sqrt(6.0))),
+}
 
 class RigidLink(qtw.QGraphicsItem):
     def __init__(self, stX, stY, enX, enY, radius=10, parent = None, pen=None, brush=None):
@@ -465,16 +197,285 @@ class ArcItem(qtw.QGraphicsItem):
         painter.drawPath(path)
 
 
+class LinkBatchItem(qtw.QGraphicsItem):
+    def __init__(self, xy1, xy2, pen=None, tipFunction=None, hitFunction=None, lines=None, parent=None):
+        """
+        Draws every link of a large truss as one item with a single painter.drawLines call, instead of one
+        QGraphicsLineItem per link.  Tool tips are found by hit-testing the hovered point against the segments.
+        :param xy1: (m,2) start points of the links (rows with nan are not drawn)
+        :param xy2: (m,2) end points
+        :param pen: pen for the links
+        :param tipFunction: function of the link row that returns the tool tip string
+        :param hitFunction: function (x, y, tolerance) -> link row or None, e.g. backed by the model's spatial index.
+        Without one, every segment is tested.
+        :param lines: the result of makeLines(xy1, xy2) if it was already built
+        """
+        super().__init__(parent)
+        self.pen = pen if pen is not None else qtg.QPen()
+        self.tipFunction = tipFunction
+        self.hitFunction = hitFunction
+        self.setAcceptHoverEvents(True)
+        self.setLines(xy1, xy2, lines)
+
+    @staticmethod
+    def makeLines(xy1, xy2):
+        """
+        The QLineF list drawn for the given end points.  QLineF is a plain value type, so this may run on a worker
+        thread and the result be passed to setLines.
+        """
+        return [qtc.QLineF(x1, y1, x2, y2) for (x1, y1), (x2, y2) in zip(np.asarray(xy1).tolist(),
+                                                                         np.asarray(xy2).tolist())
+                if x1 == x1 and x2 == x2]
+
+    def setLines(self, xy1, xy2, lines=None):
+        self.prepareGeometryChange()
+        self.xy1 = np.array(xy1, dtype=np.float64)
+        self.xy2 = np.array(xy2, dtype=np.float64)
+        self.lines = lines if lines is not None else self.makeLines(self.xy1, self.xy2)
+        self.rect = self._bounds()
+
+    def moveLines(self, rows, xy1, xy2):
+        """
+        Updates the end points of the given link rows in place.
+        """
+        self.xy1[rows] = xy1
+        self.xy2[rows] = xy2
+        if np.isnan(self.xy1).any() or np.isnan(self.xy2).any():
+            self.setLines(self.xy1, self.xy2)
+            return
+        for i, (x1, y1), (x2, y2) in zip(np.atleast_1d(rows).tolist(), np.atleast_2d(xy1).tolist(),
+                                         np.atleast_2d(xy2).tolist()):
+            self.lines[i] = qtc.QLineF(x1, y1, x2, y2)
+        rect = self._bounds()
+        if rect != self.rect:
+            self.prepareGeometryChange()
+            self.rect = rect
+        self.update()
+
+    def count(self):
+        return len(self.xy1)
+
+    def _bounds(self):
+        pts = np.concatenate((self.xy1, self.xy2))
+        pts = pts[~np.isnan(pts).any(axis=1)]
+        if len(pts) == 0:
+            return qtc.QRectF()
+        (left, top), (right, bottom) = pts.min(axis=0), pts.max(axis=0)
+        pad = self.pen.widthF()
+        return qtc.QRectF(left - pad, top - pad, right - left + 2 * pad, bottom - top + 2 * pad)
+
+    def boundingRect(self):
+        return self.rect
+
+    def paint(self, painter, option, widget=None):
+        painter.setPen(self.pen)
+        painter.drawLines(self.lines)
+
+    def linkAt(self, x, y, tolerance):
+        """
+        Returns the row of the link closest to (x, y) within tolerance, or None.
+        """
+        if self.hitFunction is not None:
+            return self.hitFunction(x, y, tolerance)
+        if self.count() == 0:
+            return None
+        d = self.xy2 - self.xy1
+        rel = np.array((x, y)) - self.xy1
+        dd = np.einsum('ij,ij->i', d, d)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            t = np.clip(np.where(dd > 0, np.einsum('ij,ij->i', rel, d) / dd, 0.0), 0.0, 1.0)
+        dist = np.hypot(*(rel - t[:, None] * d).T)
+        dist[np.isnan(dist)] = np.inf
+        i = int(np.argmin(dist))
+        return i if dist[i] <= tolerance else None
+
+    def hoverMoveEvent(self, event):
+        tolerance = max(self.pen.widthF(), 2.0)
+        scale = self.scene().views()[0].transform().m11() if self.scene() and self.scene().views() else 1.0
+        i = self.linkAt(event.pos().x(), event.pos().y(), tolerance / max(scale, 1e-9))
+        self.setToolTip('' if i is None or self.tipFunction is None else self.tipFunction(i))
+        super().hoverMoveEvent(event)
+
+class NodeBatchItem(qtw.QGraphicsItem):
+    def __init__(self, xy, radius=5, pen=None, brush=None, path=None, parent=None):
+        """
+        Draws every node of a large truss from one cached QPainterPath of circles.
+        :param xy: (n,2) node positions
+        :param path: the result of makePath(xy, radius) if it was already built
+        """
+        super().__init__(parent)
+        self.radius = radius
+        self.pen = pen if pen is not None else qtg.QPen()
+        self.brush = brush if brush is not None else qtg.QBrush()
+        self.setPoints(xy, path)
+
+    @staticmethod
+    def makePath(xy, radius):
+        """
+        The path of node circles; like LinkBatchItem.makeLines it can be built on a worker thread.
+        """
+        path = qtg.QPainterPath()
+        for x, y in np.asarray(xy).tolist():
+            path.addEllipse(x - radius, y - radius, 2 * radius, 2 * radius)
+        return path
+
+    def setPoints(self, xy, path=None):
+        self.prepareGeometryChange()
+        self.xy = np.array(xy, dtype=np.float64)
+        path = path if path is not None else self.makePath(self.xy, self.radius)
+        self.path = path
+        pad = self.pen.widthF()
+        self.rect = path.boundingRect().adjusted(-pad, -pad, pad, pad)
+
+    def count(self):
+        return len(self.xy)
+
+    def boundingRect(self):
+        return self.rect
+
+    def paint(self, painter, option, widget=None):
+        painter.setPen(self.pen)
+        painter.setBrush(self.brush)
+        painter.drawPath(self.path)
+
+class MemberTableModel(qtc.QAbstractTableModel):
+    def __init__(self, parent=None):
+        """
+        Table of truss members for a QTableView.  Cells are formatted from the model's arrays only when the view asks
+        for them (i.e. for the visible rows), and sorting only rearranges a permutation of row numbers.
+        """
+        super().__init__(parent)
+        self.truss = None
+        self.order = None  # table row -> link row, None for input order
+        self.tableRows = None  # link row -> table row, the inverse of order
+        self.headers = ['Link', '(1)', '(2)', 'Length', 'Angle', 'Force', 'Stress']
+
+    def setTruss(self, truss):
+        self.beginResetModel()
+        self.truss = truss
+        self.order = None
+        self.tableRows = None
+        self.endResetModel()
+
+    def rowCount(self, parent=qtc.QModelIndex()):
+        if parent.isValid() or self.truss is None:
+            return 0
+        return len(self.truss.links)
+
+    def columnCount(self, parent=qtc.QModelIndex()):
+        if parent.isValid() or self.truss is None:
+            return 0
+        return 7 if self.truss.results is not None else 5
+
+    def headerData(self, section, orientation, role=qtc.Qt.DisplayRole):
+        if role == qtc.Qt.DisplayRole and orientation == qtc.Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def linkRow(self, row):
+        return row if self.order is None else int(self.order[row])
+
+    def columnValues(self, column):
+        """
+        The array behind a numeric column, indexed by link row.
+        """
+        truss = self.truss
+        if column == 3:
+            return truss.linkLengths
+        if column == 4:
+            return truss.linkAngles
+        if column == 5:
+            return truss.results.forces
+        return truss.results.stresses
+
+    def data(self, index, role=qtc.Qt.DisplayRole):
+        if not index.isValid() or self.truss is None:
+            return None
+        column = index.column()
+        if role == qtc.Qt.TextAlignmentRole and column >= 3:
+            return int(qtc.Qt.AlignRight | qtc.Qt.AlignVCenter)
+        if role != qtc.Qt.DisplayRole:
+            return None
+        i = self.linkRow(index.row())
+        if column < 3:
+            link = self.truss.links[i]
+            return (link.name, link.node1_Name, link.node2_Name)[column]
+        return '{:0.2f}'.format(self.columnValues(column)[i])
+
+    def sort(self, column, order=qtc.Qt.AscendingOrder):
+        if self.truss is None:
+            return
+        self.layoutAboutToBeChanged.emit()
+        if column < 3:
+            links = self.truss.links
+            key = (lambda i: links[i].name, lambda i: links[i].node1_Name, lambda i: links[i].node2_Name)[column]
+            perm = np.array(sorted(range(len(links)), key=key), dtype=np.int64)
+        else:
+            perm = np.argsort(self.columnValues(column), kind='stable')
+        self.order = perm[::-1] if order == qtc.Qt.DescendingOrder else perm
+        self.tableRows = np.empty(len(self.order), dtype=np.int64)
+        self.tableRows[self.order] = np.arange(len(self.order))
+        self.layoutChanged.emit()
+
+    def refreshRows(self, rows=None):
+        """
+        Tells the view that the cells of the given link rows (all rows if None) changed.  The rows are mapped to their
+        place in the sorted table and emitted as one dataChanged per run of consecutive table rows.
+        """
+        if self.truss is None or self.rowCount() == 0:
+            return
+        last = self.columnCount() - 1
+        if rows is None:
+            self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, last))
+            return
+        rows = np.asarray(list(rows), dtype=np.int64)
+        if self.tableRows is not None:
+            rows = self.tableRows[rows]
+        rows = np.unique(rows)
+        if len(rows) == 0:
+            return
+        breaks = np.flatnonzero(np.diff(rows) > 1)
+        for first, end in zip(np.r_[0, breaks + 1].tolist(), np.r_[breaks + 1, len(rows)].tolist()):
+            self.dataChanged.emit(self.index(int(rows[first]), 0), self.index(int(rows[end - 1]), last))
+
+class SceneData():
+    """
+    Output of TrussView.prepareScene: bounds ((left, top), (right, bottom)) of the drawing, whether it is drawn
+    batched, and for batched drawing the link end points and lines and the node points and path.
+    """
+    def __init__(self):
+        self.bounds = (np.zeros(2), np.zeros(2))
+        self.batched = False
+        self.xy1 = None
+        self.xy2 = None
+        self.lines = None
+        self.nodeXY = None
+        self.nodePath = None
+
 class TrussView():
     def __init__(self):
         #setup widgets for display.  redefine these when you have a gui to work with using setDisplayWidgets
-        self.scene=qtw.QGraphicsScene()
+        self.scene=GridScene()
         self.le_LongLinkName=qtw.QLineEdit()
         self.le_LongLinkNode1=qtw.QLineEdit()
         self.le_LongLinkNode2=qtw.QLineEdit()
         self.le_LongLinkLength=qtw.QLineEdit()
         self.te_Report=qtw.QTextEdit()
         self.gv=qtw.QGraphicsView()
+        #scene items and report size from the last full build, used for incremental updates
+        self.linkItems=[]
+        self.nodeItems={}
+        self.reportLinkCount=0
+        #above this many links, links and nodes are drawn by one LinkBatchItem and one NodeBatchItem
+        self.batchThreshold=20000
+        self.nodeRadius=5
+        #one of PROJECTIONS; space trusses are drawn as that orthographic view of the model
+        self.projection='front'
+        self.linkBatch=None
+        self.nodeBatch=None
+        #member table; the text report lists the links only up to reportTextLimit of them
+        self.memberTable=MemberTableModel()
+        self.reportTextLimit=2000
 
         #region setup pens and brushes and scene
         #make the pens first
@@ -508,60 +509,230 @@ class TrussView():
         self.gv = args[5]
         self.gv.setScene(self.scene)
 
+    def setProjection(self, projection):
+        """
+        Selects the view of PROJECTIONS used by the next buildScene.
+        """
+        if projection not in PROJECTIONS:
+            raise ValueError('unknown projection {}'.format(projection))
+        self.projection = projection
+
+    def projectedCoords(self, truss):
+        """
+        (n,2) scene positions of the nodes under the current projection.
+        """
+        xyz = truss.nodeCoords()
+        if self.projection == 'front':
+            return xyz[:, :2]
+        return xyz @ PROJECTIONS[self.projection]
+
+    def projectPoint(self, p):
+        """
+        Scene (x, y) of one Position.
+        """
+        u, v = np.array((p.x, p.y, p.z)) @ PROJECTIONS[self.projection]
+        return float(u), float(v)
+
+    def setMemberTable(self, tableView):
+        tableView.setModel(self.memberTable)
+        tableView.setSortingEnabled(True)
+
     def displayReport(self, truss=None):
-        st = '\tTruss Design Report\n'
-        st += 'Title:  {}\n'.format(truss.title)
-        st += 'Static Factor of Safety:  {:0.2f}\n'.format(truss.material.staticFactor)
-        st += 'Ultimate Strength:  {:0.2f}\n'.format(truss.material.uts)
-        st += 'Yield Strength:  {:0.2f}\n'.format(truss.material.ys)
-        st += 'Modulus of Elasticity:  {:0.2f}\n'.format(truss.material.E)
-        st += '_____________Link Summary________________\n'
-        st += 'Link\t(1)\t(2)\tLength\tAngle\n'
-        longest = None
-        for l in truss.links:
-            if longest is None or l.length > longest.length:
-                longest = l
-            st += '{}\t{}\t{}\t{:0.2f}\t{:0.2f}\n'.format(l.name, l.node1_Name, l.node2_Name, l.length, l.angleRad)
-        self.te_Report.setText(st)
+        with trace.span('report', links=len(truss.links)):
+            self.memberTable.setTruss(truss)
+            if len(truss.links) > self.reportTextLimit:
+                # a text layout of every link would freeze the GUI: summary only, the members are in the table
+                header = itertools.islice(truss.reportLines(), truss.reportHeaderCount() - 1)
+                checks = truss.checkLines() if truss.results is not None or truss.caseResults is not None else ()
+                self.te_Report.setText(''.join(header) + '{} links: see the member table or export the report\n'
+                                       .format(len(truss.links)) + ''.join(checks))
+                self.reportLinkCount = None
+            else:
+                self.te_Report.setText(''.join(truss.reportLines()))
+                self.reportLinkCount = len(truss.links)
+            self.displayLongestLink(truss)
+
+    def displayDiagnostics(self, diagnostics, limit=50):
+        """
+        Appends the problems found while reading the file to the end of the report, so the link rows keep their
+        block numbers for updateReport.  Only the first limit are listed.
+        """
+        if not diagnostics:
+            return
+        lines = ['_____________Input Problems________________']
+        lines += [str(d) for d in diagnostics[:limit]]
+        if len(diagnostics) > limit:
+            lines.append('... and {} more'.format(len(diagnostics) - limit))
+        self.te_Report.append('\n'.join(lines))
+
+    def updateReport(self, truss, rows=None):
+        """
+        Rewrites only the report lines of the given link rows.  Falls back to displayReport when rows is None or the
+        number of links has changed since the report was built.
+        """
+        if rows is None or self.memberTable.rowCount() != len(truss.links):
+            self.displayReport(truss=truss)
+            return
+        self.memberTable.refreshRows(rows)
+        if self.reportLinkCount is None:
+            self.displayLongestLink(truss)
+            return
+        if self.reportLinkCount != len(truss.links):
+            self.displayReport(truss=truss)
+            return
+        doc = self.te_Report.document()
+        cursor = qtg.QTextCursor(doc)
+        first = truss.reportHeaderCount()
+        cursor.beginEditBlock()
+        for i in rows:
+            block = doc.findBlockByNumber(first + i)
+            cursor.setPosition(block.position())
+            cursor.movePosition(qtg.QTextCursor.EndOfBlock, qtg.QTextCursor.KeepAnchor)
+            cursor.insertText(truss.reportRow(i).rstrip('\n'))
+        cursor.endEditBlock()
+        self.displayLongestLink(truss)
+
+    def displayLongestLink(self, truss):
+        longest = truss.longestLink()
         self.le_LongLinkName.setText(longest.name)
         self.le_LongLinkLength.setText("{:0.2f}".format(longest.length))
         self.le_LongLinkNode1.setText(longest.node1_Name)
         self.le_LongLinkNode2.setText(longest.node2_Name)
 
-    def buildScene(self, truss):
-        # Constructs the scene with a grid and draws nodes and links
+    def prepareScene(self, truss):
+        """
+        Does the part of buildScene that creates no scene items: the bounds and, above batchThreshold, the link
+        lines and node path of the batch items.  It only uses the model and Qt value types, so TrussLoader runs it on
+        its worker thread and passes the result to buildScene.
+        """
+        with trace.span('scene.prepare', links=len(truss.links)):
+            data = SceneData()
+            xy = self.projectedCoords(truss)
+            if len(xy):
+                data.bounds = (xy.min(axis=0) - 50, xy.max(axis=0) + 50)
+            data.batched = len(truss.links) > self.batchThreshold
+            if data.batched:
+                data.xy1, data.xy2 = self.linkEndPoints(truss)
+                data.lines = LinkBatchItem.makeLines(data.xy1, data.xy2)
+                data.nodeXY = xy
+                data.nodePath = NodeBatchItem.makePath(xy, self.nodeRadius)
+            return data
+
+    def buildScene(self, truss, prepared=None):
+        """
+        Constructs the scene with a grid and draws nodes and links.
+        :param prepared: SceneData from prepareScene(truss), if it was built ahead of time
+        """
         if not truss.nodes:
             print("No nodes available to build the scene.")
             return
 
-        self.scene.clear()
-        self.drawAGrid()
-        self.drawLinks(truss)
-        self.drawNodes(truss)
+        data = prepared if prepared is not None else self.prepareScene(truss)
+        with trace.span('scene', links=len(truss.links), batched=data.batched):
+            self.scene.clear()
+            self.linkBatch = None
+            self.nodeBatch = None
+            (left, top), (right, bottom) = data.bounds
+            self.drawAGrid(Height=bottom - top, Width=right - left, CenterX=(left + right) / 2,
+                           CenterY=(top + bottom) / 2)
+            if data.batched:
+                self.drawLinksBatched(truss, data)
+                self.drawNodesBatched(truss, data)
+            else:
+                self.drawLinks(truss)
+                self.drawNodes(truss)
+
+    def updateScene(self, truss, nodes, rows):
+        """
+        Moves the scene items of the given nodes (by name) and link rows instead of rebuilding the scene.  Falls back
+        to buildScene if links or nodes were added since the scene was built.
+        """
+        if self.linkBatch is not None:
+            if self.linkBatch.count() != len(truss.links) or self.nodeBatch.count() != len(truss.nodes):
+                self.buildScene(truss)
+                return
+            xy1, xy2 = self.linkEndPoints(truss)
+            if len(rows):
+                self.linkBatch.moveLines(rows, xy1[rows], xy2[rows])
+            if nodes:
+                self.nodeBatch.setPoints(self.projectedCoords(truss))
+            return
+        if len(self.linkItems) != len(truss.links) or any(name not in self.nodeItems for name in nodes):
+            self.buildScene(truss)
+            return
+        for name in nodes:
+            x, y = self.projectPoint(truss.getNode(name).position)
+            self.nodeItems[name].setRect(x - 5, y - 5, 10, 10)
+        for i in rows:
+            item = self.linkItems[i]
+            link = truss.links[i]
+            node1 = truss.getNode(link.node1_Name)
+            node2 = truss.getNode(link.node2_Name)
+            if item is not None and node1 and node2:
+                item.setLine(*self.projectPoint(node1.position), *self.projectPoint(node2.position))
 
     def drawAGrid(self, DeltaX=10, DeltaY=10, Height=320, Width=320, CenterX=120, CenterY=60):
-        # Draws a reference grid in the scene
-        startX = CenterX - Width // 2
-        endX = CenterX + Width // 2
-        startY = CenterY - Height // 2
-        endY = CenterY + Height // 2
-        for x in range(startX, endX + 1, DeltaX):
-            self.scene.addLine(x, startY, x, endY, self.penGridLines)
-        for y in range(startY, endY + 1, DeltaY):
-            self.scene.addLine(startX, y, endX, y, self.penGridLines)
+        # The grid is painted by GridScene.drawBackground for the visible area only; here we just set its spacing
+        # and make the scene rect cover the given extent (the model bounds from buildScene)
+        self.scene.setGrid(DeltaX, DeltaY, pen=self.penGridLines)
+        self.scene.setSceneRect(CenterX - Width / 2, CenterY - Height / 2, Width, Height)
 
     def drawLinks(self, truss):
-        # Draws all links between nodes in the truss
-        for link in truss.links:
-            node1 = truss.getNode(link.node1_Name)
-            node2 = truss.getNode(link.node2_Name)
-            if node1 and node2:
-                self.scene.addLine(node1.position.x, node1.position.y, node2.position.x, node2.position.y, self.penLink)
+        # Draws all links between nodes in the truss.  linkItems[i] is the item of truss.links[i] (None if not drawn)
+        self.linkItems = []
+        xy1, xy2 = self.linkEndPoints(truss)
+        for (x1, y1), (x2, y2) in zip(xy1.tolist(), xy2.tolist()):
+            item = None
+            if x1 == x1 and x2 == x2:  # not nan: both nodes exist
+                item = self.scene.addLine(x1, y1, x2, y2, self.penLink)
+            self.linkItems.append(item)
+
+    def linkEndPoints(self, truss):
+        """
+        (m,2) arrays of projected link start and end points, nan for links with a missing node.
+        """
+        xy = self.projectedCoords(truss)
+        ends = truss.linkNodeIndices()
+        valid = (ends >= 0).all(axis=1)
+        xy1 = np.full((len(ends), 2), np.nan)
+        xy2 = np.full((len(ends), 2), np.nan)
+        xy1[valid] = xy[ends[valid, 0]]
+        xy2[valid] = xy[ends[valid, 1]]
+        return xy1, xy2
+
+    def drawLinksBatched(self, truss, prepared=None):
+        # Draws all links with one LinkBatchItem; tool tips are looked up from the model by link row
+        def tip(i):
+            link = truss.links[i]
+            return 'link: {}\nlength = {:0.2f}\nangle deg = {:0.2f}'.format(link.name, link.length or 0.0,
+                                                                           math.degrees(link.angleRad or 0.0))
+        def hit(x, y, tolerance):
+            rows = truss.linksNear(x, y, tolerance)
+            return int(rows[0]) if len(rows) else None
+        if self.projection != 'front':
+            hit = None  # the spatial index is in model x-y; the batch item searches its projected lines instead
+        if prepared is not None:
+            xy1, xy2, lines = prepared.xy1, prepared.xy2, prepared.lines
+        else:
+            (xy1, xy2), lines = self.linkEndPoints(truss), None
+        self.linkItems = []
+        self.linkBatch = LinkBatchItem(xy1, xy2, pen=self.penLink, tipFunction=tip, hitFunction=hit, lines=lines)
+        self.scene.addItem(self.linkBatch)
+
+    def drawNodesBatched(self, truss, prepared=None):
+        self.nodeItems = {}
+        if prepared is not None:
+            xy, path = prepared.nodeXY, prepared.nodePath
+        else:
+            xy, path = self.projectedCoords(truss), None
+        self.nodeBatch = NodeBatchItem(xy, radius=self.nodeRadius, pen=self.penNode, brush=self.brushNode, path=path)
+        self.scene.addItem(self.nodeBatch)
 
     def drawNodes(self, truss):
-        # Draws all nodes in the truss
-        for node in truss.nodes:
-            self.scene.addEllipse(node.position.x - 5, node.position.y - 5, 10, 10, self.penNode, self.brushNode)
+        # Draws all nodes in the truss.  nodeItems maps node name -> ellipse item
+        self.nodeItems = {}
+        for node, (x, y) in zip(truss.nodes, self.projectedCoords(truss).tolist()):
+            self.nodeItems[node.name] = self.scene.addEllipse(x - 5, y - 5, 10, 10, self.penNode, self.brushNode)
 
     def drawALabel(self, x, y, str='', pen=None, brush=None, tip=None):
         # Draws a label at the specified position
@@ -588,3 +759,67 @@ class TrussView():
         return ellipse
 
 
+
+class LoadResult():
+    """
+    What TrussLoader hands to the GUI thread: the model, its diagnostics and the prepared scene data.
+    """
+    def __init__(self, filename, truss, diagnostics, scene):
+        self.filename = filename
+        self.truss = truss
+        self.diagnostics = diagnostics
+        self.scene = scene
+
+class TrussLoader(qtc.QObject):
+    """
+    Reads, analyzes and prepares the drawing of a design file off the GUI thread.  Move it to a QThread and connect
+    the thread's started signal to run.  Exactly one of finished(LoadResult), failed(message) or cancelled() is
+    emitted at the end; progress(percent, stage) is emitted as the work goes on.  Only the scene items themselves
+    are created on the GUI thread, by TrussView.buildScene(result.truss, result.scene).
+    """
+    progress = qtc.pyqtSignal(int, str)
+    finished = qtc.pyqtSignal(object)
+    failed = qtc.pyqtSignal(str)
+    cancelled = qtc.pyqtSignal()
+
+    # share of the progress bar given to each stage
+    stageRange = {'parse': (0, 80), 'geometry': (80, 85), 'solve': (85, 92), 'scene': (92, 100)}
+
+    def __init__(self, controller, view, filename, cache=None, parent=None):
+        super().__init__(parent)
+        self.controller = controller
+        self.view = view
+        self.filename = filename
+        self.cache = cache
+        self._cancel = False
+        self._percent = -1
+
+    def cancel(self):
+        # called from the GUI thread; the worker stops at its next progress check
+        self._cancel = True
+
+    def _progress(self, stage, fraction):
+        if self._cancel:
+            raise LoadCancelled()
+        lo, hi = self.stageRange[stage]
+        percent = int(lo + (hi - lo) * fraction)
+        if percent != self._percent:
+            self._percent = percent
+            self.progress.emit(percent, stage)
+
+    @qtc.pyqtSlot()
+    def run(self):
+        try:
+            truss, diagnostics = self.controller.readDesign(self.filename, self.cache, progress=self._progress)
+            self._progress('scene', 0.0)
+            scene = self.view.prepareScene(truss)
+            if truss.nodes:
+                truss.spatialIndex()  # built here so the first hover does not stall the GUI
+            self._progress('scene', 1.0)
+        except LoadCancelled:
+            self.cancelled.emit()
+            return
+        except Exception as e:
+            self.failed.emit('{}: {}'.format(type(e).__name__, e))
+            return
+        self.finished.emit(LoadResult(self.filename, truss, diagnostics, scene))
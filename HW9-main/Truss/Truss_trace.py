@@ -0,0 +1,199 @@
+"""
+Instrumentation for the truss pipeline: named spans and counters.
+
+    TRUSS_TRACE=summary python Truss_App.py      print span times and counters to stderr at exit
+    TRUSS_TRACE=chrome python Truss_bench.py     write truss_trace.json at exit (TRUSS_TRACE_FILE to rename it)
+    TRUSS_TRACE=run1.json python Truss_batch.py  chrome trace written to run1.json
+
+The chrome trace is the Trace Event JSON format, which chrome://tracing and https://ui.perfetto.dev can load.
+The mode can also be set from code with setMode.  With tracing off (the default) span() returns one shared
+do-nothing context manager and count() returns at once, so instrumented code costs a function call per span.
+
+Usage:
+    import Truss_trace as trace
+    with trace.span('parse', file=name):
+        ...
+    trace.count('links', len(links))
+
+Worker processes started by multiprocessing do not run exit handlers, so traces from Truss_batch are only
+complete with --jobs 1.
+"""
+import atexit
+import os
+import sys
+import time
+
+OFF='off'
+SUMMARY='summary'
+CHROME='chrome'
+
+class _NullSpan():
+    __slots__=()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+_NULL=_NullSpan()
+
+class Span():
+    """
+    One timed region.  Extra values for the trace (sizes, file names) are given as keywords or added with set().
+    """
+    __slots__=('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer, name, args):
+        self.tracer=tracer
+        self.name=name
+        self.args=args
+        self.start=0
+
+    def __enter__(self):
+        self.start=time.perf_counter_ns()
+        return self
+
+    def __exit__(self, excType, exc, tb):
+        if excType is not None:
+            self.args['error']=excType.__name__
+        self.tracer.record(self.name, self.start, time.perf_counter_ns(), self.args)
+        return False
+
+    def set(self, **args):
+        self.args.update(args)
+
+class Tracer():
+    """
+    Collects span timings and counters.  totals holds name -> [calls, total ns, max ns] for the summary; events
+    holds the individual spans and counter changes, kept only in chrome mode.
+    """
+    def __init__(self, mode=SUMMARY, filename=None):
+        self.mode=mode
+        self.filename=filename or 'truss_trace.json'
+        self.reset()
+
+    def reset(self):
+        self.totals={}
+        self.counters={}
+        self.events=[]
+        self.origin=time.perf_counter_ns()
+
+    def span(self, name, args):
+        return Span(self, name, args)
+
+    def record(self, name, start, stop, args):
+        dt=stop-start
+        total=self.totals.get(name)
+        if total is None:
+            self.totals[name]=[1, dt, dt]
+        else:
+            total[0]+=1
+            total[1]+=dt
+            if dt > total[2]:
+                total[2]=dt
+        if self.mode == CHROME:
+            self.events.append((name, start, dt, args or None))
+
+    def count(self, name, n=1):
+        value=self.counters.get(name, 0)+n
+        self.counters[name]=value
+        if self.mode == CHROME:
+            self.events.append((name, time.perf_counter_ns(), None, value))
+
+    def summaryLines(self):
+        """
+        Generator for the lines of the summary table: spans by total time, then counters.
+        """
+        yield 'span                          calls     total ms      mean ms       max ms\n'
+        for name, (calls, total, longest) in sorted(self.totals.items(), key=lambda kv: -kv[1][1]):
+            yield '{:28s} {:6d} {:12.3f} {:12.3f} {:12.3f}\n'.format(name, calls, total/1e6, total/calls/1e6,
+                                                                      longest/1e6)
+        if self.counters:
+            yield 'counter                            value\n'
+            for name, value in sorted(self.counters.items()):
+                yield '{:28s} {:12}\n'.format(name, value)
+
+    def chromeTrace(self):
+        """
+        The recorded events as a Trace Event format dict (timestamps in microseconds from the tracer start).
+        """
+        pid=os.getpid()
+        events=[{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': 'truss'}}]
+        for name, start, dt, args in self.events:
+            ts=(start-self.origin)/1000.0
+            if dt is None:
+                events.append({'name': name, 'ph': 'C', 'ts': ts, 'pid': pid, 'tid': 0, 'args': {name: args}})
+            else:
+                event={'name': name, 'ph': 'X', 'ts': ts, 'dur': dt/1000.0, 'pid': pid, 'tid': 0}
+                if args:
+                    event['args']={k: v if isinstance(v, (int, float, str, bool)) or v is None else str(v)
+                                   for k, v in args.items()}
+                events.append(event)
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def dump(self, filename=None):
+        import json
+        with open(filename or self.filename, 'w') as f:
+            json.dump(self.chromeTrace(), f)
+
+_tracer=None
+
+def setMode(mode, filename=None):
+    """
+    Switches tracing: 'off' (or '', '0'), 'summary' (or '1'), 'chrome' (or 'json'), or a file name ending in .json
+    for a chrome trace written there.  Data recorded before the switch is discarded.
+    :return: the new Tracer, or None when off
+    """
+    global _tracer
+    mode=(mode or OFF).strip()
+    if mode.lower().endswith('.json'):
+        mode, filename=CHROME, mode
+    mode={'0': OFF, '': OFF, 'none': OFF, '1': SUMMARY, 'json': CHROME}.get(mode.lower(), mode.lower())
+    if mode not in (OFF, SUMMARY, CHROME):
+        raise ValueError('unknown trace mode {}'.format(mode))
+    _tracer=None if mode == OFF else Tracer(mode, filename)
+    return _tracer
+
+def tracer():
+    return _tracer
+
+def enabled():
+    return _tracer is not None
+
+def span(name, **args):
+    """
+    Context manager timing the enclosed block under name.
+    """
+    if _tracer is None:
+        return _NULL
+    return _tracer.span(name, args)
+
+def count(name, n=1):
+    """
+    Adds n to the counter name.
+    """
+    if _tracer is not None:
+        _tracer.count(name, n)
+
+def printSummary(file=None):
+    if _tracer is not None:
+        (file or sys.stderr).writelines(_tracer.summaryLines())
+
+def _atExit():
+    if _tracer is None:
+        return
+    if _tracer.mode == CHROME:
+        _tracer.dump()
+        print('trace written to {}'.format(_tracer.filename), file=sys.stderr)
+    else:
+        printSummary()
+
+try:
+    setMode(os.environ.get('TRUSS_TRACE'), os.environ.get('TRUSS_TRACE_FILE'))
+except ValueError as e:
+    print('TRUSS_TRACE: {}'.format(e), file=sys.stderr)
+atexit.register(_atExit)
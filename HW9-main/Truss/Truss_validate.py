@@ -0,0 +1,283 @@
+"""
+Topology checks that find unstable trusses before the stiffness matrix is factorized.
+
+    python Truss_validate.py "Truss Design Input File 1.txt" --pivots
+
+validateTruss runs in time near-linear in the number of members and reports:
+
+    components      connected components of the joints, from a vectorized union-find
+    determinacy     Maxwell's count m + r - d*j for the truss and for each component (m members, r reactions, j joints,
+                    d = 2 or 3); a negative count is always a mechanism
+    free bodies     components with fewer reactions than rigid-body motions (3 in the plane, 6 in space)
+    zero stiffness  joints whose own stiffness (the sum of c*c^T over their members, plus their supports) is singular,
+                    e.g. a joint held only by collinear members, or a space-truss joint whose members lie in one plane
+
+These are necessary conditions: a truss that passes can still be a mechanism (parallel rollers, a badly braced
+panel).  findMechanisms covers that with one pivoting LU factorization of the regularized stiffness matrix; tiny
+pivots count the independent mechanisms, and one solve with the factors shows which joints move.  It costs as much
+as an analysis, so it runs only when asked for (--pivots, or pivots=True).
+"""
+import argparse
+import sys
+import numpy as np
+
+import Truss_trace as trace
+
+def components(nNodes, ends):
+    """
+    Connected component label of every node (the smallest node row in its component).  Union-find done on all links
+    at once: each round hooks the larger root of every link to the smaller one, then pointer jumping flattens the
+    trees, until no link joins two roots.
+    :param ends: (m,2) node rows of each link, -1 for a missing node
+    """
+    parent=np.arange(nNodes)
+    ends=np.asarray(ends)
+    e=ends[(ends >= 0).all(axis=1)].astype(np.int64)
+    while len(e):
+        a=parent[e[:, 0]]
+        b=parent[e[:, 1]]
+        join=a != b
+        if not join.any():
+            break
+        lo=np.minimum(a[join], b[join])
+        hi=np.maximum(a[join], b[join])
+        np.minimum.at(parent, hi, lo)
+        while True:
+            grand=parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent=grand
+        e=e[join]  # links already inside one tree stay there
+    return parent
+
+def jointStiffnessRank(nNodes, ends, dirCos, fixed, dim, tol=1e-9):
+    """
+    Rank deficiency of each joint's own dim x dim stiffness block, sum(c*c^T) over its members plus 1 on each fixed
+    direction.  Unit member stiffness is used since only the directions matter.
+    :param fixed: (n,dim) bool support fixity
+    :return: (n,) number of zero-stiffness directions of each joint
+    """
+    valid=np.isfinite(dirCos).all(axis=1) & (np.abs(dirCos[:, :dim]).sum(axis=1) > 0) & (ends >= 0).all(axis=1)
+    nodes=np.concatenate((ends[valid, 0], ends[valid, 1])).astype(np.int64)
+    c=np.concatenate((dirCos[valid, :dim], dirCos[valid, :dim]))
+    block=np.zeros((nNodes, dim, dim))
+    for i in range(dim):
+        for j in range(i, dim):
+            block[:, i, j]=np.bincount(nodes, weights=c[:, i]*c[:, j], minlength=nNodes)
+            block[:, j, i]=block[:, i, j]
+    block[:, np.arange(dim), np.arange(dim)]+=fixed
+    eig=np.linalg.eigvalsh(block)
+    scale=np.maximum(eig[:, -1], 1.0)
+    return np.count_nonzero(eig < tol*scale[:, None], axis=1)
+
+class ValidationReport():
+    """
+    Output of validateTruss.  Node and link arrays are rows of truss.nodes and truss.links.
+    dim: 2 or 3
+    joints, members, reactions: counts used for determinacy (members with both ends and a length only)
+    degree: members + reactions - dim*joints (< 0 mechanism, 0 determinate if stable, > 0 indeterminate)
+    labels: component label of every node; componentCount
+    freeBodies: labels of components with too few reactions to stop rigid-body motion
+    deficient: labels of components whose own count is negative
+    zeroStiffness: rows of joints with a zero-stiffness direction
+    badLinks: rows of links with a missing node or zero length
+    mechanismNodes, mechanisms: from findMechanisms (None unless it was run)
+    """
+    def __init__(self):
+        self.dim=2
+        self.joints=0
+        self.members=0
+        self.reactions=0
+        self.degree=0
+        self.labels=np.zeros(0, dtype=np.int64)
+        self.componentCount=0
+        self.freeBodies=np.zeros(0, dtype=np.int64)
+        self.deficient=np.zeros(0, dtype=np.int64)
+        self.zeroStiffness=np.zeros(0, dtype=np.int64)
+        self.badLinks=np.zeros(0, dtype=np.int64)
+        self.mechanismNodes=None
+        self.mechanisms=None
+
+    @property
+    def unstable(self):
+        """
+        True if the truss is certainly a mechanism, so analysis would fail on a singular stiffness matrix.
+        """
+        return bool(self.degree < 0 or len(self.freeBodies) or len(self.deficient) or len(self.zeroStiffness) or
+                    self.mechanisms)
+
+    def determinacy(self):
+        if self.degree < 0:
+            return 'mechanism: {} too few members or reactions'.format(-self.degree)
+        if self.degree == 0:
+            return 'statically determinate'
+        return 'statically indeterminate to degree {}'.format(self.degree)
+
+    def problems(self, truss, limit=10):
+        """
+        Messages naming the offending nodes and links, at most limit names each.
+        """
+        nodes=truss.nodes
+        links=truss.links
+        out=[]
+        if self.degree < 0:
+            out.append('{} ({} members + {} reactions < {} x {} joints)'.format(
+                self.determinacy(), self.members, self.reactions, self.dim, self.joints))
+        for label in self.freeBodies.tolist():
+            out.append('not adequately supported: component of {}'.format(
+                _names(nodes, np.flatnonzero(self.labels == label), limit)))
+        for label in self.deficient.tolist():
+            if label not in self.freeBodies:
+                out.append('mechanism: too few members in component of {}'.format(
+                    _names(nodes, np.flatnonzero(self.labels == label), limit)))
+        if len(self.zeroStiffness):
+            out.append('zero stiffness at joint {}'.format(_names(nodes, self.zeroStiffness, limit)))
+        if len(self.badLinks):
+            out.append('link with a missing node or zero length: {}'.format(_names(links, self.badLinks, limit)))
+        if self.mechanisms:
+            out.append('{} mechanism{} moving joint {} and link {}'.format(
+                self.mechanisms, 's' if self.mechanisms > 1 else '', _names(nodes, self.mechanismNodes, limit),
+                _names(links, _incidentLinks(truss, self.mechanismNodes), limit)))
+        return out
+
+    def lines(self, truss):
+        """
+        Generator for a short text summary.
+        """
+        yield 'joints {}, members {}, reactions {} ({}D)\n'.format(self.joints, self.members, self.reactions,
+                                                                self.dim)
+        yield '{}\n'.format(self.determinacy())
+        yield 'components {}\n'.format(self.componentCount)
+        for p in self.problems(truss):
+            yield p+'\n'
+
+def _names(items, rows, limit):
+    rows=np.asarray(rows).tolist()
+    st=', '.join(items[i].name for i in rows[:limit])
+    return st+' and {} more'.format(len(rows)-limit) if len(rows) > limit else st
+
+def _incidentLinks(truss, nodeRows):
+    ends=truss.linkNodeIndices()
+    mark=np.zeros(len(truss.nodes), dtype=bool)
+    mark[nodeRows]=True
+    valid=(ends >= 0).all(axis=1)
+    safe=np.where(valid[:, None], ends, 0)
+    return np.flatnonzero(valid & (mark[safe[:, 0]] | mark[safe[:, 1]]))
+
+def supportFixity(truss, dim):
+    """
+    (n,dim) bool array of the supported directions of every node.
+    """
+    fixed=np.zeros((len(truss.nodes), dim), dtype=bool)
+    if truss.supports:
+        rowOf=truss.nodeRows()
+        for name, fix in truss.supports.items():
+            i=rowOf.get(name)
+            if i is not None:
+                n=min(dim, len(fix))
+                fixed[i, :n]=fix[:n]
+    return fixed
+
+def validateTruss(truss, pivots=False):
+    """
+    Runs the near-linear checks (see the module notes), and findMechanisms too if pivots.
+    :return: ValidationReport
+    """
+    with trace.span('validate', nodes=len(truss.nodes), links=len(truss.links)):
+        r=ValidationReport()
+        r.dim=dim=truss.dimension()
+        if truss.linkLengths is None or len(truss.linkLengths) != len(truss.links):
+            truss.calcLinkVals()
+        ends=truss.linkNodeIndices()
+        lengths=truss.linkLengths
+        good=(ends >= 0).all(axis=1) & np.isfinite(lengths) & (lengths > 0)
+        r.badLinks=np.flatnonzero(~good)
+        n=len(truss.nodes)
+        fixed=supportFixity(truss, dim)
+
+        r.joints=n
+        r.members=int(np.count_nonzero(good))
+        r.reactions=int(fixed.sum())
+        r.degree=r.members+r.reactions-dim*r.joints
+
+        r.labels=components(n, ends[good])
+        roots=np.flatnonzero(r.labels == np.arange(n))
+        r.componentCount=len(roots)
+        jointCount=np.bincount(r.labels, minlength=n)
+        memberCount=np.bincount(r.labels[ends[good, 0]], minlength=n)
+        reactionCount=np.bincount(r.labels, weights=fixed.sum(axis=1), minlength=n)
+        rigidBody=3 if dim == 2 else 6
+        # a lone joint has only dim rigid-body motions, and a lone bar in space 5 (turning about its axis moves nothing)
+        needed=np.where(jointCount[roots] == 1, dim, np.where(jointCount[roots] == 2, 2*dim-1, rigidBody))
+        r.freeBodies=roots[reactionCount[roots] < needed]
+        r.deficient=roots[memberCount[roots]+reactionCount[roots] < dim*jointCount[roots]]
+
+        zero=jointStiffnessRank(n, ends, truss.linkDirCos, fixed, dim)
+        r.zeroStiffness=np.flatnonzero(zero > 0)
+        trace.count('validate.components', r.componentCount)
+
+        if pivots and len(truss.links):
+            r.mechanisms, r.mechanismNodes=findMechanisms(truss)
+        return r
+
+def checkBeforeSolve(truss, diagnostics):
+    """
+    Runs validateTruss and adds a Diagnostic for each problem found.
+    :return: False if the truss is certainly a mechanism, in which case analysis should be skipped
+    """
+    from Truss_parser import Diagnostic
+    report=validateTruss(truss)
+    diagnostics.extend(Diagnostic(0, p) for p in report.problems(truss))
+    if report.unstable:
+        diagnostics.append(Diagnostic(0, 'analysis failed: the truss is a mechanism ({})'.format(report.determinacy())))
+        return False
+    return True
+
+def findMechanisms(truss, tol=1e-9):
+    """
+    Pivot-based mechanism check.  The free part of the stiffness matrix is regularized by tol*max(diagonal) and
+    factorized with partial pivoting; each pivot at the regularization level is one independent mechanism.  A solve
+    with the factors amplifies mechanism motions by 1/tol, so the joints that move most are the ones in a mechanism.
+    :return: (number of mechanisms, rows of the moving joints)
+    """
+    import scipy.sparse as sp
+    import scipy.sparse.linalg as spla
+    from Truss_solver import assembleStiffness, memberStiffness
+    with trace.span('validate.pivots'):
+        dim=truss.dimension()
+        xyz=truss.nodeCoords()
+        ends=truss.linkNodeIndices()
+        valid, k, dirCos=memberStiffness(xyz, ends, 1.0, 1.0, dim)
+        K=assembleStiffness(len(xyz), ends, valid, k/np.max(k[valid], initial=1.0), dirCos)
+        free=np.flatnonzero(~supportFixity(truss, dim).ravel())
+        if len(free) == 0:
+            return 0, np.zeros(0, dtype=np.int64)
+        Kff=K[free][:, free].tocsc()
+        eps=tol*max(float(Kff.diagonal().max()), 1.0)
+        lu=spla.splu(Kff+eps*sp.identity(len(free), format='csc'), permc_spec='MMD_AT_PLUS_A')
+        pivot=np.abs(lu.U.diagonal())
+        count=int(np.count_nonzero(pivot < 100.0*eps))
+        if count == 0:
+            return 0, np.zeros(0, dtype=np.int64)
+        rhs=np.random.default_rng(0).standard_normal(len(free))
+        u=np.zeros(dim*len(xyz))
+        u[free]=lu.solve(rhs)
+        motion=np.linalg.norm(u.reshape(-1, dim), axis=1)
+        return count, np.flatnonzero(motion > 1e-3*motion.max())
+
+def Main(argv=None):
+    ap=argparse.ArgumentParser(description='Check a truss design for connectivity, determinacy and mechanisms.')
+    ap.add_argument('file')
+    ap.add_argument('--pivots', action='store_true', help='also run the LU pivot mechanism check')
+    args=ap.parse_args(argv)
+    from Truss_batch import loadModel
+    diagnostics=[]
+    truss=loadModel(args.file, diagnostics)
+    for d in diagnostics:
+        print(d)
+    report=validateTruss(truss, pivots=args.pivots)
+    sys.stdout.writelines(report.lines(truss))
+    return 1 if report.unstable else 0
+
+if __name__ == '__main__':
+    sys.exit(Main())
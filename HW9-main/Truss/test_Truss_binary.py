@@ -0,0 +1,29 @@
+import os
+import numpy as np
+
+from Truss_binary import saveBinary, loadBinary
+from Truss_core import TrussController
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'Truss Design Input File 1.txt')
+
+def test_binary_round_trip(tmp_path):
+    c = TrussController()
+    with open(SAMPLE) as f:
+        c.ImportFromFile(f)
+    truss = c.truss
+    filename = str(tmp_path / 'sample.trb')
+    saveBinary(truss, filename)
+    loaded = loadBinary(filename)
+
+    assert loaded.title == truss.title
+    m, n = loaded.material, truss.material
+    assert (m.uts, m.ys, m.E, m.staticFactor) == (n.uts, n.ys, n.E, n.staticFactor)
+    assert loaded.memberArea == truss.memberArea
+    assert [x.name for x in loaded.nodes] == [x.name for x in truss.nodes]
+    assert np.array_equal(loaded.nodeCoords(), truss.nodeCoords())
+    assert [(l.name, l.node1_Name, l.node2_Name) for l in loaded.links] == \
+        [(l.name, l.node1_Name, l.node2_Name) for l in truss.links]
+    assert {k: tuple(v) for k, v in loaded.supports.items()} == {k: tuple(v) for k, v in truss.supports.items()}
+    assert {k: list(v) for k, v in loaded.loads.items()} == {k: list(v) for k, v in truss.loads.items()}
+    assert loaded.loadCases == truss.loadCases
+    assert loaded.combinations == truss.combinations
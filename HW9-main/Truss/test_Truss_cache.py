@@ -0,0 +1,55 @@
+import os
+import shutil
+import numpy as np
+
+from Truss_cache import TrussCache, loadDesign
+from Truss_core import importLines, TrussModel
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'Truss Design Input File 1.txt')
+
+def build(filename, diagnostics):
+    with open(filename) as f:
+        return importLines(TrussModel(arrayBacked=True), f, diagnostics)
+
+def load(filename, cache, built, options=None):
+    def counted(filename, diagnostics):
+        built.append(filename)
+        return build(filename, diagnostics)
+    diagnostics = []
+    return loadDesign(filename, counted, cache, diagnostics, options=options), diagnostics
+
+def test_cache_miss_then_hit(tmp_path):
+    filename = str(tmp_path / 'design.txt')
+    shutil.copy(SAMPLE, filename)
+    cache = TrussCache(str(tmp_path / 'cache'))
+    built = []
+    first, firstDiagnostics = load(filename, cache, built)
+    second, secondDiagnostics = load(filename, cache, built)
+    assert len(built) == 1
+    assert np.array_equal(second.results.forces, first.results.forces)
+    assert np.array_equal(second.caseResults.forces, first.caseResults.forces)
+    assert np.array_equal(second.linkLengths, first.linkLengths)
+    assert [str(d) for d in secondDiagnostics] == [str(d) for d in firstDiagnostics]
+
+def test_changed_file_or_options_miss(tmp_path):
+    filename = str(tmp_path / 'design.txt')
+    shutil.copy(SAMPLE, filename)
+    cache = TrussCache(str(tmp_path / 'cache'))
+    built = []
+    load(filename, cache, built)
+    load(filename, cache, built, options='merge 0.001')
+    with open(filename, 'a') as f:
+        f.write('load, C, 0, -5\n')
+    truss, diagnostics = load(filename, cache, built)
+    assert len(built) == 3
+    assert truss.loads['C'][1] == -5.0
+
+def test_version_change_clears_entries(tmp_path):
+    directory = str(tmp_path / 'cache')
+    cache = TrussCache(directory)
+    built = []
+    load(SAMPLE, cache, built)
+    stale = TrussCache(directory)
+    stale.versionTag = 'parser 0 binary 0 analysis 0\n'
+    stale.checkVersion()
+    assert stale.entries() == []
@@ -0,0 +1,78 @@
+from Truss_core import TrussController
+
+LINES = ['material, 105, 82, 30',
+         'static_factor, 3.5',
+         'support, Q, pin',
+         'load, Z, 0, -5',
+         'node, A, 0, 0',
+         'node, B, 60, 100',
+         'node, C, 120, 0',
+         'link, 1, A, B',
+         'link, 2, B, C',
+         'link, 3, A, C',
+         'support, A, pin',
+         'support, C, roller',
+         'load, B, 0, -10']
+
+def test_support_and_load_on_missing_node_are_skipped():
+    c = TrussController()
+    c.ImportFromFile(LINES)
+    messages = [str(d) for d in c.diagnostics]
+    assert 'line 3: skipping support on Q: node not found' in messages
+    assert 'line 4: skipping load on Z (case default): node not found' in messages
+    assert set(c.truss.supports) == {'A', 'C'}
+    assert set(c.truss.loads) == {'B'}
+    assert c.truss.results is not None
+
+MERGE_LINES = ['material, 105, 82, 30',
+               'node, A, 0, 0',
+               'node, B, 60, 100',
+               'node, C, 120, 0',
+               'node, C2, 120.0000001, 0',
+               'link, 1, A, B',
+               'link, 2, B, C2',
+               'link, 3, A, C',
+               'support, A, pin',
+               'support, C2, roller',
+               'load, B, 0, -10',
+               'load, C2, 0, -2',
+               'load, C, 0, -3']
+
+def build(lines, mergeTolerance=None):
+    from Truss_core import TrussModel
+    from Truss_parser import TrussParser, TrussModelBuilder, buildModel
+    diagnostics = []
+    builder = TrussModelBuilder(TrussModel(), diagnostics, mergeTolerance)
+    truss = buildModel(TrussParser(diagnostics).records(lines), builder)
+    return truss, builder, [str(d) for d in diagnostics]
+
+def test_nodes_within_tolerance_are_merged():
+    truss, builder, messages = build(MERGE_LINES, mergeTolerance=1e-3)
+    assert [n.name for n in truss.nodes] == ['A', 'B', 'C']
+    assert [(n, into) for n, into, d in builder.merges] == [('C2', 'C')]
+    assert any(m.startswith('line 5: node C2 merged into C') for m in messages)
+    assert truss.getLinkBetween('B', 'C').name == '2'
+    assert tuple(truss.supports['C']) == (False, True, False) and 'C2' not in truss.supports
+    assert truss.loads['C'][1] == -5.0 and 'C2' not in truss.loads
+
+def test_nodes_are_not_merged_without_tolerance():
+    truss, builder, messages = build(MERGE_LINES)
+    assert len(truss.nodes) == 4 and builder.merges == []
+
+def test_duplicate_and_zero_length_links_are_rejected():
+    lines = ['node, A, 0, 0', 'node, B, 60, 100', 'node, C, 120, 0', 'node, D, 120, 0',
+             'link, 1, A, B', 'link, 2, B, A', 'link, 3, C, C', 'link, 4, C, D', 'link, 5, B, C']
+    truss, builder, messages = build(lines)
+    assert [l.name for l in truss.links] == ['1', '5']
+    assert [name for name, reason in builder.rejectedLinks] == ['2', '3', '4']
+    assert 'line 6: skipping link 2: duplicate of link 1 between B and A' in messages
+    assert 'line 7: skipping link 3: both ends are node C (zero length)' in messages
+    assert 'line 8: skipping link 4: nodes C and D are at the same point (zero length)' in messages
+
+def test_link_pair_index_is_order_independent():
+    truss, builder, messages = build(['node, A, 0, 0', 'node, B, 1, 0', 'node, C, 2, 0', 'link, 1, A, B',
+                                      'link, 2, B, C'])
+    assert truss.linkBetween('B', 'A') == 0 and truss.hasLinkBetween('C', 'B')
+    assert not truss.hasLinkBetween('A', 'C') and truss.getLinkBetween('A', 'C') is None
+    truss.removeNode('A')
+    assert not truss.hasLinkBetween('A', 'B') and truss.linkBetween('B', 'C') == 0
@@ -0,0 +1,65 @@
+import os
+import numpy as np
+
+from Truss_core import TrussController, TrussModel, Node, Link, Position
+from Truss_solver import analyzeTruss
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'Truss Design Input File 1.txt')
+
+def sampleTruss():
+    c = TrussController()
+    with open(SAMPLE) as f:
+        c.ImportFromFile(f)
+    return c.truss
+
+def triangle():
+    truss = TrussModel()
+    truss.material.E = 30
+    for name, x, y in (('A', 0, 0), ('B', 60, 100), ('C', 120, 0)):
+        truss.addNode(Node(name, Position(x, y)))
+    for name, n1, n2 in (('1', 'A', 'B'), ('2', 'B', 'C'), ('3', 'A', 'C')):
+        truss.addLink(Link(name, n1, n2))
+    return truss
+
+def test_sample_truss_member_forces_and_reactions():
+    truss = sampleTruss()
+    forces = dict(zip([l.name for l in truss.links], truss.results.forces.tolist()))
+    expected = {'1': -11.55, '2': 5.77, '3': 0.0, 'top': -5.77, '5': 0.0, '6': 5.77, '7': -11.55}
+    for name, force in expected.items():
+        assert abs(forces[name] - force) < 0.01, name
+    rows = truss.nodeRows()
+    reactions = truss.results.reactions
+    assert np.allclose(reactions[rows['Left']], [0.0, 10.0], atol=1e-9)
+    assert np.allclose(reactions[rows['Right']], [0.0, 10.0], atol=1e-9)
+    # the joints are in equilibrium: reactions balance the applied loads
+    assert np.allclose(reactions.sum(axis=0), [0.0, 20.0], atol=1e-9)
+
+def test_solver_ignores_unknown_support_and_load_names():
+    truss = triangle()
+    truss.supports = {'A': (True, True, True), 'C': (False, True, False), 'Q': (True, True, True)}
+    truss.loads = {'B': [0.0, -10.0, 0.0], 'Z': [0.0, -5.0, 0.0]}
+    results = analyzeTruss(truss)
+    assert abs(results.reactions[:, 1].sum() - 10.0) < 1e-9
+
+def test_load_case_envelope():
+    truss = sampleTruss()
+    r = truss.caseResults
+    assert r.names == ['default', 'wind', 'D+W']
+    assert r.kinds == ['case', 'case', 'combination']
+    default, wind, combined = (r.forces[:, r.column(name)] for name in r.names)
+    assert np.allclose(default, truss.results.forces)
+    assert np.allclose(combined, 1.2 * default + 1.6 * wind)
+    tension, iT, compression, iC = r.envelope()
+    assert np.allclose(tension, np.maximum(r.forces.max(axis=1), 0.0), atol=1e-9)
+    assert np.allclose(compression, np.minimum(r.forces.min(axis=1), 0.0), atol=1e-9)
+    for i in np.flatnonzero(tension > 0):
+        assert r.forces[i, iT[i]] == tension[i]
+    assert (iT[tension == 0] == -1).all() and (iC[compression == 0] == -1).all()
+
+def test_cases_only_leave_results_unset():
+    truss = triangle()
+    truss.supports = {'A': (True, True, True), 'C': (False, True, False)}
+    truss.loadCases = {'wind': {'B': [5.0, 0.0, 0.0]}}
+    analyzeTruss(truss)
+    assert truss.results is None
+    assert truss.caseResults.names == ['wind']
@@ -0,0 +1,66 @@
+import numpy as np
+
+from Truss_spatial import SpatialIndex
+
+def randomTruss(seed=0, nodes=300, links=600):
+    rng = np.random.default_rng(seed)
+    xy = rng.uniform(0.0, 1000.0, (nodes, 2))
+    ends = rng.integers(0, nodes, (links, 2))
+    ends = ends[ends[:, 0] != ends[:, 1]]
+    return xy, ends
+
+def segmentDistance(xy, ends, x, y):
+    p1 = xy[ends[:, 0]]
+    d = xy[ends[:, 1]] - p1
+    rel = np.array((x, y)) - p1
+    t = np.clip(np.einsum('ij,ij->i', rel, d) / np.einsum('ij,ij->i', d, d), 0.0, 1.0)
+    return np.hypot(*(rel - t[:, None] * d).T)
+
+def test_nearest_node_matches_brute_force():
+    xy, ends = randomTruss()
+    index = SpatialIndex(xy, ends)
+    rng = np.random.default_rng(1)
+    for x, y in rng.uniform(0.0, 1000.0, (200, 2)):
+        d = np.hypot(xy[:, 0] - x, xy[:, 1] - y)
+        expected = int(np.argmin(d)) if d.min() <= 40.0 else None
+        assert index.nearestNode(x, y, 40.0) == expected
+
+def test_nodes_in_rect_matches_brute_force():
+    xy, ends = randomTruss()
+    index = SpatialIndex(xy, ends)
+    rng = np.random.default_rng(2)
+    for x0, y0, w, h in zip(*rng.uniform(0.0, 800.0, (2, 50)), *rng.uniform(0.0, 300.0, (2, 50))):
+        inside = (xy[:, 0] >= x0) & (xy[:, 0] <= x0 + w) & (xy[:, 1] >= y0) & (xy[:, 1] <= y0 + h)
+        assert np.array_equal(index.nodesInRect(x0, y0, x0 + w, y0 + h), np.flatnonzero(inside))
+
+def test_links_near_matches_brute_force():
+    xy, ends = randomTruss()
+    index = SpatialIndex(xy, ends)
+    rng = np.random.default_rng(3)
+    for x, y in rng.uniform(0.0, 1000.0, (200, 2)):
+        d = segmentDistance(xy, ends, x, y)
+        assert set(index.linksNear(x, y, 25.0).tolist()) == set(np.flatnonzero(d <= 25.0).tolist())
+
+def segmentsCross(p, q, a, b):
+    """
+    Whether segments p-q (arrays of them) and a-b (one segment) meet, touching included.
+    """
+    def orient(u, v, w):
+        cross = (v[..., 0] - u[..., 0]) * (w[..., 1] - u[..., 1]) - (v[..., 1] - u[..., 1]) * (w[..., 0] - u[..., 0])
+        return np.sign(cross)
+    a = np.broadcast_to(a, p.shape)
+    b = np.broadcast_to(b, p.shape)
+    return (orient(p, q, a) * orient(p, q, b) <= 0) & (orient(a, b, p) * orient(a, b, q) <= 0)
+
+def test_links_in_rect_matches_brute_force():
+    xy, ends = randomTruss()
+    index = SpatialIndex(xy, ends)
+    rng = np.random.default_rng(4)
+    p1, p2 = xy[ends[:, 0]], xy[ends[:, 1]]
+    for x0, y0, w, h in zip(*rng.uniform(0.0, 800.0, (2, 50)), *rng.uniform(0.0, 300.0, (2, 50))):
+        x1, y1 = x0 + w, y0 + h
+        inside = (p1[:, 0] >= x0) & (p1[:, 0] <= x1) & (p1[:, 1] >= y0) & (p1[:, 1] <= y1)
+        corners = np.array([(x0, y0), (x1, y0), (x1, y1), (x0, y1)])
+        for k in range(4):
+            inside |= segmentsCross(p1, p2, corners[k], corners[(k + 1) % 4])
+        assert set(index.linksInRect(x0, y0, x1, y1).tolist()) == set(np.flatnonzero(inside).tolist())
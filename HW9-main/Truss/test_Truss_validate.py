@@ -0,0 +1,44 @@
+import numpy as np
+
+from Truss_validate import components
+
+def bruteComponents(nNodes, ends):
+    label = list(range(nNodes))
+    changed = True
+    while changed:
+        changed = False
+        for a, b in ends:
+            if a < 0 or b < 0:
+                continue
+            low = min(label[a], label[b])
+            if label[a] != low or label[b] != low:
+                label[a] = label[b] = low
+                changed = True
+    return np.array(label)
+
+def test_components_match_brute_force():
+    rng = np.random.default_rng(0)
+    for nNodes, nLinks in ((1, 0), (10, 3), (50, 30), (200, 150), (200, 400)):
+        ends = rng.integers(0, nNodes, (nLinks, 2)) if nLinks else np.zeros((0, 2), dtype=np.int64)
+        assert np.array_equal(components(nNodes, ends), bruteComponents(nNodes, ends))
+
+def test_components_of_a_long_chain_and_missing_nodes():
+    # a chain numbered backwards needs many hooking rounds; -1 marks a link to a missing node
+    n = 1000
+    ends = np.column_stack((np.arange(n - 1, 0, -1), np.arange(n - 2, -1, -1)))
+    ends = np.vstack((ends, [[-1, 5]]))
+    assert (components(n + 1, ends)[:n] == 0).all()
+    assert components(n + 1, ends)[n] == n
+
+def test_check_before_solve_flags_a_mechanism():
+    import os
+    from Truss_core import TrussController
+    from Truss_validate import checkBeforeSolve
+    c = TrussController()
+    with open(os.path.join(os.path.dirname(__file__), 'Truss Design Input File 1.txt')) as f:
+        c.ImportFromFile(f)
+    assert checkBeforeSolve(c.truss, [])
+    c.truss.removeNode('C')  # leaves Left-B-D-Right, which can sway
+    diagnostics = []
+    assert not checkBeforeSolve(c.truss, diagnostics)
+    assert diagnostics[-1].message.startswith('analysis failed: the truss is a mechanism')